@@ -14,13 +14,57 @@
 
 import aiohttp
 import asyncio
+import functools
 import logging
+import re
+import time
 import typing  # flake8: noqa (use mypy typing)
+import urllib.parse
 
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Tuple
 from typing import Union
 
+from petcd import codec
+from petcd.admission import AdmissionControl  # noqa (re-export)
+from petcd.admission import BACKGROUND  # noqa (re-export)
+from petcd.admission import INTERACTIVE  # noqa (re-export)
+from petcd.admission import NORMAL  # noqa (re-export)
+from petcd.cache import ReadCache
+from petcd.cluster import Cluster
+from petcd.cluster import Member
+from petcd.codec import JSONCodec  # noqa (re-export)
+from petcd.exceptions import EtcdCompareFailed  # noqa (re-export)
+from petcd.exceptions import EtcdError  # noqa (re-export)
+from petcd.exceptions import EtcdEventIndexCleared  # noqa (re-export)
+from petcd.exceptions import EtcdKeyNotFound  # noqa (re-export)
+from petcd.exceptions import EtcdNodeExist
+from petcd.exceptions import EtcdNotFile
+from petcd.hedging import HedgePolicy  # noqa (re-export)
+from petcd.lock import Election  # noqa (re-export)
+from petcd.lock import Lock  # noqa (re-export)
+from petcd.metrics import Metrics
+from petcd.metrics import MetricsSink  # noqa (re-export)
+from petcd.mirror import Mirror  # noqa (re-export)
+from petcd.results import EtcdNode  # noqa (re-export)
+from petcd.results import EtcdResult
+from petcd.retries import RetryBudget  # noqa (re-export)
+from petcd.retries import RetryPolicy
+from petcd.retries import idempotent
+from petcd.streaming import NodeStream
+from petcd.ttl import TTLRefresher  # noqa (re-export)
+from petcd.watchers import EventStream
+from petcd.watchers import WatchMultiplexer
+
 logger = logging.getLogger(__name__)
 
+MAX_REDIRECTS = 5
+REDIRECTS = ( 301, 302, 303, 307, 308, )
+
 
 class AsyncEtcdClient(object):
     '''Asynchronous etcd client.
@@ -28,50 +72,203 @@ class AsyncEtcdClient(object):
     Properties
     ----------
 
+    * ``admission``
+    * ``cache``
     * ``cluster``
+    * ``connection_limit``
     * ``etcd_index``
     * ``follow_redirects``
+    * ``hedge_policy``
+    * ``keepalive_timeout``
+    * ``loop``
+    * ``metrics``
     * ``nodes``
+    * ``read_your_writes``
     * ``retries``
+    * ``retry_policy``
     * ``url``
 
     Public Methods
     --------------
 
+    * ``append``
+    * ``close``
     * ``delete``
+    * ``delete_many``
+    * ``dump``
     * ``first``
     * ``get``
     * ``get_dict``
     * ``get_json``
     * ``get_list``
     * ``get_value``
+    * ``iter_events``
+    * ``iter_nodes``
+    * ``load``
     * ``ls``
     * ``mkdir``
     * ``set``
+    * ``set_many``
+    * ``update``
     * ``watch``
 
     Examples
     --------
 
-    TODO Add examples
+    The client holds a pool of keep-alive connections that is shared by all
+    requests it makes.  Close the client when finished with it (or use it as
+    an asynchronous context manager) to release those connections::
+
+        client = AsyncEtcdClient('http://127.0.0.1:2379/v2')
+
+        try:
+            result = yield from client.get('/foo')
+        finally:
+            yield from client.close()
+
+    Several endpoints may be given for a cluster.  Requests go to the healthy
+    member with the lowest average latency, failing over to the others::
+
+        client = AsyncEtcdClient([ 'http://10.0.0.1:2379/v2', 'http://10.0.0.2:2379/v2', ])
+
+    With a ``discovery_interval`` further members are discovered from
+    ``/v2/members`` (every that many seconds).  The given URLs are kept as
+    members as well so members advertising URLs that are not reachable from
+    the client (i.e. behind NAT or a load balancer) do not cut it off::
+
+        client = AsyncEtcdClient('http://10.0.0.1:2379/v2', discovery_interval = 300)
+
+    Reads of keys under ``cache_prefix`` can be served from memory.  The cache
+    is kept coherent by a single recursive watch on that prefix::
+
+        client = AsyncEtcdClient(cache_prefix = '/config', cache_size = 4096)
+
+        value = yield from client.get_value('/config/x')  # from etcd
+        value = yield from client.get_value('/config/x')  # from the cache
+
+    Every response's ``X-Etcd-Index`` is tracked in ``etcd_index``.  With
+    ``read_your_writes`` reads are spread over all members (not sent to the
+    leader with ``quorum``) yet never older than ``etcd_index``: a read
+    answered by a member that has not caught up is sent again to the leader
+    (if known) or the next member, and as a quorum read once every member has
+    lagged::
+
+        client = AsyncEtcdClient(urls, read_your_writes = True)
+
+        yield from client.set('/foo', 'bar')
+        value = yield from client.get_value('/foo')  # 'bar' from any member
+
+    With a HedgePolicy, reads (other than waits and quorum reads) that are
+    slower than most are also sent to a second member and answered by
+    whichever member is first, cutting the latency a single slow member adds
+    to the tail::
+
+        client = AsyncEtcdClient(urls, hedge_policy = HedgePolicy(percentile = 0.95, ratio = 0.05))
+
+    With AdmissionControl the client shapes its own traffic: requests are
+    limited to a rate and a number in flight and queue for admission by their
+    ``priority`` (INTERACTIVE, NORMAL or BACKGROUND), so batch work sharing the
+    client (``dump``, ``load``, ``set_many`` and ``delete_many`` default to
+    BACKGROUND) waits behind latency sensitive requests rather than starving
+    them or flooding etcd::
+
+        client = AsyncEtcdClient(urls, admission = AdmissionControl(rate = 500, concurrency = 32, reserve = 8))
+
+        value = yield from client.get_value('/config/x', priority = INTERACTIVE)
 
     '''
 
-    def __init__(self, url: str = 'http://localhost:7379/v2', retries: int = 1, follow_redirects: bool = True) -> None:
+    def __init__(self, url: Union[str, List[str]] = 'http://localhost:7379/v2', retries: int = 1, follow_redirects: bool = True, connection_limit: int = 100, keepalive_timeout: float = 30.0, dns_cache_ttl: int = 10, loop: Union[asyncio.AbstractEventLoop, None] = None, cache_prefix: Union[str, None] = None, cache_size: int = 1024, discovery_interval: Union[float, None] = None, retry_policy: Union[RetryPolicy, None] = None, metrics: Union[Metrics, None] = None, read_your_writes: bool = False, hedge_policy: Union[HedgePolicy, None] = None, admission: Union[AdmissionControl, None] = None) -> None:
         '''Create AsyncEtcdClient.
 
         Parameters
         ----------
 
-        :``follow_redirects``: follow redirect responses (3xx)
-        :``retries``:          number of times to retry failed requests
-        :``url``:              URL for etcd
+        :``admission``:         AdmissionControl for requests (default: no limits)
+        :``cache_prefix``:      directory whose reads are cached (default: no cache)
+        :``cache_size``:        maximum number of cached reads
+        :``connection_limit``:  maximum simultaneous connections per etcd host
+        :``discovery_interval``: seconds between member discovery (default: never)
+        :``dns_cache_ttl``:     seconds to cache resolved etcd host names
+        :``follow_redirects``:  follow redirect responses (3xx)
+        :``hedge_policy``:      HedgePolicy for reads (default: no hedging)
+        :``keepalive_timeout``: seconds to keep an idle connection open
+        :``loop``:              event loop (default: asyncio.get_event_loop())
+        :``metrics``:           Metrics to record requests in (default: Metrics())
+        :``read_your_writes``:  never read state older than ``etcd_index``
+        :``retries``:           number of times to retry failed requests
+        :``retry_policy``:      RetryPolicy (default: RetryPolicy(retries))
+        :``url``:               URL (or list of URLs) for etcd
 
         '''
 
+        self._admission = admission
+
+        self._cache = None  # type: ReadCache
+        if cache_prefix is not None:
+            self._cache = ReadCache(cache_prefix, cache_size)
+
+        self._cache_watcher = None  # type: asyncio.Task
+        self._cluster = None  # type: Cluster
+        self._connection_limit = connection_limit
+        self._discovered_at = None  # type: float
+        self._discovery = None  # type: asyncio.Task
+        self._discovery_interval = discovery_interval
+        self._dns_cache_ttl = dns_cache_ttl
+        self._etcd_index = None  # type: Union[int, None]
         self._follow_redirects = follow_redirects
+        self._hedge_policy = hedge_policy
+        self._in_flight = {}  # type: Dict[Tuple, asyncio.Future]
+        self._keepalive_timeout = keepalive_timeout
+        self._loop = loop
+        self._metrics = metrics
+        self._read_your_writes = read_your_writes
         self._retries = retries
+        self._retry_policy = retry_policy
+        self._session = None  # type: aiohttp.ClientSession
         self._url = url
+        self._watchers = None  # type: WatchMultiplexer
+
+    @asyncio.coroutine
+    def __aenter__(self) -> 'AsyncEtcdClient':
+        return self
+
+    @asyncio.coroutine
+    def __aexit__(self, *args) -> None:
+        yield from self.close()
+
+    @property
+    def admission(self) -> Union[AdmissionControl, None]:
+        '''AdmissionControl requests are admitted by (None: no limits).'''
+
+        return self._admission
+
+    @property
+    def cache(self) -> Union[ReadCache, None]:
+        '''Read cache (None if caching is disabled).'''
+
+        return self._cache
+
+    @property
+    def cluster(self) -> Cluster:
+        '''Members of the etcd cluster.'''
+
+        if self._cluster is None:
+            self._cluster = Cluster([ self._url, ] if isinstance(self._url, str) else self._url)
+
+        return self._cluster
+
+    @property
+    def connection_limit(self) -> int:
+        '''Maximum simultaneous connections per etcd host.'''
+
+        return self._connection_limit
+
+    @property
+    def etcd_index(self) -> Union[int, None]:
+        '''Highest X-Etcd-Index of any response (None before the first).'''
+
+        return self._etcd_index
 
     @property
     def follow_redirects(self):
@@ -80,50 +277,1407 @@ class AsyncEtcdClient(object):
         return self._follow_redirects
 
     @property
-    def loop(self):
+    def hedge_policy(self) -> Union[HedgePolicy, None]:
+        '''Policy deciding when reads are hedged (None if they are not).'''
+
+        return self._hedge_policy
+
+    @property
+    def keepalive_timeout(self) -> float:
+        '''Seconds an idle pooled connection is kept open.'''
+
+        return self._keepalive_timeout
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
         '''Event loop used by this client.'''
 
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+
         return self._loop
 
+    @property
+    def metrics(self) -> Metrics:
+        '''Counters and latency histograms of this client's requests.'''
+
+        if self._metrics is None:
+            self._metrics = Metrics()
+
+        return self._metrics
+
+    @property
+    def nodes(self) -> List[str]:
+        '''URLs of the cluster's members in order of preference.'''
+
+        return self.cluster.urls
+
+    @property
+    def read_your_writes(self) -> bool:
+        '''True if reads are never older than etcd_index; otherwise, False.'''
+
+        return self._read_your_writes
+
     @property
     def retries(self) -> int:
         '''Number of times to retry actions.'''
 
-        return self._retries
+        return self.retry_policy.retries
+
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        '''Policy deciding how failed requests are retried.'''
+
+        if self._retry_policy is None:
+            self._retry_policy = RetryPolicy(retries = self._retries)
+
+        return self._retry_policy
 
     @property
     def url(self) -> str:
-        '''URL for etcd.'''
+        '''URL for etcd (the first if several were given).'''
+
+        return self._url if isinstance(self._url, str) else self._url[0]
+
+    @asyncio.coroutine
+    def append(self, key: str, value: str, ttl: Union[int, None] = None, timeout: Union[float, None] = None, priority: int = NORMAL) -> EtcdResult:
+        '''Create an in-order key in the given directory.
+
+        etcd names the key after its index so the directory's children
+        (sorted) are in order of creation.
+
+        Parameters
+        ----------
+
+        :``key``:      the directory to create the key in (i.e. '/queue')
+        :``priority``: admission priority (i.e. INTERACTIVE)
+        :``timeout``:  seconds the call (including retries) may take
+        :``ttl``:      seconds until the key expires
+        :``value``:    the value to store
+
+        Return Value(s)
+        ---------------
+
+        EtcdResult (``node.key`` is the created key)
+
+        '''
+
+        return ( yield from self._request(key = key, method = 'POST', body = value, deadline = _deadline(timeout), priority = priority, ttl = ttl) )
+
+    @asyncio.coroutine
+    def close(self) -> None:
+        '''Close all pooled connections.
+
+        The client may still be used afterwards; a new pool is created by the
+        next request.
+
+        '''
+
+        if self._cache_watcher is not None:
+            self._cache_watcher.cancel()
+            self._cache_watcher = None
+
+            self._cache.clear()
+
+        if self._discovery is not None:
+            self._discovery.cancel()
+            self._discovery = None
+
+        if self._watchers is not None:
+            self._watchers.close()
+            self._watchers = None
+
+        if self._session is not None:
+            session, self._session = self._session, None
+
+            logger.debug('closing session: %s', session)
+
+            yield from session.close()
+
+    @asyncio.coroutine
+    def delete(self, key: str, recursive: bool = False, dir: bool = False, prev_index: Union[int, None] = None, prev_value: Union[str, None] = None, timeout: Union[float, None] = None, priority: int = NORMAL) -> EtcdResult:
+        '''Perform a delete action on the given key.
+
+        Parameters
+        ----------
+
+        :``dir``:        delete an empty directory
+        :``key``:        the key to delete (i.e. '/foo')
+        :``prev_index``: only delete if the key's modifiedIndex matches
+        :``prev_value``: only delete if the key's value matches
+        :``priority``:   admission priority (i.e. INTERACTIVE)
+        :``recursive``:  delete a directory and all of its children
+        :``timeout``:    seconds the call (including retries) may take
+
+        Return Value(s)
+        ---------------
+
+        EtcdResult
+
+        '''
+
+        return ( yield from self._request(key = key, method = 'DELETE', deadline = _deadline(timeout), priority = priority, recursive = recursive, dir = dir, prev_index = prev_index, prev_value = prev_value) )
+
+    @asyncio.coroutine
+    def delete_many(self, keys: Iterable[str], recursive: bool = False, concurrency: Union[int, None] = None, stop_on_error: bool = False, timeout: Union[float, None] = None, priority: int = BACKGROUND) -> List[Any]:
+        '''Delete many keys with bounded concurrency.
+
+        Parameters
+        ----------
+
+        :``concurrency``:   maximum deletes in flight (default: connection_limit)
+        :``keys``:          keys to delete
+        :``priority``:      admission priority of the deletes
+        :``recursive``:     delete directories and all of their children
+        :``stop_on_error``: stop at the first error and raise it
+        :``timeout``:       seconds all of the deletes may take (a delete not
+                            finished by then fails with asyncio.TimeoutError)
+
+        Return Value(s)
+        ---------------
+
+        Result of each delete in the order of keys; a failed delete's result is
+        the exception it raised.
+
+        '''
+
+        deadline = _deadline(timeout)
+
+        return ( yield from self._many(lambda key: self.delete(key, recursive = recursive, timeout = _remaining(deadline), priority = priority), keys, concurrency, stop_on_error) )
+
+    @asyncio.coroutine
+    def dump(self, prefix: str, file: typing.TextIO, timeout: Union[float, None] = None, priority: int = BACKGROUND) -> int:
+        '''Write the subtree under prefix to file, one node per line.
+
+        Each line is a JSON object with the node's ``key`` and either its
+        ``value`` or ``dir``, plus its remaining ``ttl`` (if any).  The tree is
+        streamed (see ``iter_nodes``) so only one child of prefix is held in
+        memory at a time.  Directories are only written if they are empty or
+        expire; the others are recreated by their children.
+
+        Parameters
+        ----------
+
+        :``file``:     text file to write to
+        :``prefix``:   directory to dump (i.e. '/foo')
+        :``priority``: admission priority of the read
+        :``timeout``:  seconds the read (including retries) may take; lines
+                       already written are left in file
+
+        Return Value(s)
+        ---------------
+
+        Number of lines written.
+
+        '''
+
+        deadline = _deadline(timeout)
+
+        stream = self._iter_nodes(prefix, deadline, priority, recursive = True, sorted = True)
+        count = 0
+
+        try:
+            while True:
+                try:
+                    node = yield from _within(stream.__anext__(), deadline)
+                except StopAsyncIteration:
+                    break
+
+                for record in _records(node):
+                    file.write(codec.dumps(record, sort_keys = True) + '\n')
+                    count += 1
+        finally:
+            stream.close()
+
+        return count
+
+    @asyncio.coroutine
+    def first(self, key: str, quorum: bool = False, timeout: Union[float, None] = None, priority: int = NORMAL) -> Union[EtcdNode, None]:
+        '''Lowest child of the given directory (i.e. the oldest in-order key).
+
+        Only the first child is decoded; the rest of the response is dropped.
+
+        Parameters
+        ----------
+
+        :``key``:      the directory (i.e. '/queue')
+        :``priority``: admission priority (i.e. INTERACTIVE)
+        :``quorum``:   linearize the read (takes a similar path as write)
+        :``timeout``:  seconds the call (including retries) may take
+
+        Return Value(s)
+        ---------------
 
-        return self._url
+        EtcdNode of the child (None if the directory is empty).
+
+        '''
+
+        deadline = _deadline(timeout)
+
+        stream = self._iter_nodes(key, deadline, priority, quorum = quorum, sorted = True)
+
+        try:
+            return ( yield from _within(stream.__anext__(), deadline) )
+        except StopAsyncIteration:
+            return None
+        finally:
+            stream.close()
 
     @asyncio.coroutine
-    def get(self, key: str, quorum: bool = False, recursive: bool = False, sorted: bool = False, wait: bool = False, wait_index: Union[int, None]  = None):
+    def get(self, key: str, quorum: bool = False, recursive: bool = False, sorted: bool = False, wait: bool = False, wait_index: Union[int, None] = None, timeout: Union[float, None] = None, priority: int = NORMAL):
         '''Perform a get action on the given key.
 
+        Reads that are not waits or quorum reads of keys under the cache's
+        prefix are served from the cache when possible.  Concurrent identical
+        reads (other than waits and quorum reads) are coalesced: one request
+        is sent and every caller receives its result (reads only join reads of
+        the same ``priority`` so an interactive read never waits on the
+        admission of a background one).  With ``read_your_writes`` neither is
+        used if it is older than ``etcd_index``.  A quorum read is always sent
+        by its caller: one sent earlier may miss the caller's own writes.
+
+        A ``timeout`` bounds the whole call: every retry, redirect and
+        failover (and a wait) must finish in it, retries that cannot are not
+        attempted and asyncio.TimeoutError is raised when it runs out.
+
         Parameters
         ----------
 
         :``key``:        the key to retrieve (i.e. '/foo')
+        :``priority``:   admission priority (i.e. INTERACTIVE)
         :``quorum``:     linearize the read (takes a similar path as write)
         :``recursive``:  return specified key and all children
         :``sorted``:     lexicographically sort the list of nodes (children)
+        :``timeout``:    seconds the call (including retries) may take
         :``wait``:       wait for an event on the specified key
         :``wait_index``: point in time (etcd_index) to begin watching for events
 
         Return Value(s)
         ---------------
 
-        EtcdResult ??
+        EtcdResult
+
+        '''
+
+        deadline = _deadline(timeout)
+        cacheable = self._cache is not None and not wait and not quorum and self._cache.covers(key)
+        floor = self._etcd_index if self._read_your_writes else None
+
+        if cacheable:
+            self._watch_cache()
+
+            selector = ( '/' + key.strip('/'), recursive, sorted, )
+
+            result = self._cache.get(selector)
+            if result is not None and ( floor is None or ( self._cache.index or 0 ) >= floor ):
+                return result
+
+        if wait or quorum:
+            return ( yield from self._request(key = key, method = 'GET', deadline = deadline, priority = priority, quorum = quorum, recursive = recursive, sorted = sorted, wait = wait, wait_index = wait_index) )
+
+        flight = ( '/' + key.strip('/'), recursive, sorted, priority, )
+
+        while flight in self._in_flight:
+            future = self._in_flight[flight]
+
+            try:
+                result = yield from _within(asyncio.shield(future), deadline)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+
+                logger.debug('coalesced read of %s was cancelled; retrying', key)
+            except asyncio.TimeoutError:
+                if _remaining(deadline) == 0:
+                    raise
+
+                logger.debug('coalesced read of %s ran out of (its own) time; retrying', key)
+            else:
+                if floor is None or ( result.etcd_index or 0 ) >= floor:
+                    return result
+
+                logger.debug('coalesced read of %s is older than %s; retrying', key, floor)
+
+        future = self._in_flight[flight] = asyncio.Future(loop = self.loop)
+
+        try:
+            result = yield from self._request(key = key, method = 'GET', deadline = deadline, priority = priority, quorum = quorum, recursive = recursive, sorted = sorted, wait = wait, wait_index = wait_index)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            future.exception()  # retrieved by the followers (if any)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            del self._in_flight[flight]
+
+        if cacheable:
+            self._cache.put(selector, result, result.etcd_index or 0)
+
+        return result
+
+    @asyncio.coroutine
+    def get_json(self, key: str, quorum: bool = False, timeout: Union[float, None] = None, priority: int = NORMAL) -> Any:
+        '''Value of the given key decoded from JSON.
+
+        Parameters
+        ----------
+
+        :``key``:      the key to retrieve (i.e. '/foo')
+        :``priority``: admission priority (i.e. INTERACTIVE)
+        :``quorum``:   linearize the read (takes a similar path as write)
+        :``timeout``:  seconds the call (including retries) may take
 
         '''
 
-        return ( yield from self._request(key = key, method = 'GET', quorum = quorum, recursive = recursive, sorted = sorted, wait = wait, wait_index = wait_index) )
+        return codec.loads(( yield from self.get_value(key, quorum = quorum, timeout = timeout, priority = priority) ))
 
     @asyncio.coroutine
-    def _request(self, key: str, method: str, body: Union[str, None] = None, **kwargs):
+    def get_value(self, key: str, quorum: bool = False, timeout: Union[float, None] = None, priority: int = NORMAL) -> str:
+        '''Value of the given key.
+
+        Parameters
+        ----------
+
+        :``key``:      the key to retrieve (i.e. '/foo')
+        :``priority``: admission priority (i.e. INTERACTIVE)
+        :``quorum``:   linearize the read (takes a similar path as write)
+        :``timeout``:  seconds the call (including retries) may take
+
         '''
 
+        return ( yield from self.get(key, quorum = quorum, timeout = timeout, priority = priority) ).node.value
+
+    def iter_events(self, key: str, index: Union[int, None] = None, recursive: bool = False, size: int = 100, overflow: str = 'block') -> EventStream:
+        '''Iterate over the events on the given key as they happen.
+
+        Events are read ahead with ``watch`` into a buffer of ``size`` events;
+        ``overflow`` decides whether a consumer that falls behind stops the
+        reading ('block') or only gets the latest event per key ('coalesce').
+        See EventStream.
+
+        Parameters
+        ----------
+
+        :``index``:     point in time (etcd_index) to begin watching for events
+        :``key``:       the key to watch (i.e. '/foo')
+        :``overflow``:  'block' or 'coalesce'
+        :``recursive``: include events on all children of key
+        :``size``:      maximum events buffered
+
+        Return Value(s)
+        ---------------
+
+        EventStream (an asynchronous iterator of EtcdResult) to close when done.
+
         '''
 
-        pass
+        return EventStream(lambda index: self.watch(key, index = index, recursive = recursive), index, size, overflow, self.loop)
+
+    def iter_nodes(self, key: str, quorum: bool = False, recursive: bool = False, sorted: bool = False, priority: int = NORMAL) -> NodeStream:
+        '''Iterate over the children of the given directory as they arrive.
+
+        The response is decoded incrementally so memory use does not grow with
+        the number of children.  Use this instead of ``get(recursive = True)``
+        for large directories.  The stream holds its admission (if any) until
+        it is closed.
+
+        Parameters
+        ----------
+
+        :``key``:       the directory to list (i.e. '/foo')
+        :``priority``:  admission priority (i.e. BACKGROUND for bulk scans)
+        :``quorum``:    linearize the read (takes a similar path as write)
+        :``recursive``: include all descendants in each child
+        :``sorted``:    lexicographically sort the children
+
+        Return Value(s)
+        ---------------
+
+        Asynchronous iterator (NodeStream) of child EtcdNode.
+
+        '''
+
+        return self._iter_nodes(key, None, priority, quorum = quorum, recursive = recursive, sorted = sorted)
+
+    @asyncio.coroutine
+    def get_list(self, key: str, quorum: bool = False, sorted: bool = False, timeout: Union[float, None] = None, priority: int = NORMAL) -> List[str]:
+        '''Values of the children of the given directory.
+
+        Child directories are skipped.
+
+        Parameters
+        ----------
+
+        :``key``:      the directory to list (i.e. '/foo')
+        :``priority``: admission priority (i.e. INTERACTIVE)
+        :``quorum``:   linearize the read (takes a similar path as write)
+        :``sorted``:   lexicographically sort the children
+        :``timeout``:  seconds the call (including retries) may take
+
+        '''
+
+        deadline = _deadline(timeout)
+
+        return ( yield from _within(_collect(self._iter_nodes(key, deadline, priority, quorum = quorum, sorted = sorted), lambda _: _.value, lambda _: not _.dir), deadline) )
+
+    @asyncio.coroutine
+    def load(self, file: typing.TextIO, concurrency: Union[int, None] = None, stop_on_error: bool = True, timeout: Union[float, None] = None, priority: int = BACKGROUND) -> int:
+        '''Write the nodes in file (as written by ``dump``) to etcd.
+
+        Lines are read as they are needed and written with bounded
+        concurrency (in no particular order).  Keys and directories are
+        created with their dumped TTL; keys whose TTL ran out are skipped.
+
+        Parameters
+        ----------
+
+        :``concurrency``:   maximum writes in flight (default: connection_limit)
+        :``file``:          text file to read from
+        :``priority``:      admission priority of the writes
+        :``stop_on_error``: stop at the first error and raise it (otherwise
+                            failed writes are logged and skipped)
+        :``timeout``:       seconds all of the writes may take (a write not
+                            finished by then fails with asyncio.TimeoutError)
+
+        Return Value(s)
+        ---------------
+
+        Number of nodes written.
+
+        '''
+
+        deadline = _deadline(timeout)
+
+        @asyncio.coroutine
+        def write(record):
+            ttl = record.get('ttl')
+
+            if not record.get('dir'):
+                return ( yield from self.set(record['key'], record['value'], ttl = ttl, timeout = _remaining(deadline), priority = priority) )
+
+            try:
+                return ( yield from self.mkdir(record['key'], ttl = ttl, timeout = _remaining(deadline), priority = priority) )
+            except EtcdNotFile:
+                if ttl is None:
+                    return
+
+                return ( yield from self.mkdir(record['key'], ttl = ttl, prev_exist = True, timeout = _remaining(deadline), priority = priority) )
+
+        records = ( codec.loads(_) for _ in file if _.strip() )
+
+        return ( yield from self._many(write, ( _ for _ in records if _.get('ttl', 1) > 0 ), concurrency, stop_on_error, collect = False) )
+
+    @asyncio.coroutine
+    def ls(self, key: str, quorum: bool = False, sorted: bool = False, timeout: Union[float, None] = None, priority: int = NORMAL) -> List[str]:
+        '''Keys of the children of the given directory.
+
+        Parameters
+        ----------
+
+        :``key``:      the directory to list (i.e. '/foo')
+        :``priority``: admission priority (i.e. INTERACTIVE)
+        :``quorum``:   linearize the read (takes a similar path as write)
+        :``sorted``:   lexicographically sort the children
+        :``timeout``:  seconds the call (including retries) may take
+
+        '''
+
+        deadline = _deadline(timeout)
+
+        return ( yield from _within(_collect(self._iter_nodes(key, deadline, priority, quorum = quorum, sorted = sorted), lambda _: _.key), deadline) )
+
+    @asyncio.coroutine
+    def mkdir(self, key: str, ttl: Union[int, None] = None, prev_exist: Union[bool, None] = None, timeout: Union[float, None] = None, priority: int = NORMAL) -> EtcdResult:
+        '''Create a directory.
+
+        Parameters
+        ----------
+
+        :``key``:        the directory to create (i.e. '/foo')
+        :``prev_exist``: only update (the TTL of) an existing directory
+        :``priority``:   admission priority (i.e. INTERACTIVE)
+        :``timeout``:    seconds the call (including retries) may take
+        :``ttl``:        seconds until the directory (and its children) expire
+
+        Return Value(s)
+        ---------------
+
+        EtcdResult
+
+        '''
+
+        return ( yield from self._request(key = key, method = 'PUT', deadline = _deadline(timeout), priority = priority, dir = True, ttl = ttl, prev_exist = prev_exist) )
+
+    @asyncio.coroutine
+    def set(self, key: str, value: Union[str, None], ttl: Union[int, None] = None, prev_exist: Union[bool, None] = None, prev_index: Union[int, None] = None, prev_value: Union[str, None] = None, refresh: Union[bool, None] = None, timeout: Union[float, None] = None, priority: int = NORMAL) -> EtcdResult:
+        '''Perform a set action on the given key.
+
+        Parameters
+        ----------
+
+        :``key``:        the key to set (i.e. '/foo')
+        :``prev_exist``: only set if the key does (True) or does not (False) exist
+        :``prev_index``: only set if the key's modifiedIndex matches
+        :``prev_value``: only set if the key's value matches
+        :``priority``:   admission priority (i.e. INTERACTIVE)
+        :``refresh``:    only reset the key's ttl (value must be None); watchers
+                         are not notified
+        :``timeout``:    seconds the call (including retries) may take
+        :``ttl``:        seconds until the key expires
+        :``value``:      the value to store
+
+        Return Value(s)
+        ---------------
+
+        EtcdResult
+
+        '''
+
+        return ( yield from self._request(key = key, method = 'PUT', body = value, deadline = _deadline(timeout), priority = priority, ttl = ttl, prev_exist = prev_exist, prev_index = prev_index, prev_value = prev_value, refresh = refresh) )
+
+    @asyncio.coroutine
+    def set_many(self, items: Union[Dict[str, str], Iterable[Tuple[str, str]]], ttl: Union[int, None] = None, concurrency: Union[int, None] = None, stop_on_error: bool = False, timeout: Union[float, None] = None, priority: int = BACKGROUND) -> List[Any]:
+        '''Set many keys with bounded concurrency.
+
+        Parameters
+        ----------
+
+        :``concurrency``:   maximum sets in flight (default: connection_limit)
+        :``items``:         mapping or iterable of (key, value) pairs to set
+        :``priority``:      admission priority of the sets
+        :``stop_on_error``: stop at the first error and raise it
+        :``timeout``:       seconds all of the sets may take (a set not
+                            finished by then fails with asyncio.TimeoutError)
+        :``ttl``:           seconds until each key expires
+
+        Return Value(s)
+        ---------------
+
+        Result of each set in the order of items; a failed set's result is the
+        exception it raised.
+
+        '''
+
+        if hasattr(items, 'items'):
+            items = items.items()
+
+        deadline = _deadline(timeout)
+
+        return ( yield from self._many(lambda item: self.set(item[0], item[1], ttl = ttl, timeout = _remaining(deadline), priority = priority), items, concurrency, stop_on_error) )
+
+    @asyncio.coroutine
+    def update(self, key: str, function: Callable[[Union[str, None]], str], ttl: Union[int, None] = None, attempts: int = 16, timeout: Union[float, None] = None, priority: int = NORMAL) -> EtcdResult:
+        '''Atomically replace the key's value with function(value).
+
+        The value is read, passed to function and the result written back
+        only if the key has not been modified since (prevIndex; prevExist
+        false if it did not exist).  When another writer gets there first the
+        write is retried after a jittered back off (see RetryPolicy.backoff).
+        The failed write reports the key's new modifiedIndex so the retry
+        reads exactly that version (from etcd's event history, which any
+        member can serve) instead of a possibly stale or quorum read.
+
+        Writes are never replayed by the transport: a replay of a write that
+        was applied (but whose response was lost) would fail its comparison
+        and call function again.  When a write's outcome is unknown (a server
+        or connection error) that error is raised; the key may or may not have
+        been updated.
+
+        Parameters
+        ----------
+
+        :``attempts``: maximum number of writes to try
+        :``function``: new value from the current one (None if the key does
+                       not exist); may be called once per attempt
+        :``key``:      the key to update (i.e. '/counter')
+        :``priority``: admission priority (i.e. INTERACTIVE)
+        :``timeout``:  seconds the call (including every attempt) may take
+        :``ttl``:      seconds until the key expires
+
+        Return Value(s)
+        ---------------
+
+        EtcdResult of the successful write.
+
+        Examples
+        --------
+
+        ::
+
+            yield from client.update('/counter', lambda value: str(int(value or 0) + 1))
+
+        '''
+
+        deadline = _deadline(timeout)
+
+        node = yield from self._current(key, deadline = deadline, priority = priority)
+
+        for attempt in range(1, attempts + 1):
+            value = function(None if node is None else node.value)
+
+            compare = { 'prev_exist': False, } if node is None else { 'prev_index': node.modified_index, }
+
+            try:
+                return ( yield from self._request(key = key, method = 'PUT', body = value, deadline = deadline, priority = priority, replay = False, ttl = ttl, **compare) )
+            except EtcdCompareFailed as error:
+                failure, modified_index = error, _actual_index(error)
+            except ( EtcdKeyNotFound, EtcdNodeExist, ) as error:
+                failure, modified_index = error, None
+
+            delay = self.retry_policy.backoff(attempt)
+
+            if attempt == attempts or ( deadline is not None and delay >= _remaining(deadline) ):
+                raise failure
+
+            logger.debug('update of %s lost a race (attempt %s): %s', key, attempt, failure)
+
+            yield from asyncio.sleep(delay)
+
+            node = yield from self._current(key, modified_index, deadline, priority)
+
+    @asyncio.coroutine
+    def watch(self, key: str, index: Union[int, None] = None, recursive: bool = False, timeout: Union[float, None] = None):
+        '''Wait for the next event on the given key.
+
+        Watches share long-polls: all watches under a directory that is
+        already being polled are served by that poll (see WatchMultiplexer).
+        Use ``get(wait = True)`` for a dedicated long-poll.
+
+        Parameters
+        ----------
+
+        :``index``:     point in time (etcd_index) to begin watching for events
+        :``key``:       the key to watch (i.e. '/foo')
+        :``recursive``: include events on all children of key
+        :``timeout``:   seconds to wait (asyncio.TimeoutError if no event)
+
+        Return Value(s)
+        ---------------
+
+        EtcdResult describing the event.
+
+        '''
+
+        if self._watchers is None:
+            self._watchers = WatchMultiplexer(self)
+
+        return ( yield from _within(self._watchers.watch(key, index = index, recursive = recursive), _deadline(timeout)) )
+
+    def _watch_cache(self) -> None:
+        '''Start the watch that keeps the cache coherent (if not running).'''
+
+        if self._cache_watcher is None or self._cache_watcher.done():
+            self._cache_watcher = self.loop.create_task(self._cache_watch())
+
+    @asyncio.coroutine
+    def _cache_watch(self) -> None:
+        '''Feed events under the cache's prefix to the cache.
+
+        The watch starts at the current etcd_index; falling out of etcd's
+        event history is resynchronized by the watch (see WatchMultiplexer).
+        Any failure clears the cache and starts over.
+
+        '''
+
+        prefix = self._cache.prefix
+
+        while True:
+            self._cache.clear()
+
+            try:
+                try:
+                    index = ( yield from self._request(key = prefix, method = 'GET') ).etcd_index
+                except EtcdKeyNotFound as error:
+                    index = error.index
+
+                self._cache.index = index
+
+                while True:
+                    event = yield from self.watch(prefix, index = self._cache.index + 1, recursive = True)
+
+                    logger.debug('cache event: %s %s', event.action, event.node.key)
+
+                    self._cache.invalidate(event.node.key, event.node.modified_index)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.warning('cache watch on %s failed (clearing cache): %s', prefix, error)
+
+                yield from asyncio.sleep(1)
+
+    @asyncio.coroutine
+    def _current(self, key: str, modified_index: Union[int, None] = None, deadline: Union[float, None] = None, priority: int = NORMAL) -> Union[EtcdNode, None]:
+        '''Node of key (None if it does not exist), at modified_index if given.'''
+
+        try:
+            if modified_index is not None:
+                event = yield from self.get(key, wait = True, wait_index = modified_index, timeout = _remaining(deadline), priority = priority)
+
+                return None if event.action in ( 'delete', 'expire', 'compareAndDelete', ) else event.node
+
+            return ( yield from self.get(key, timeout = _remaining(deadline), priority = priority) ).node
+        except EtcdEventIndexCleared:
+            return ( yield from self._current(key, deadline = deadline, priority = priority) )
+        except EtcdKeyNotFound:
+            return None
+
+    @asyncio.coroutine
+    def _discover(self) -> None:
+        '''Update the cluster's members from /v2/members.'''
+
+        for member in self.cluster.candidates():
+            try:
+                response = yield from self._get_session().get(member.url + '/members')
+
+                try:
+                    content = yield from response.read()
+                finally:
+                    response.release()
+
+                if response.status != 200:
+                    logger.info('member discovery from %s failed: %s', member.url, response.status)
+                    continue
+
+                self.cluster.update(codec.loads(content))
+            except ( aiohttp.ClientError, OSError, ValueError, ) as error:
+                logger.info('member discovery from %s failed: %s', member.url, error)
+                continue
+
+            break
+
+        self._discovered_at = time.monotonic()
+
+    @asyncio.coroutine
+    def _many(self, operation: Callable, arguments: Iterable[Any], concurrency: Union[int, None], stop_on_error: bool, collect: bool = True) -> Union[List[Any], int]:
+        '''Apply operation to every argument with bounded concurrency.
+
+        Workers share one iterator over arguments so at most ``concurrency``
+        operations are in flight (and created) at any time.
+
+        Parameters
+        ----------
+
+        :``arguments``:     arguments for each call of operation
+        :``collect``:       keep the result of each operation
+        :``concurrency``:   maximum operations in flight (default:
+                            connection_limit)
+        :``operation``:     coroutine function applied to each argument
+        :``stop_on_error``: stop at the first error and raise it
+
+        Return Value(s)
+        ---------------
+
+        Result (or raised exception) of each operation in argument order or,
+        if not collect, the number of operations that succeeded.
+
+        '''
+
+        if concurrency is None:
+            concurrency = self._connection_limit
+
+        arguments = enumerate(arguments)
+        errors = []
+        results = {}
+        succeeded = [ 0, ]
+
+        @asyncio.coroutine
+        def worker():
+            for index, argument in arguments:
+                if errors:
+                    return
+
+                try:
+                    result = yield from operation(argument)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as error:
+                    logger.info('bulk operation on %s failed: %s', argument, error)
+
+                    if collect:
+                        results[index] = error
+
+                    if stop_on_error:
+                        errors.append(error)
+                else:
+                    succeeded[0] += 1
+
+                    if collect:
+                        results[index] = result
+
+        yield from asyncio.gather(*[ worker() for _ in range(max(concurrency, 1)) ])
+
+        if errors:
+            raise errors[0]
+
+        if not collect:
+            return succeeded[0]
+
+        return [ results[index] for index in range(len(results)) ]
+
+    @asyncio.coroutine
+    def _open(self, key: str, method: str, body: Union[str, None] = None, deadline: Union[float, None] = None, exclude: Iterable[Member] = (), replay: bool = True, **kwargs):
+        '''Send an HTTP request to the keys endpoint; leave the body unread.
+
+        All requests share this client's pooled session.  Requests go to the
+        cluster's preferred member and fail over to the next member on
+        connection errors or server (5xx) errors as allowed by the client's
+        RetryPolicy: a write that may already have been applied is only
+        replayed if it compares and swaps on ``prev_index``, every retry is
+        taken from the client's retry budget, and going back to a member that
+        already failed the request is limited to ``retries`` times with
+        jittered exponential back off.
+
+        Each attempt (including its redirects) is cut short at ``deadline``,
+        which raises asyncio.TimeoutError without counting against the
+        member.  A wait that times out before its deadline (i.e. on a socket
+        read timeout) is sent again to the same member, also without counting
+        against it.  A retry or failover is not attempted if its back off plus
+        the member's average latency would not finish before the deadline;
+        the last error is raised instead.
+
+        Every response's X-Etcd-Index is folded into ``etcd_index``.  With
+        ``read_your_writes`` a read (not a wait or quorum read) answered with
+        an older index is sent again: to the leader if it is known, otherwise
+        to the next member that has not lagged, and finally as a quorum read.
+
+        Parameters
+        ----------
+
+        :``exclude``: members to send the request to only if no other is left
+        :``replay``:  False to never replay a write that may have been applied
+                      (even one that compares on ``prev_index``)
+
+        Otherwise the same as ``_request``.
+
+        Return Value(s)
+        ---------------
+
+        Tuple of the member that answered, the (unread) response and the time
+        the request to that member was sent.  The caller must release the
+        response.
+
+        '''
+
+        path = '/keys/' + key.lstrip('/')
+        params = _parameters(kwargs)
+
+        data = None
+        if body is not None:
+            data = { 'value': body, }
+
+        self._schedule_discovery()
+
+        policy = self.retry_policy
+        policy.budget.deposit()
+
+        replayable = replay and idempotent(method, params)
+
+        retries = 0
+        tried = set()
+
+        kind = _kind(method, params)
+        leader = method != 'GET' or bool(kwargs.get('quorum'))
+
+        floor = None
+        if self._read_your_writes and method == 'GET' and not kwargs.get('wait') and not kwargs.get('quorum'):
+            floor = self._etcd_index
+
+        error = None  # type: Exception
+        lagged = set()
+
+        while True:
+            candidates = [ _ for _ in self.cluster.candidates(leader = leader) if _ not in lagged ]
+
+            if not candidates:
+                logger.debug('every member lags %s; reading %s with quorum', floor, path)
+
+                params['quorum'] = 'true'
+                floor = None
+                candidates = self.cluster.candidates(leader = True)
+
+            member = next(( _ for _ in candidates if _ not in exclude ), candidates[0])
+
+            delay = 0.0
+
+            if member in tried:
+                if retries >= policy.retries:
+                    # No error if every answer so far was discarded as stale.
+                    raise error or EtcdError(0, 'Stale read', '{0} older than etcd_index {1}'.format(path, floor))
+
+                retries += 1
+
+                delay = policy.backoff(retries)
+
+            remaining = _remaining(deadline)
+
+            if remaining is not None and ( remaining <= 0 or ( ( error is not None or lagged ) and remaining <= delay + ( member.latency or 0.0 ) ) ):
+                logger.info('%s %s: no time left to try %s', method, path, member.url)
+
+                raise asyncio.TimeoutError() if error is None else error
+
+            if delay:
+                logger.debug('retry %s of %s %s in %0.3fs', retries, method, path, delay)
+
+                yield from asyncio.sleep(delay)
+
+            tried.add(member)
+
+            start = time.monotonic()
+
+            try:
+                member, response = yield from _within(self._send(member, method, path, params, data), deadline)
+            except ( aiohttp.ClientError, asyncio.TimeoutError, OSError, ) as e:
+                if kwargs.get('wait') and isinstance(e, asyncio.TimeoutError) and _remaining(deadline) != 0:
+                    # Nothing happened before a transport timeout: the member
+                    # is fine, the long-poll is simply sent again.
+                    logger.debug('%s %s%s timed out waiting; polling again', method, member.url, path)
+
+                    tried.discard(member)
+
+                    continue
+
+                logger.info('%s %s%s failed: %r', method, member.url, path, e)
+
+                self.metrics.request(kind, member.url, None, time.monotonic() - start)
+
+                if _remaining(deadline) == 0:
+                    raise
+
+                error = e
+            else:
+                self.cluster.observe(_term(response))
+
+                index = _index(response)
+                if index is not None and ( self._etcd_index is None or index > self._etcd_index ):
+                    self._etcd_index = index
+
+                if response.status < 500 and floor is not None and index is not None and index < floor:
+                    response.release()
+
+                    logger.debug('%s %s%s lags (%s < %s); reading again', method, member.url, path, index, floor)
+
+                    self.metrics.request(kind, member.url, response.status, time.monotonic() - start)
+                    self.metrics.retry(kind, member.url)
+
+                    lagged.add(member)
+                    tried.discard(member)
+                    leader = True
+
+                    continue
+
+                if response.status < 500:
+                    return member, response, start
+
+                logger.info('%s %s%s failed: %s', method, member.url, path, response.status)
+
+                self.metrics.request(kind, member.url, response.status, time.monotonic() - start)
+
+                try:
+                    error = _error(( yield from _within(response.read(), deadline) ), response)
+                except ( aiohttp.ClientError, asyncio.TimeoutError, OSError, ) as e:
+                    error = e
+                finally:
+                    response.release()
+
+            self.cluster.failed(member)
+
+            if not policy.allows(error, replayable):
+                raise error
+
+            self.metrics.retry(kind, member.url)
+
+    @asyncio.coroutine
+    def _request(self, key: str, method: str, body: Union[str, None] = None, deadline: Union[float, None] = None, priority: int = NORMAL, **kwargs) -> EtcdResult:
+        '''Perform an HTTP request against the keys endpoint.
+
+        See ``_open`` for how members are chosen and failures retried; errors
+        reported by etcd (other than server errors) are not retried.  Reads
+        are hedged as decided by ``hedge_policy`` (see ``_hedge``) and every
+        request (other than waits) is admitted by ``admission``.
+
+        Parameters
+        ----------
+
+        :``body``:     value to send with the request (form encoded as value)
+        :``deadline``: time.monotonic() by which the request (with all of its
+                       retries) must finish (None: no limit)
+        :``key``:      the key to act upon (i.e. '/foo')
+        :``method``:   HTTP method (i.e. 'GET')
+        :``priority``: admission priority (i.e. INTERACTIVE)
+
+        Additional keyword arguments are sent as query parameters with their
+        names converted to etcd's (i.e. ``wait_index`` becomes ``waitIndex``).
+
+        Return Value(s)
+        ---------------
+
+        EtcdResult
+
+        '''
+
+        if self._hedge_policy is not None and method == 'GET' and not kwargs.get('wait') and not kwargs.get('quorum'):
+            return ( yield from self._hedge(key, deadline, priority, **kwargs) )
+
+        return ( yield from self._fetch(key, method, body, deadline, priority, **kwargs) )
+
+    @asyncio.coroutine
+    def _hedge(self, key: str, deadline: Union[float, None] = None, priority: int = NORMAL, **kwargs) -> EtcdResult:
+        '''GET key and, if it is slow, from a second member as well.
+
+        The first answer (a result or an error reported by etcd about the
+        request) wins and the other request is cancelled; a failure (i.e. a
+        server or connection error) only wins if both requests fail.  The
+        hedge is admitted like any other request.
+
+        '''
+
+        delay = self._hedge_policy.delay()
+        members = self.cluster.candidates()
+
+        primary = self.loop.create_task(self._fetch(key, 'GET', deadline = deadline, priority = priority, **kwargs))
+
+        if delay is None or len(members) < 2:
+            return ( yield from primary )
+
+        tasks = { primary, }
+
+        try:
+            done, tasks = yield from asyncio.wait(tasks, timeout = delay)
+
+            if done:
+                return primary.result()
+
+            if not self._hedge_policy.allows():
+                return ( yield from primary )
+
+            logger.debug('GET %s not answered in %0.3fs; hedging to %s', key, delay, members[1].url)
+
+            self.metrics.hedge('GET', members[1].url)
+
+            tasks.add(self.loop.create_task(self._fetch(key, 'GET', deadline = deadline, priority = priority, exclude = ( members[0], ), **kwargs)))
+
+            while True:
+                done, tasks = yield from asyncio.wait(tasks, return_when = asyncio.FIRST_COMPLETED)
+
+                errors = [ _.exception() for _ in done ]
+
+                for task, error in zip(done, errors):
+                    if error is None or ( isinstance(error, EtcdError) and error.error_code < 300 ):
+                        return task.result()
+
+                if not tasks:
+                    raise errors[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @asyncio.coroutine
+    def _fetch(self, key: str, method: str, body: Union[str, None] = None, deadline: Union[float, None] = None, priority: int = NORMAL, exclude: Iterable[Member] = (), **kwargs) -> EtcdResult:
+        '''Admit a request, send it with ``_open`` and decode its response.'''
+
+        admitted = yield from self._admit(priority, deadline, kwargs.get('wait'))
+
+        try:
+            member, response, start = yield from self._open(key, method, body, deadline, exclude, **kwargs)
+
+            try:
+                content = yield from _within(response.read(), deadline)
+            finally:
+                response.release()
+        finally:
+            if admitted:
+                self._admission.release()
+
+        elapsed = time.monotonic() - start
+
+        self.cluster.succeeded(member, None if kwargs.get('wait') else elapsed)
+        self.metrics.request(_kind(method, kwargs), member.url, response.status, elapsed)
+
+        if self._hedge_policy is not None and method == 'GET' and not kwargs.get('wait'):
+            self._hedge_policy.observe(elapsed)
+
+        if response.status >= 300:
+            raise _error(content, response)
+
+        return EtcdResult(content, _index(response))
+
+    def _iter_nodes(self, key: str, deadline: Union[float, None] = None, priority: int = NORMAL, **kwargs) -> NodeStream:
+        '''NodeStream of key's children opened (with its retries) by deadline.'''
+
+        return NodeStream(functools.partial(self._open_stream, key, priority, deadline, **kwargs), on_close = None if self._admission is None else self._admission.release)
+
+    @asyncio.coroutine
+    def _open_stream(self, key: str, priority: int = NORMAL, deadline: Union[float, None] = None, **kwargs):
+        '''Open a GET for a NodeStream; etcd errors are raised.
+
+        The admission (if any) is held until the NodeStream is closed.
+
+        '''
+
+        admitted = yield from self._admit(priority, deadline)
+
+        try:
+            member, response, start = yield from self._open(key, 'GET', deadline = deadline, **kwargs)
+
+            self.cluster.succeeded(member)
+            self.metrics.request('GET', member.url, response.status, time.monotonic() - start)
+
+            if response.status != 200:
+                try:
+                    raise _error(( yield from response.read() ), response)
+                finally:
+                    response.release()
+        except BaseException:  # cancellation too: only an opened stream releases its admission
+            if admitted:
+                self._admission.release()
+
+            raise
+
+        return response
+
+    @asyncio.coroutine
+    def _admit(self, priority: int, deadline: Union[float, None] = None, wait: bool = False) -> bool:
+        '''Wait for admission of a request; True if it must be released.
+
+        Waits are not admitted: a long-poll costs etcd little and holding a
+        slot for as long as it waits would starve everything else.
+
+        '''
+
+        if self._admission is None or wait:
+            return False
+
+        yield from _within(self._admission.acquire(priority), deadline)
+
+        return True
+
+    @asyncio.coroutine
+    def _send(self, member: Member, method: str, path: str, params: Dict[str, str], data: Union[Dict[str, str], None]):
+        '''Send one request to member, following redirects if enabled.
+
+        Redirects are followed here (rather than by aiohttp) so their target,
+        the raft leader, is remembered by the cluster.
+
+        Return Value(s)
+        ---------------
+
+        Tuple of the member that answered and its (unread) response.
+
+        '''
+
+        url = member.url + path
+
+        for hop in range(MAX_REDIRECTS + 1):
+            logger.debug('%s %s %s', method, url, params)
+
+            response = yield from self._get_session().request(method, url, params = params, data = data, allow_redirects = False)
+
+            location = response.headers.get('Location')
+
+            if not self._follow_redirects or response.status not in REDIRECTS or location is None or hop == MAX_REDIRECTS:
+                break
+
+            response.release()
+
+            self.metrics.redirect(_kind(method, params), member.url)
+
+            # The query is dropped from location as params are sent again.
+            url = urllib.parse.urlunsplit(urllib.parse.urlsplit(urllib.parse.urljoin(url, location))[:3] + ( '', '', ))
+            member = self.cluster.redirected(url.split('/keys/', 1)[0], _term(response))
+
+            logger.debug('%s redirected to %s (hop %s)', method, url, hop + 1)
+
+        return member, response
+
+    def _schedule_discovery(self) -> None:
+        '''Start member discovery if it is due (and not running).'''
+
+        if self._discovery_interval is None or ( self._discovery is not None and not self._discovery.done() ):
+            return
+
+        if self._discovered_at is None or time.monotonic() - self._discovered_at >= self._discovery_interval:
+            self._discovery = self.loop.create_task(self._discover())
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        '''Pooled session for this client (created on first use).'''
+
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host = self._connection_limit,
+                keepalive_timeout = self._keepalive_timeout,
+                use_dns_cache = True,
+                ttl_dns_cache = self._dns_cache_ttl,
+            )
+
+            # No overall timeout: long-polls wait as long as they need to and
+            # every call is bounded by its own deadline (see ``_open``).
+            self._session = aiohttp.ClientSession(connector = connector, timeout = aiohttp.ClientTimeout(total = None))
+
+            logger.debug('created session: %s', self._session)
+
+        return self._session
+
+
+def _actual_index(error: EtcdError) -> Union[int, None]:
+    '''Current modifiedIndex reported by a failed prevIndex comparison.
+
+    Examples
+    --------
+
+    >>> _actual_index(EtcdError(101, 'Compare failed', '[5 != 7]')), _actual_index(EtcdError(101, 'Compare failed', '[a != b]'))
+    (7, None)
+
+    '''
+
+    match = re.match(r'\[\d+ != (\d+)\]$', error.cause or '')
+
+    return None if match is None else int(match.group(1))
+
+
+@asyncio.coroutine
+def _collect(stream: NodeStream, transform: Callable, predicate: Callable = lambda _: True) -> List[Any]:
+    '''Transformed nodes of stream that satisfy predicate.'''
+
+    results = []
+
+    try:
+        while True:
+            node = yield from stream.__anext__()
+
+            if predicate(node):
+                results.append(transform(node))
+    except StopAsyncIteration:
+        pass
+    finally:
+        stream.close()
+
+    return results
+
+
+def _records(node: EtcdNode) -> Iterable[Dict[str, Any]]:
+    '''Dump records for node and its descendants (parents first).
+
+    Examples
+    --------
+
+    >>> node = EtcdNode.from_dict({ 'key': '/d', 'dir': True, 'nodes': [ { 'key': '/d/a', 'value': '1', 'ttl': 5, }, { 'key': '/d/e', 'dir': True, }, ], })
+    >>> [ sorted(_.items()) for _ in _records(node) ]
+    [[('key', '/d/a'), ('ttl', 5), ('value', '1')], [('dir', True), ('key', '/d/e')]]
+
+    '''
+
+    pending = [ node, ]
+
+    while pending:
+        node = pending.pop()
+
+        if node.dir:
+            pending.extend(reversed(node.nodes))
+
+            if node.nodes and node.ttl is None:
+                continue
+
+            record = { 'key': node.key, 'dir': True, }
+        else:
+            record = { 'key': node.key, 'value': node.value, }
+
+        if node.ttl is not None:
+            record['ttl'] = node.ttl
+
+        yield record
+
+
+def _kind(method: str, parameters: Dict[str, Any]) -> str:
+    '''Metrics label for a request: its method or 'wait' for long-polls.'''
+
+    return 'wait' if parameters.get('wait') in ( True, 'true', ) else method
+
+
+def _deadline(timeout: Union[float, None]) -> Union[float, None]:
+    '''time.monotonic() timeout seconds from now (None if timeout is None).'''
+
+    return None if timeout is None else time.monotonic() + timeout
+
+
+def _remaining(deadline: Union[float, None]) -> Union[float, None]:
+    '''Seconds (at least 0) until deadline (None if deadline is None).'''
+
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+@asyncio.coroutine
+def _within(awaitable, deadline: Union[float, None]) -> Any:
+    '''Wait for awaitable; asyncio.TimeoutError (cancelling it) at deadline.'''
+
+    if deadline is None:
+        return ( yield from awaitable )
+
+    return ( yield from asyncio.wait_for(awaitable, _remaining(deadline)) )
+
+
+def _index(response: aiohttp.ClientResponse) -> Union[int, None]:
+    '''etcd_index reported by response (None if not reported).'''
+
+    index = response.headers.get('X-Etcd-Index')
+
+    return None if index is None else int(index)
+
+
+def _term(response: aiohttp.ClientResponse) -> Union[int, None]:
+    '''Raft term reported by response (None if not reported).'''
+
+    term = response.headers.get('X-Raft-Term')
+
+    return None if term is None else int(term)
+
+
+def _error(content: bytes, response: aiohttp.ClientResponse) -> EtcdError:
+    '''EtcdError describing an unsuccessful response.'''
+
+    try:
+        body = codec.loads(content)
+    except ValueError:
+        body = {}
+
+    if isinstance(body, dict) and 'errorCode' in body:
+        return EtcdError.from_response(body)
+
+    return EtcdError(response.status, response.reason)
+
+
+def _parameters(kwargs: Dict[str, Any]) -> Dict[str, str]:
+    '''Convert keyword arguments to etcd query parameters.
+
+    Parameters with a value of None are dropped; booleans are lowercased; names
+    are converted to camelCase.
+
+    Examples
+    --------
+
+    >>> sorted(_parameters({ 'wait': True, 'wait_index': 3, 'quorum': False, 'ttl': None, }).items())
+    [('quorum', 'false'), ('wait', 'true'), ('waitIndex', '3')]
+
+    '''
+
+    parameters = {}
+
+    for name, value in kwargs.items():
+        if value is None:
+            continue
+
+        head, *tail = name.split('_')
+        name = head + ''.join([ _.capitalize() for _ in tail ])
+
+        if isinstance(value, bool):
+            value = str(value).lower()
+
+        parameters[name] = str(value)
+
+    return parameters
+
+
+from petcd.sync import SyncEtcdClient  # noqa (re-export; needs AsyncEtcdClient)
@@ -0,0 +1,197 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+import typing  # flake8: noqa (use mypy typing)
+
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+# Priorities (lower goes first).
+INTERACTIVE = 0
+NORMAL = 1
+BACKGROUND = 2
+
+
+class AdmissionControl(object):
+    '''Client side rate and concurrency limits with priority lanes.
+
+    Every request (other than long-polls, which wait rather than load etcd)
+    is admitted before it is sent: it takes a token from a bucket refilled at
+    ``rate`` tokens a second (holding at most ``burst``) and one of
+    ``concurrency`` slots until its response has been read.  Requests that
+    cannot be admitted wait in priority order (INTERACTIVE, NORMAL then
+    BACKGROUND; first come first served within a priority) so bulk work
+    queues behind latency sensitive work instead of beside it.  ``reserve``
+    slots are only used by requests above BACKGROUND so long running bulk
+    requests (i.e. streamed scans) never hold every slot.
+
+    Either limit may be None (unlimited).
+
+    Properties
+    ----------
+
+    * ``in_flight``
+    * ``waiting``
+
+    Public Methods
+    --------------
+
+    * ``acquire``
+    * ``release``
+
+    Examples
+    --------
+
+    >>> loop = asyncio.new_event_loop()
+    >>> admission = AdmissionControl(concurrency = 1, loop = loop)
+    >>> order = []
+    >>> @asyncio.coroutine
+    ... def request(name, priority):
+    ...     yield from admission.acquire(priority)
+    ...     order.append(name)
+    ...     yield from asyncio.sleep(0)
+    ...     admission.release()
+    >>> @asyncio.coroutine
+    ... def requests():
+    ...     yield from asyncio.gather(request('first', NORMAL), request('bulk', BACKGROUND), request('interactive', INTERACTIVE))
+    >>> loop.run_until_complete(requests())
+    >>> order
+    ['first', 'interactive', 'bulk']
+    >>> loop.close()
+
+    '''
+
+    def __init__(self, rate: Union[float, None] = None, burst: Union[float, None] = None, concurrency: Union[int, None] = None, reserve: int = 0, loop: Union[asyncio.AbstractEventLoop, None] = None) -> None:
+        '''Create AdmissionControl.
+
+        Parameters
+        ----------
+
+        :``burst``:       most tokens the bucket holds (default: rate or 1)
+        :``concurrency``: most requests in flight
+        :``loop``:        event loop (default: asyncio.get_event_loop())
+        :``rate``:        requests admitted per second
+        :``reserve``:     slots (of concurrency) not used by BACKGROUND requests
+
+        '''
+
+        if burst is None and rate is not None:
+            burst = max(rate, 1.0)
+
+        self._burst = burst
+        self._concurrency = concurrency
+        self._loop = loop
+        self._rate = rate
+        self._reserve = reserve
+        self._sequence = itertools.count()
+        self._timer = None  # type: asyncio.TimerHandle
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._waiters = []  # type: typing.List[typing.List]
+
+        self.in_flight = 0
+
+    @property
+    def waiting(self) -> int:
+        '''Number of requests waiting to be admitted.'''
+
+        return len([ _ for _ in self._waiters if not _[2].done() ])
+
+    @asyncio.coroutine
+    def acquire(self, priority: int = NORMAL) -> None:
+        '''Wait until a request of priority is admitted.
+
+        The caller must ``release`` once the request is finished.  Cancelling
+        the wait gives up the request's place (or slot).
+
+        '''
+
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+
+        waiter = [ priority, next(self._sequence), asyncio.Future(loop = self._loop), ]
+        heapq.heappush(self._waiters, waiter)
+
+        self._dispatch()
+
+        try:
+            yield from waiter[2]
+        except asyncio.CancelledError:
+            if waiter[2].done() and not waiter[2].cancelled():
+                self.release()
+            else:
+                waiter[2].cancel()
+
+            raise
+
+    def release(self) -> None:
+        '''Return a finished request's slot.'''
+
+        self.in_flight -= 1
+
+        self._dispatch()
+
+    def _admissible(self, priority: int) -> bool:
+        if self._concurrency is not None:
+            limit = self._concurrency - ( self._reserve if priority >= BACKGROUND else 0 )
+
+            if self.in_flight >= limit:
+                return False
+
+        if self._rate is not None:
+            now = time.monotonic()
+
+            self._tokens = min(self._burst, self._tokens + ( now - self._updated ) * self._rate)
+            self._updated = now
+
+            if self._tokens < 1:
+                return False
+
+        return True
+
+    def _dispatch(self) -> None:
+        '''Admit waiters (in priority order) while the limits allow.'''
+
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+
+            if future.done():  # cancelled
+                heapq.heappop(self._waiters)
+                continue
+
+            if not self._admissible(priority):
+                break
+
+            heapq.heappop(self._waiters)
+
+            self.in_flight += 1
+
+            if self._rate is not None:
+                self._tokens -= 1
+
+            future.set_result(None)
+
+        if self._waiters and self._rate is not None and self._tokens < 1 and self._timer is None:
+            self._timer = self._loop.call_later(( 1 - self._tokens ) / self._rate, self._tick)
+
+    def _tick(self) -> None:
+        self._timer = None
+
+        self._dispatch()
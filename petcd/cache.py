@@ -0,0 +1,175 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import logging
+import typing  # flake8: noqa (use mypy typing)
+
+from typing import Any
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ReadCache(object):
+    '''LRU cache of read results kept coherent by watch events.
+
+    Entries are keyed by the read's key and options and remember the
+    ``etcd_index`` they were read at.  The owner of the cache feeds it every
+    event seen by a recursive watch on ``prefix`` (``invalidate``) and the
+    index the watch has caught up to (``index``).
+
+    A result is only stored if it was read at or after ``index``; anything
+    older may predate an event that has already been delivered.  An event
+    drops every entry for its key, its ancestors and its descendants that was
+    read before the event's ``modifiedIndex``.
+
+    Properties
+    ----------
+
+    * ``index``
+    * ``prefix``
+    * ``size``
+
+    Examples
+    --------
+
+    >>> cache = ReadCache('/config', size = 2)
+    >>> cache.index = 10
+    >>> cache.put(( '/config/a', False, False, ), 'a', 10)
+    >>> cache.get(( '/config/a', False, False, ))
+    'a'
+    >>> cache.invalidate('/config/a', 11)
+    >>> cache.get(( '/config/a', False, False, )) is None
+    True
+
+    '''
+
+    def __init__(self, prefix: str, size: int = 1024) -> None:
+        '''Create ReadCache.
+
+        Parameters
+        ----------
+
+        :``prefix``: directory whose keys may be cached
+        :``size``:   maximum number of entries retained
+
+        '''
+
+        self._entries = collections.OrderedDict()  # type: Dict[Tuple, Tuple[Any, int]]
+        self._prefix = '/' + prefix.strip('/')
+        self._size = size
+
+        self.index = None  # type: Union[int, None]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def prefix(self) -> str:
+        '''Directory whose keys may be cached.'''
+
+        return self._prefix
+
+    @property
+    def size(self) -> int:
+        '''Maximum number of entries retained.'''
+
+        return self._size
+
+    def covers(self, key: str) -> bool:
+        '''True if key is under this cache's prefix; otherwise, False.
+
+        Examples
+        --------
+
+        >>> cache = ReadCache('/config')
+        >>> cache.covers('/config/a'), cache.covers('/config'), cache.covers('/configuration')
+        (True, True, False)
+
+        '''
+
+        key = '/' + key.strip('/')
+
+        return self._prefix == '/' or key == self._prefix or key.startswith(self._prefix + '/')
+
+    def clear(self) -> None:
+        '''Drop all entries and forget the watched index.'''
+
+        self._entries.clear()
+        self.index = None
+
+    def get(self, selector: Tuple) -> Any:
+        '''Cached result for selector (None if not cached).
+
+        Parameters
+        ----------
+
+        :``selector``: (key, recursive, sorted) tuple identifying the read
+
+        '''
+
+        entry = self._entries.get(selector)
+
+        if entry is None:
+            return None
+
+        self._entries.move_to_end(selector)
+
+        return entry[0]
+
+    def put(self, selector: Tuple, result: Any, etcd_index: int) -> None:
+        '''Store result for selector if it cannot be stale.
+
+        Parameters
+        ----------
+
+        :``etcd_index``: etcd_index the result was read at
+        :``result``:     result to cache
+        :``selector``:   (key, recursive, sorted) tuple identifying the read
+
+        '''
+
+        if self.index is None or etcd_index < self.index:
+            logger.debug('not caching %s: read at %s, watch at %s', selector, etcd_index, self.index)
+            return
+
+        self._entries[selector] = ( result, etcd_index, )
+        self._entries.move_to_end(selector)
+
+        while len(self._entries) > self._size:
+            self._entries.popitem(last = False)
+
+    def invalidate(self, key: str, modified_index: int) -> None:
+        '''Drop entries made stale by an event.
+
+        Parameters
+        ----------
+
+        :``key``:            key the event occurred on
+        :``modified_index``: modifiedIndex of the event
+
+        '''
+
+        key = '/' + key.strip('/')
+
+        for selector in list(self._entries.keys()):
+            other = '/' + selector[0].strip('/')
+
+            related = other == key or key.startswith(other.rstrip('/') + '/') or other.startswith(key.rstrip('/') + '/')
+
+            if related and self._entries[selector][1] < modified_index:
+                del self._entries[selector]
+
+        self.index = max(self.index or 0, modified_index)
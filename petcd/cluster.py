@@ -0,0 +1,298 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import time
+import typing  # flake8: noqa (use mypy typing)
+
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+
+class Member(object):
+    '''An etcd endpoint and what is known about its health.
+
+    Properties
+    ----------
+
+    * ``failures``
+    * ``healthy``
+    * ``latency``
+    * ``url``
+
+    '''
+
+    def __init__(self, url: str) -> None:
+        '''Create Member.
+
+        Parameters
+        ----------
+
+        :``url``: URL for the member (i.e. 'http://10.0.0.1:2379/v2')
+
+        '''
+
+        self.failures = 0
+        self.latency = None  # type: Union[float, None]
+        self.retry_at = 0.0
+        self.url = url.rstrip('/')
+
+    def __repr__(self) -> str:
+        return 'Member({0.url!r}, latency = {0.latency}, failures = {0.failures})'.format(self)
+
+    @property
+    def healthy(self) -> bool:
+        '''True if the member has not failed since its last success.'''
+
+        return self.failures == 0
+
+
+class Cluster(object):
+    '''Set of etcd members ordered by health and observed latency.
+
+    Each request's duration is folded into its member's exponentially
+    weighted moving average latency.  Healthy members are preferred in order
+    of that average (members without one yet are tried first so every member
+    gets measured).  A member that fails is skipped until its back off
+    (doubling with each consecutive failure up to ``max_backoff`` seconds)
+    expires, after which it is tried again behind the healthy members.
+
+    Redirects (which etcd uses to send requests to the raft leader) are
+    remembered: the target becomes the ``leader`` and is tried first for
+    requests that must reach the leader anyway.  The leader is forgotten when
+    it fails or a newer raft term is observed.
+
+    Properties
+    ----------
+
+    * ``leader``
+    * ``members``
+    * ``term``
+    * ``urls``
+
+    Public Methods
+    --------------
+
+    * ``candidates``
+    * ``failed``
+    * ``observe``
+    * ``redirected``
+    * ``succeeded``
+    * ``update``
+
+    Examples
+    --------
+
+    >>> cluster = Cluster([ 'http://a:2379/v2', 'http://b:2379/v2', ])
+    >>> a, b = cluster.members
+    >>> cluster.succeeded(a, 0.050)
+    >>> cluster.succeeded(b, 0.010)
+    >>> [ _.url for _ in cluster.candidates() ]
+    ['http://b:2379/v2', 'http://a:2379/v2']
+
+    >>> cluster.failed(b)
+    >>> [ _.url for _ in cluster.candidates() ]
+    ['http://a:2379/v2']
+
+    >>> c = cluster.redirected('http://c:2379/v2', term = 4)
+    >>> [ _.url for _ in cluster.candidates(leader = True) ]
+    ['http://c:2379/v2', 'http://a:2379/v2']
+    >>> cluster.observe(5)
+    >>> cluster.leader is None
+    True
+
+    '''
+
+    def __init__(self, urls: Iterable[str], alpha: float = 0.2, max_backoff: float = 30.0) -> None:
+        '''Create Cluster.
+
+        Parameters
+        ----------
+
+        :``alpha``:       weight of each new latency sample in the average
+        :``max_backoff``: longest time (in seconds) a failed member is skipped
+        :``urls``:        URLs of the initially known members (kept as
+                          members whatever ``update`` finds)
+
+        '''
+
+        self._alpha = alpha
+        self._max_backoff = max_backoff
+        self._members = [ Member(_) for _ in urls ]  # type: List[Member]
+        self._seeds = [ _.url for _ in self._members ]
+
+        self.leader = None  # type: Union[Member, None]
+        self.term = None  # type: Union[int, None]
+
+    @property
+    def members(self) -> List[Member]:
+        '''All known members.'''
+
+        return list(self._members)
+
+    @property
+    def urls(self) -> List[str]:
+        '''URLs of all known members in order of preference.'''
+
+        return [ _.url for _ in self.candidates(everything = True) ]
+
+    def candidates(self, everything: bool = False, leader: bool = False) -> List[Member]:
+        '''Members to try in order of preference.
+
+        Healthy members come first, fastest first; failed members whose back
+        off has expired follow.  If no member is eligible, every member is
+        returned (longest failed first) rather than nothing.
+
+        Parameters
+        ----------
+
+        :``everything``: include failed members still backing off
+        :``leader``:     put the known leader (if any) first
+
+        '''
+
+        if leader and self.leader is not None:
+            return [ self.leader, ] + [ _ for _ in self.candidates(everything) if _ is not self.leader ]
+
+        now = time.monotonic()
+
+        healthy = sorted([ _ for _ in self._members if _.healthy ], key = lambda _: -1 if _.latency is None else _.latency)
+        recovering = sorted([ _ for _ in self._members if not _.healthy ], key = lambda _: _.retry_at)
+
+        if not everything:
+            recovering = [ _ for _ in recovering if _.retry_at <= now ]
+
+        return ( healthy + recovering ) or sorted(self._members, key = lambda _: _.retry_at)
+
+    def failed(self, member: Member) -> None:
+        '''Record a failed request to member.'''
+
+        if member is self.leader:
+            logger.info('forgetting leader %s', member.url)
+
+            self.leader = None
+
+        member.failures += 1
+        member.retry_at = time.monotonic() + min(2 ** ( member.failures - 1 ), self._max_backoff)
+
+        logger.info('member %s failed %s time(s); retrying after %s', member.url, member.failures, member.retry_at)
+
+    def observe(self, term: Union[int, None]) -> None:
+        '''Record the raft term reported by a response.
+
+        The known leader is forgotten when the term advances.
+
+        '''
+
+        if term is None or ( self.term is not None and term <= self.term ):
+            return
+
+        if self.term is not None and self.leader is not None:
+            logger.info('raft term %s -> %s; forgetting leader %s', self.term, term, self.leader.url)
+
+            self.leader = None
+
+        self.term = term
+
+    def redirected(self, url: str, term: Union[int, None] = None) -> Member:
+        '''Record a redirect to url and remember it as the leader.
+
+        Parameters
+        ----------
+
+        :``term``: raft term reported by the redirecting response
+        :``url``:  URL of the member redirected to (i.e. 'http://c:2379/v2')
+
+        Return Value(s)
+        ---------------
+
+        Member for url (added to the cluster if unknown).
+
+        '''
+
+        self.observe(term)
+
+        url = url.rstrip('/')
+
+        for member in self._members:
+            if member.url == url:
+                break
+        else:
+            member = Member(url)
+            self._members.append(member)
+
+        if self.leader is not member:
+            logger.debug('leader is %s (term %s)', member.url, self.term)
+
+        self.leader = member
+
+        return member
+
+    def succeeded(self, member: Member, elapsed: Union[float, None] = None) -> None:
+        '''Record a successful request to member.
+
+        Parameters
+        ----------
+
+        :``elapsed``: duration of the request in seconds (None to not sample)
+        :``member``:  member that served the request
+
+        '''
+
+        member.failures = 0
+
+        if elapsed is not None:
+            if member.latency is None:
+                member.latency = elapsed
+            else:
+                member.latency += self._alpha * ( elapsed - member.latency )
+
+    def update(self, response: Dict[str, Any]) -> None:
+        '''Add members listed in a decoded /v2/members response.
+
+        Members already known are kept (with their statistics); members no
+        longer listed are dropped.  The URLs the cluster was created with are
+        always kept: members may advertise URLs that are not reachable from
+        this client (i.e. behind NAT or a load balancer).
+
+        Examples
+        --------
+
+        >>> cluster = Cluster([ 'http://lb:2379/v2', ])
+        >>> cluster.update({ 'members': [ { 'clientURLs': [ 'http://a:2379', ], }, { 'clientURLs': [ 'http://b:2379', ], }, ], })
+        >>> sorted([ _.url for _ in cluster.members ])
+        ['http://a:2379/v2', 'http://b:2379/v2', 'http://lb:2379/v2']
+
+        '''
+
+        urls = [ url.rstrip('/') + '/v2' for member in response.get('members', []) for url in member.get('clientURLs', []) ]
+
+        if not urls:
+            return
+
+        urls += [ _ for _ in self._seeds if _ not in urls ]
+
+        known = { _.url: _ for _ in self._members }
+
+        self._members = [ known.get(url) or Member(url) for url in urls ]
+
+        if self.leader is not None and self.leader not in self._members:
+            self.leader = None
+
+        logger.debug('cluster members: %s', self._members)
@@ -0,0 +1,149 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import typing  # flake8: noqa (use mypy typing)
+
+from typing import Any
+from typing import Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+logger = logging.getLogger(__name__)
+
+# In order of preference.
+BACKENDS = ( 'orjson', 'ujson', 'json', )
+
+
+class JSONCodec(object):
+    '''JSON decoder and encoder backed by the fastest available library.
+
+    orjson and ujson (optional; the first installed is used) decode response
+    bodies several times faster than the standard library's json and accept
+    them as received (bytes) rather than after decoding to str.  Every
+    backend encodes compactly and without escaping non-ASCII characters.
+
+    Properties
+    ----------
+
+    * ``backend``
+
+    Public Methods
+    --------------
+
+    * ``dumps``
+    * ``loads``
+
+    Examples
+    --------
+
+    >>> codec = JSONCodec('json')
+    >>> codec.loads(b'{"node": {"key": "/a", "value": "1"}}')
+    {'node': {'key': '/a', 'value': '1'}}
+    >>> codec.dumps({ 'b': 1, 'a': '/é', }, sort_keys = True)
+    '{"a":"/é","b":1}'
+
+    '''
+
+    def __init__(self, backend: Union[str, None] = None) -> None:
+        '''Create JSONCodec.
+
+        Parameters
+        ----------
+
+        :``backend``: 'orjson', 'ujson' or 'json' (default: the first of
+                      those installed)
+
+        '''
+
+        available = { 'orjson': orjson, 'ujson': ujson, 'json': json, }
+
+        if backend is None:
+            backend = next(_ for _ in BACKENDS if available[_] is not None)
+
+        if backend not in available:
+            raise ValueError('unknown JSON backend: {0}'.format(backend))
+
+        if available[backend] is None:
+            raise ValueError('JSON backend {0} is not installed'.format(backend))
+
+        self.backend = backend
+
+        logger.debug('using %s for JSON', backend)
+
+    def __repr__(self) -> str:
+        return 'JSONCodec({0.backend!r})'.format(self)
+
+    def loads(self, content: Union[bytes, str]) -> Any:
+        '''Decode a JSON document (bytes are UTF-8).'''
+
+        if self.backend == 'orjson':
+            return orjson.loads(content)
+
+        if self.backend == 'ujson':
+            return ujson.loads(content)
+
+        if isinstance(content, bytes):
+            content = content.decode('utf-8')
+
+        return json.loads(content)
+
+    def dumps(self, value: Any, sort_keys: bool = False) -> str:
+        '''Encode value as a compact JSON document.'''
+
+        if self.backend == 'orjson':
+            return orjson.dumps(value, option = orjson.OPT_SORT_KEYS if sort_keys else 0).decode('utf-8')
+
+        if self.backend == 'ujson':
+            return ujson.dumps(value, ensure_ascii = False, escape_forward_slashes = False, sort_keys = sort_keys)
+
+        return json.dumps(value, ensure_ascii = False, separators = ( ',', ':', ), sort_keys = sort_keys)
+
+
+_codec = JSONCodec()
+
+
+def get_codec() -> JSONCodec:
+    '''JSONCodec used to decode responses and values.'''
+
+    return _codec
+
+
+def set_codec(codec: Union[JSONCodec, str]) -> None:
+    '''Use codec (or a JSONCodec for the named backend) from now on.'''
+
+    global _codec
+
+    _codec = codec if isinstance(codec, JSONCodec) else JSONCodec(codec)
+
+
+def loads(content: Union[bytes, str]) -> Any:
+    '''Decode content with the current codec.'''
+
+    return _codec.loads(content)
+
+
+def dumps(value: Any, sort_keys: bool = False) -> str:
+    '''Encode value with the current codec.'''
+
+    return _codec.dumps(value, sort_keys)
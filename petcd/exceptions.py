@@ -0,0 +1,126 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import typing  # flake8: noqa (use mypy typing)
+
+from typing import Any
+from typing import Dict
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+
+class EtcdError(Exception):
+    '''Error reported by etcd.
+
+    Properties
+    ----------
+
+    * ``cause``
+    * ``error_code``
+    * ``index``
+    * ``message``
+
+    '''
+
+    def __init__(self, error_code: int, message: str, cause: Union[str, None] = None, index: Union[int, None] = None) -> None:
+        '''Create EtcdError.
+
+        Parameters
+        ----------
+
+        :``cause``:      key or argument that caused the error
+        :``error_code``: etcd error code (i.e. 100 for key not found)
+        :``index``:      etcd_index when the error occurred
+        :``message``:    human readable description of the error
+
+        '''
+
+        super().__init__('{0}: {1} ({2})'.format(error_code, message, cause))
+
+        self.cause = cause
+        self.error_code = error_code
+        self.index = index
+        self.message = message
+
+    @classmethod
+    def from_response(cls, response: Dict[str, Any]) -> 'EtcdError':
+        '''Create the appropriate EtcdError from a decoded error response.
+
+        Parameters
+        ----------
+
+        :``response``: decoded etcd error body
+
+        Return Value(s)
+        ---------------
+
+        EtcdError (or subclass) matching the response's errorCode.
+
+        Examples
+        --------
+
+        >>> e = EtcdError.from_response({ 'errorCode': 100, 'message': 'Key not found', 'cause': '/foo', 'index': 7, })
+        >>> type(e).__name__, e.error_code, e.index
+        ('EtcdKeyNotFound', 100, 7)
+
+        '''
+
+        error_code = response.get('errorCode')
+
+        return ERRORS.get(error_code, cls)(error_code, response.get('message'), response.get('cause'), response.get('index'))
+
+
+class EtcdKeyNotFound(EtcdError):
+    '''Key does not exist (errorCode 100).'''
+
+    pass
+
+
+class EtcdCompareFailed(EtcdError):
+    '''prevIndex or prevValue did not match (errorCode 101).
+
+    ``cause`` is '[expected != actual]' (i.e. '[5 != 7]' for prevIndex).
+
+    '''
+
+    pass
+
+
+class EtcdNotFile(EtcdError):
+    '''Key is a directory but the action needs a key (errorCode 102).'''
+
+    pass
+
+
+class EtcdNodeExist(EtcdError):
+    '''Key already exists (errorCode 105).'''
+
+    pass
+
+
+class EtcdEventIndexCleared(EtcdError):
+    '''Requested watch index is older than etcd's event history (errorCode 401).'''
+
+    pass
+
+
+ERRORS = {
+    100: EtcdKeyNotFound,
+    101: EtcdCompareFailed,
+    102: EtcdNotFile,
+    105: EtcdNodeExist,
+    401: EtcdEventIndexCleared,
+}  # type: Dict[int, type]
@@ -0,0 +1,129 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import typing  # flake8: noqa (use mypy typing)
+
+from typing import Union
+
+from petcd.metrics import Histogram
+from petcd.retries import RetryBudget
+
+logger = logging.getLogger(__name__)
+
+# Reads observed before latencies are trusted to pick a hedge delay.
+MINIMUM_SAMPLES = 20
+
+
+class HedgePolicy(object):
+    '''When reads are hedged (also sent to a second member).
+
+    A read not answered within the ``percentile`` of recent read latencies
+    (but at least ``minimum`` seconds) is sent to the next member as well;
+    the first answer is used and the other request is cancelled.  Hedges are
+    taken from a RetryBudget earning ``ratio`` hedges per read so hedging
+    adds at most that fraction (plus ``burst``) to the read load however
+    slow a member gets.
+
+    Latencies are kept in a Histogram (so the delay is the upper bound of the
+    percentile's bucket) that is started over every ``window`` reads; the
+    delay is taken from the last complete window once there is one.  No read
+    is hedged before ``MINIMUM_SAMPLES`` reads have been observed.
+
+    Properties
+    ----------
+
+    * ``budget``
+
+    Public Methods
+    --------------
+
+    * ``allows``
+    * ``delay``
+    * ``observe``
+
+    Examples
+    --------
+
+    >>> policy = HedgePolicy(percentile = 0.9, ratio = 0.1, burst = 1)
+    >>> policy.delay() is None
+    True
+    >>> for _ in range(18): policy.observe(0.0007)
+    >>> for _ in range(2): policy.observe(0.2)
+    >>> policy.delay()
+    0.001
+    >>> policy.allows(), policy.allows()
+    (True, False)
+
+    '''
+
+    def __init__(self, percentile: float = 0.95, ratio: float = 0.05, burst: float = 10.0, minimum: float = 0.001, window: int = 1000) -> None:
+        '''Create HedgePolicy.
+
+        Parameters
+        ----------
+
+        :``burst``:      hedges available without preceding reads
+        :``minimum``:    shortest delay (in seconds) before hedging
+        :``percentile``: fraction of reads answered before a read is hedged
+        :``ratio``:      sustained hedges allowed per read
+        :``window``:     reads after which latencies are started over
+
+        '''
+
+        self._budget = RetryBudget(ratio = ratio, burst = burst)
+        self._current = Histogram()
+        self._minimum = minimum
+        self._percentile = percentile
+        self._previous = None  # type: Union[Histogram, None]
+        self._window = window
+
+    @property
+    def budget(self) -> RetryBudget:
+        '''Budget hedges are taken from.'''
+
+        return self._budget
+
+    def allows(self) -> bool:
+        '''Take a hedge from the budget; False if none is available.'''
+
+        if not self._budget.withdraw():
+            logger.debug('hedge budget exhausted; not hedging')
+            return False
+
+        return True
+
+    def delay(self) -> Union[float, None]:
+        '''Seconds to wait for an answer before hedging (None: do not hedge).
+
+        Every call counts as a read towards the budget.
+
+        '''
+
+        self._budget.deposit()
+
+        histogram = self._current if self._previous is None else self._previous
+
+        if histogram.count < MINIMUM_SAMPLES:
+            return None
+
+        return max(self._minimum, histogram.percentile(self._percentile))
+
+    def observe(self, elapsed: float) -> None:
+        '''Record a read that took elapsed seconds.'''
+
+        self._current.observe(elapsed)
+
+        if self._current.count >= self._window:
+            self._previous, self._current = self._current, Histogram()
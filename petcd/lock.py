@@ -0,0 +1,272 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import logging
+import typing  # flake8: noqa (use mypy typing)
+
+from typing import Tuple
+from typing import Union
+
+from petcd.admission import INTERACTIVE
+from petcd.exceptions import EtcdEventIndexCleared
+from petcd.exceptions import EtcdKeyNotFound
+from petcd.results import EtcdNode
+
+logger = logging.getLogger(__name__)
+
+_DELETES = ( 'delete', 'expire', 'compareAndDelete', )
+
+
+class Lock(object):
+    '''Distributed mutual exclusion on an etcd directory.
+
+    Each contender appends an in-order key (with a TTL kept alive while it is
+    held or waited for) to the directory; the contender with the lowest key
+    holds the lock.  A waiter long-polls only the key just ahead of its own
+    so a release wakes exactly one waiter: handoff costs the same number of
+    requests however many contenders there are.
+
+    Acquiring is cancellable (i.e. with ``asyncio.wait_for``); the waiter's
+    key is removed so its successor is not held up.  Requests are admitted
+    (see AdmissionControl) as INTERACTIVE so handoffs and keep-alives are not
+    queued behind bulk work sharing the client.
+
+    Properties
+    ----------
+
+    * ``key``
+    * ``locked``
+
+    Public Methods
+    --------------
+
+    * ``acquire``
+    * ``release``
+
+    Examples
+    --------
+
+    ::
+
+        lock = Lock(client, '/locks/reindex')
+
+        yield from lock.acquire()
+
+        try:
+            ...
+        finally:
+            yield from lock.release()
+
+    '''
+
+    def __init__(self, client, path: str, ttl: int = 30, value: str = '') -> None:
+        '''Create Lock.
+
+        Parameters
+        ----------
+
+        :``client``: AsyncEtcdClient to use
+        :``path``:   directory of the lock's contenders (i.e. '/locks/a')
+        :``ttl``:    seconds a contender's key outlives its process
+        :``value``:  value of this contender's key (i.e. a host name)
+
+        '''
+
+        self._client = client
+        self._keepalive = None  # type: asyncio.Task
+        self._path = path
+        self._ttl = ttl
+        self._value = value
+
+        self.key = None  # type: Union[str, None]
+        self.locked = False
+
+    @asyncio.coroutine
+    def __aenter__(self) -> 'Lock':
+        yield from self.acquire()
+
+        return self
+
+    @asyncio.coroutine
+    def __aexit__(self, *args) -> None:
+        yield from self.release()
+
+    @asyncio.coroutine
+    def acquire(self) -> None:
+        '''Wait until this contender holds the lock.'''
+
+        if self.key is None:
+            self.key = ( yield from self._client.append(self._path, self._value, ttl = self._ttl, priority = INTERACTIVE) ).node.key
+            self._keepalive = self._client.loop.create_task(self._refresh(self.key))
+
+            logger.debug('contending for %s as %s', self._path, self.key)
+
+        try:
+            while True:
+                predecessor, etcd_index = yield from self._predecessor()
+
+                if predecessor is None:
+                    break
+
+                yield from self._wait(predecessor, etcd_index)
+        except BaseException:  # cancellation too: a waiter that gives up must not hold up its successor
+            yield from self.release()
+            raise
+
+        self.locked = True
+
+        logger.debug('%s acquired %s', self.key, self._path)
+
+    @asyncio.coroutine
+    def release(self) -> None:
+        '''Release the lock (or stop waiting for it).'''
+
+        key, self.key = self.key, None
+
+        self.locked = False
+
+        if self._keepalive is not None:
+            self._keepalive.cancel()
+            self._keepalive = None
+
+        if key is None:
+            return
+
+        try:
+            yield from self._client.delete(key, priority = INTERACTIVE)
+        except EtcdKeyNotFound:
+            pass
+
+    @asyncio.coroutine
+    def _predecessor(self) -> Tuple[Union[EtcdNode, None], int]:
+        '''Contender just ahead of this one (None if first) and etcd_index.
+
+        The listing is a quorum read, which is neither cached nor coalesced
+        with a read sent before this contender's key was appended (i.e. by
+        another contender sharing the client).
+
+        '''
+
+        result = yield from self._client.get(self._path, quorum = True, sorted = True, priority = INTERACTIVE)
+
+        predecessor = None
+
+        for node in result.node.nodes:
+            if node.key == self.key:
+                return predecessor, result.etcd_index
+
+            predecessor = node
+
+        raise EtcdKeyNotFound(100, 'Key not found', self.key, result.etcd_index)
+
+    @asyncio.coroutine
+    def _wait(self, predecessor: EtcdNode, etcd_index: int) -> None:
+        '''Wait until predecessor's key is gone.'''
+
+        index = etcd_index + 1
+
+        while True:
+            try:
+                event = yield from self._client.get(predecessor.key, wait = True, wait_index = index)
+            except EtcdEventIndexCleared:
+                return
+
+            if event.action in _DELETES:
+                return
+
+            index = event.node.modified_index + 1
+
+    @asyncio.coroutine
+    def _refresh(self, key: str) -> None:
+        while True:
+            yield from asyncio.sleep(self._ttl / 3)
+
+            try:
+                yield from self._client.set(key, None, ttl = self._ttl, prev_exist = True, refresh = True, priority = INTERACTIVE)
+            except asyncio.CancelledError:
+                raise
+            except EtcdKeyNotFound:
+                logger.warning('%s expired; %s is no longer held', key, self._path)
+
+                if self.key == key:
+                    self.locked = False
+
+                return
+            except Exception as error:
+                logger.warning('refreshing %s failed: %s', key, error)
+
+
+class Election(Lock):
+    '''Leader election on an etcd directory.
+
+    Candidates queue as for Lock with their value as their identity; the
+    candidate at the head of the queue is the leader.
+
+    Properties
+    ----------
+
+    * ``is_leader``
+
+    Public Methods
+    --------------
+
+    * ``campaign``
+    * ``leader``
+    * ``resign``
+
+    Examples
+    --------
+
+    ::
+
+        election = Election(client, '/elections/scheduler', value = hostname)
+
+        yield from election.campaign()
+
+        try:
+            ...  # lead
+        finally:
+            yield from election.resign()
+
+    '''
+
+    @property
+    def is_leader(self) -> bool:
+        '''True while this candidate is the leader.'''
+
+        return self.locked
+
+    @asyncio.coroutine
+    def campaign(self) -> None:
+        '''Wait until this candidate is the leader.'''
+
+        yield from self.acquire()
+
+    @asyncio.coroutine
+    def leader(self) -> Union[str, None]:
+        '''Value (identity) of the current leader (None if there is none).'''
+
+        try:
+            node = yield from self._client.first(self._path, quorum = True, priority = INTERACTIVE)
+        except EtcdKeyNotFound:
+            return None
+
+        return None if node is None else node.value
+
+    @asyncio.coroutine
+    def resign(self) -> None:
+        '''Step down (or stop campaigning).'''
+
+        yield from self.release()
@@ -0,0 +1,260 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bisect
+import collections
+import logging
+import typing  # flake8: noqa (use mypy typing)
+
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Tuple
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (in seconds) of the latency buckets: 0.5ms doubling to ~65s.
+BUCKETS = tuple(0.0005 * 2 ** _ for _ in range(18))  # type: Tuple[float, ...]
+
+
+class Histogram(object):
+    '''Latency histogram with fixed, exponentially sized buckets.
+
+    Percentiles are reported as the upper bound of the bucket the percentile
+    falls in (observations beyond the last bucket report the maximum seen).
+
+    Properties
+    ----------
+
+    * ``count``
+    * ``maximum``
+    * ``total``
+
+    Public Methods
+    --------------
+
+    * ``observe``
+    * ``percentile``
+    * ``snapshot``
+
+    Examples
+    --------
+
+    >>> histogram = Histogram()
+    >>> for _ in range(99): histogram.observe(0.0007)
+    >>> histogram.observe(0.2)
+    >>> histogram.percentile(0.5), histogram.percentile(0.99), histogram.percentile(1.0)
+    (0.001, 0.001, 0.256)
+
+    '''
+
+    def __init__(self, buckets: Iterable[float] = BUCKETS) -> None:
+        '''Create Histogram.
+
+        Parameters
+        ----------
+
+        :``buckets``: ascending upper bounds (in seconds) of the buckets
+
+        '''
+
+        self._bounds = tuple(buckets)
+        self._counts = [ 0, ] * ( len(self._bounds) + 1 )
+
+        self.count = 0
+        self.maximum = 0.0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        '''Record one observation (in seconds).'''
+
+        self._counts[bisect.bisect_left(self._bounds, value)] += 1
+
+        self.count += 1
+        self.maximum = max(self.maximum, value)
+        self.total += value
+
+    def percentile(self, fraction: float) -> Union[float, None]:
+        '''Estimated value below which fraction of observations fall.'''
+
+        if not self.count:
+            return None
+
+        rank = fraction * self.count
+        seen = 0
+
+        for index, count in enumerate(self._counts):
+            seen += count
+
+            if seen >= rank and count:
+                return self._bounds[index] if index < len(self._bounds) else self.maximum
+
+        return self.maximum
+
+    def snapshot(self) -> Dict[str, Any]:
+        '''Copy of the histogram's current state.'''
+
+        return {
+            'buckets': list(zip(self._bounds + ( float('inf'), ), self._counts)),
+            'count': self.count,
+            'max': self.maximum,
+            'p50': self.percentile(0.50),
+            'p90': self.percentile(0.90),
+            'p99': self.percentile(0.99),
+            'sum': self.total,
+        }
+
+
+class MetricsSink(object):
+    '''Receiver of metrics as they are recorded.
+
+    Subclass and override ``increment`` and ``observe`` to forward metrics to
+    a monitoring system; the default implementation discards them.  Sinks are
+    called on the event loop and should not block.
+
+    '''
+
+    def increment(self, name: str, labels: Tuple[str, ...], value: int = 1) -> None:
+        '''Counter name (with labels) increased by value.'''
+
+        pass
+
+    def observe(self, name: str, labels: Tuple[str, ...], value: float) -> None:
+        '''Latency name (with labels) observed as value seconds.'''
+
+        pass
+
+
+class Metrics(object):
+    '''Request metrics for an AsyncEtcdClient.
+
+    Requests are counted and timed by (kind, endpoint, status class) where
+    kind is the HTTP method or 'wait' for long-polls and status class is
+    '2xx', '3xx', '4xx', '5xx' or 'error' (no response).  Retries, hedges
+    and redirects are counted by (kind, endpoint).
+
+    Properties
+    ----------
+
+    * ``sinks``
+
+    Public Methods
+    --------------
+
+    * ``hedge``
+    * ``redirect``
+    * ``request``
+    * ``retry``
+    * ``snapshot``
+
+    Examples
+    --------
+
+    >>> metrics = Metrics()
+    >>> metrics.request('GET', 'http://a:2379/v2', 200, 0.0007)
+    >>> metrics.retry('GET', 'http://a:2379/v2')
+    >>> snapshot = metrics.snapshot()
+    >>> snapshot['requests'][( 'GET', 'http://a:2379/v2', '2xx', )]['count']
+    1
+    >>> snapshot['retries']
+    {('GET', 'http://a:2379/v2'): 1}
+
+    '''
+
+    def __init__(self, sinks: Iterable[MetricsSink] = ()) -> None:
+        '''Create Metrics.
+
+        Parameters
+        ----------
+
+        :``sinks``: MetricsSink instances every metric is also sent to
+
+        '''
+
+        self._hedges = collections.Counter()  # type: Dict[Tuple[str, ...], int]
+        self._latencies = collections.defaultdict(Histogram)  # type: Dict[Tuple[str, ...], Histogram]
+        self._redirects = collections.Counter()  # type: Dict[Tuple[str, ...], int]
+        self._retries = collections.Counter()  # type: Dict[Tuple[str, ...], int]
+
+        self.sinks = list(sinks)  # type: List[MetricsSink]
+
+    def hedge(self, kind: str, endpoint: str) -> None:
+        '''Count a hedged request sent to endpoint.'''
+
+        labels = ( kind, endpoint, )
+
+        self._hedges[labels] += 1
+
+        for sink in self.sinks:
+            sink.increment('hedges', labels)
+
+    def redirect(self, kind: str, endpoint: str) -> None:
+        '''Count a redirect from endpoint.'''
+
+        labels = ( kind, endpoint, )
+
+        self._redirects[labels] += 1
+
+        for sink in self.sinks:
+            sink.increment('redirects', labels)
+
+    def request(self, kind: str, endpoint: str, status: Union[int, None], elapsed: float) -> None:
+        '''Record a request to endpoint.
+
+        Parameters
+        ----------
+
+        :``elapsed``:  seconds the request took
+        :``endpoint``: URL of the member the request was sent to
+        :``kind``:     HTTP method or 'wait'
+        :``status``:   HTTP status of the response (None if there was none)
+
+        '''
+
+        labels = ( kind, endpoint, 'error' if status is None else '{0}xx'.format(status // 100), )
+
+        self._latencies[labels].observe(elapsed)
+
+        for sink in self.sinks:
+            sink.increment('requests', labels)
+            sink.observe('latency', labels, elapsed)
+
+    def retry(self, kind: str, endpoint: str) -> None:
+        '''Count a retry of a request that failed on endpoint.'''
+
+        labels = ( kind, endpoint, )
+
+        self._retries[labels] += 1
+
+        for sink in self.sinks:
+            sink.increment('retries', labels)
+
+    def snapshot(self) -> Dict[str, Dict[Tuple[str, ...], Any]]:
+        '''Copy of all metrics recorded so far.
+
+        Return Value(s)
+        ---------------
+
+        Dictionary with 'requests' (labels to histogram snapshot), 'retries',
+        'hedges' and 'redirects' (labels to count).
+
+        '''
+
+        return {
+            'hedges': dict(self._hedges),
+            'redirects': dict(self._redirects),
+            'requests': { labels: histogram.snapshot() for labels, histogram in self._latencies.items() },
+            'retries': dict(self._retries),
+        }
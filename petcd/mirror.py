@@ -0,0 +1,286 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import bisect
+import logging
+import typing  # flake8: noqa (use mypy typing)
+
+from typing import List
+from typing import Union
+
+from petcd.admission import BACKGROUND
+from petcd.exceptions import EtcdKeyNotFound
+from petcd.results import EtcdNode
+from petcd.results import EtcdResult
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(key: str) -> str:
+    return '/' + key.strip('/')
+
+
+class Mirror(object):
+    '''In memory replica of a directory subtree kept in sync by a watch.
+
+    Every key and directory under ``prefix`` is kept in a dictionary and its
+    key in a sorted list so lookups are O(1) and ordered queries (``first``,
+    ``ls``, ``range``, ``scan``) are O(log n) plus the size of the answer.
+    Updates cost O(n) in the worst case (list insertion) but are applied from
+    watch events, not by readers.
+
+    Queries answer from the state as of ``etcd_index``; they do not wait for
+    changes made after it.  If the watch fails the mirror reloads itself from
+    a fresh snapshot (read as BACKGROUND; see AdmissionControl).  Nodes
+    returned are shared with the mirror and must not be modified (directories
+    have no ``nodes``; use ``ls`` or ``scan``).
+
+    Properties
+    ----------
+
+    * ``etcd_index``
+    * ``prefix``
+
+    Public Methods
+    --------------
+
+    * ``close``
+    * ``first``
+    * ``get``
+    * ``ls``
+    * ``range``
+    * ``scan``
+    * ``start``
+
+    Examples
+    --------
+
+    ::
+
+        mirror = Mirror(client, '/jobs')
+        yield from mirror.start()
+
+        for node in mirror.scan('/jobs/pending'):
+            ...
+
+        mirror.close()
+
+    >>> mirror = Mirror(None, '/jobs')
+    >>> mirror._load([ EtcdNode('/jobs/a', dir = True, nodes = [ EtcdNode('/jobs/a/2', '2', modified_index = 5), EtcdNode('/jobs/a/1', '1', modified_index = 4), ]), EtcdNode('/jobs/a.x', 'x', modified_index = 6), EtcdNode('/jobs/b', dir = True, modified_index = 3), ], 6)
+    >>> mirror.ls('/jobs'), mirror.first('/jobs/a')
+    (['/jobs/a', '/jobs/a.x', '/jobs/b'], EtcdNode('/jobs/a/1', value = '1', modified_index = 4))
+    >>> mirror._apply(EtcdResult.from_node('delete', EtcdNode('/jobs/a', dir = True, modified_index = 7), 7))
+    >>> [ _.key for _ in mirror.scan('/jobs') ], mirror.etcd_index
+    (['/jobs/a.x', '/jobs/b'], 7)
+
+    '''
+
+    def __init__(self, client, prefix: str) -> None:
+        '''Create Mirror.
+
+        Parameters
+        ----------
+
+        :``client``: AsyncEtcdClient to read and watch with
+        :``prefix``: directory to mirror (i.e. '/jobs')
+
+        '''
+
+        self._client = client
+        self._keys = []  # type: List[str]
+        self._nodes = {}  # type: typing.Dict[str, EtcdNode]
+        self._task = None  # type: asyncio.Task
+
+        self.etcd_index = None  # type: Union[int, None]
+        self.prefix = _normalize(prefix)
+
+    def __contains__(self, key: str) -> bool:
+        return _normalize(key) in self._nodes
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @asyncio.coroutine
+    def __aenter__(self) -> 'Mirror':
+        yield from self.start()
+
+        return self
+
+    @asyncio.coroutine
+    def __aexit__(self, *args) -> None:
+        self.close()
+
+    @asyncio.coroutine
+    def start(self) -> None:
+        '''Load the subtree and start following changes to it.'''
+
+        yield from self._snapshot()
+
+        if self._task is None or self._task.done():
+            self._task = self._client.loop.create_task(self._follow())
+
+    def close(self) -> None:
+        '''Stop following changes (the mirror keeps its last state).'''
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def first(self, key: str) -> Union[EtcdNode, None]:
+        '''Lowest (i.e. oldest in-order) child of directory key (if any).'''
+
+        key = _normalize(key).rstrip('/')
+        index = bisect.bisect_left(self._keys, key + '/')
+
+        # Parents sort before their descendants so this is a child of key.
+        if index < len(self._keys) and self._keys[index] < key + '0':
+            return self._nodes[self._keys[index]]
+
+        return None
+
+    def get(self, key: str) -> Union[EtcdNode, None]:
+        '''Node for key (None if it does not exist).'''
+
+        return self._nodes.get(_normalize(key))
+
+    def ls(self, key: str) -> List[str]:
+        '''Keys of the children (not all descendants) of directory key, sorted.'''
+
+        key = _normalize(key).rstrip('/')
+        stop = key + '0'
+
+        children = []
+        index = bisect.bisect_left(self._keys, key + '/')
+
+        while index < len(self._keys) and self._keys[index] < stop:
+            child, _, rest = self._keys[index][len(key) + 1:].partition('/')
+            child = key + '/' + child
+
+            if not rest:
+                children.append(child)
+                index += 1
+            else:
+                # Skip the rest of the child's descendants (which may follow
+                # siblings like child + '.x').
+                index = bisect.bisect_left(self._keys, child + '0', index)
+
+        return children
+
+    def range(self, start: str, stop: str) -> List[EtcdNode]:
+        '''Nodes with start <= key < stop in key order.'''
+
+        low = bisect.bisect_left(self._keys, start)
+        high = bisect.bisect_left(self._keys, stop)
+
+        return [ self._nodes[_] for _ in self._keys[low:high] ]
+
+    def scan(self, key: str) -> List[EtcdNode]:
+        '''Nodes of all descendants of directory key in key order.'''
+
+        key = _normalize(key).rstrip('/')
+
+        return self.range(key + '/', key + '0')  # '0' follows '/'
+
+    def _add(self, node: EtcdNode) -> None:
+        key = _normalize(node.key)
+
+        if key not in self._nodes:
+            bisect.insort(self._keys, key)
+
+        self._nodes[key] = EtcdNode(key, node.value, node.dir, node.created_index, node.modified_index, node.ttl, node.expiration)
+
+    def _remove(self, key: str) -> None:
+        key = _normalize(key)
+
+        if self._nodes.pop(key, None) is not None:
+            del self._keys[bisect.bisect_left(self._keys, key)]
+
+        low = bisect.bisect_left(self._keys, key + '/')
+        high = bisect.bisect_left(self._keys, key + '0', low)
+
+        for child in self._keys[low:high]:
+            del self._nodes[child]
+
+        del self._keys[low:high]
+
+    def _apply(self, event: EtcdResult) -> None:
+        node = event.node
+        key = _normalize(node.key)
+
+        if event.action in ( 'delete', 'expire', 'compareAndDelete', ):
+            self._remove(key)
+        elif key != self.prefix:
+            if node.dir and key in self._nodes and not self._nodes[key].dir:
+                self._remove(key)
+
+            self._add(node)
+
+            # etcd creates missing parents without events of their own.
+            parent = key.rsplit('/', 1)[0]
+            while parent.startswith(self.prefix + '/') and parent not in self._nodes:
+                self._add(EtcdNode(parent, dir = True, created_index = node.modified_index, modified_index = node.modified_index))
+                parent = parent.rsplit('/', 1)[0]
+
+        self.etcd_index = max(self.etcd_index or 0, node.modified_index)
+
+    def _load(self, nodes: List[EtcdNode], etcd_index: int) -> None:
+        self._keys = []
+        self._nodes = {}
+
+        pending = list(nodes)
+
+        while pending:
+            node = pending.pop()
+            pending.extend(node.nodes)
+
+            key = _normalize(node.key)
+
+            self._nodes[key] = EtcdNode(key, node.value, node.dir, node.created_index, node.modified_index, node.ttl, node.expiration)
+
+        self._keys = sorted(self._nodes.keys())
+
+        self.etcd_index = etcd_index
+
+    @asyncio.coroutine
+    def _snapshot(self) -> None:
+        try:
+            result = yield from self._client.get(self.prefix, recursive = True, priority = BACKGROUND)
+        except EtcdKeyNotFound as error:
+            self._load([], error.index)
+        else:
+            self._load(result.node.nodes, result.etcd_index)
+
+        logger.debug('mirror of %s loaded %s node(s) at %s', self.prefix, len(self._keys), self.etcd_index)
+
+    @asyncio.coroutine
+    def _follow(self) -> None:
+        while True:
+            try:
+                event = yield from self._client.watch(self.prefix, index = self.etcd_index + 1, recursive = True)
+
+                self._apply(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.warning('mirror of %s failed (reloading): %s', self.prefix, error)
+
+                yield from asyncio.sleep(1)
+
+                try:
+                    yield from self._snapshot()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as error:
+                    logger.warning('reloading mirror of %s failed: %s', self.prefix, error)
@@ -0,0 +1,229 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import typing  # flake8: noqa (use mypy typing)
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Union
+
+from petcd import codec
+
+logger = logging.getLogger(__name__)
+
+
+class EtcdNode(object):
+    '''A key (or directory) in etcd.
+
+    Children are kept as decoded by the response until ``nodes`` is first
+    accessed and only then converted to EtcdNode, so a malformed child raises
+    ValueError (naming the child) at that access rather than when the
+    response is read; ``json`` decodes the value on every access.
+
+    Properties
+    ----------
+
+    * ``created_index``
+    * ``dir``
+    * ``expiration``
+    * ``json``
+    * ``key``
+    * ``modified_index``
+    * ``nodes``
+    * ``ttl``
+    * ``value``
+
+    Examples
+    --------
+
+    >>> node = EtcdNode.from_dict({ 'key': '/d', 'dir': True, 'modifiedIndex': 3, 'createdIndex': 2, 'nodes': [ { 'key': '/d/a', 'value': '[1]', 'modifiedIndex': 3, 'createdIndex': 3, }, ], })
+    >>> node
+    EtcdNode('/d', dir = True, modified_index = 3)
+    >>> node.nodes[0].key, node.nodes[0].json
+    ('/d/a', [1])
+
+    >>> EtcdNode.from_dict({ 'key': '/d', 'dir': True, 'nodes': [ { 'value': '1', }, ], }).nodes
+    Traceback (most recent call last):
+      ...
+    ValueError: malformed etcd node (no key): {'value': '1'}
+
+    '''
+
+    __slots__ = ( 'created_index', 'dir', 'expiration', 'key', 'modified_index', 'ttl', 'value', '_nodes', )
+
+    def __init__(self, key: str, value: Union[str, None] = None, dir: bool = False, created_index: Union[int, None] = None, modified_index: Union[int, None] = None, ttl: Union[int, None] = None, expiration: Union[str, None] = None, nodes: Union[List[Any], None] = None) -> None:
+        '''Create EtcdNode.
+
+        Parameters
+        ----------
+
+        :``created_index``:  etcd_index the key was created at
+        :``dir``:            True if the node is a directory
+        :``expiration``:     time the key expires (ISO 8601)
+        :``key``:            the key (i.e. '/foo')
+        :``modified_index``: etcd_index the key was last modified at
+        :``nodes``:          children (EtcdNode or decoded dictionaries)
+        :``ttl``:            seconds until the key expires
+        :``value``:          the key's value
+
+        '''
+
+        self.created_index = created_index
+        self.dir = dir
+        self.expiration = expiration
+        self.key = key
+        self.modified_index = modified_index
+        self.ttl = ttl
+        self.value = value
+
+        self._nodes = nodes
+
+    def __repr__(self) -> str:
+        if self.dir:
+            return 'EtcdNode({0.key!r}, dir = True, modified_index = {0.modified_index})'.format(self)
+
+        return 'EtcdNode({0.key!r}, value = {0.value!r}, modified_index = {0.modified_index})'.format(self)
+
+    @classmethod
+    def from_dict(cls, node: Dict[str, Any]) -> 'EtcdNode':
+        '''Create EtcdNode from a decoded etcd node (ValueError if malformed).'''
+
+        if not isinstance(node, dict) or 'key' not in node:
+            raise ValueError('malformed etcd node (no key): {0!r}'.format(node))
+
+        if not isinstance(node.get('nodes', []), list):
+            raise ValueError('malformed etcd node (nodes is not a list): {0!r}'.format(node))
+
+        return cls(node['key'], node.get('value'), node.get('dir', False), node.get('createdIndex'), node.get('modifiedIndex'), node.get('ttl'), node.get('expiration'), node.get('nodes'))
+
+    @property
+    def json(self) -> Any:
+        '''Value decoded from JSON.'''
+
+        return codec.loads(self.value)
+
+    @property
+    def nodes(self) -> List['EtcdNode']:
+        '''Children of this directory (empty for keys).'''
+
+        if self._nodes is None:
+            return []
+
+        if self._nodes and not isinstance(self._nodes[0], EtcdNode):
+            self._nodes = [ EtcdNode.from_dict(_) for _ in self._nodes ]
+
+        return self._nodes
+
+
+class EtcdResult(object):
+    '''Result of an etcd action.
+
+    The response body is kept as received and only decoded when one of its
+    fields is first accessed (so a malformed body raises ValueError then);
+    the body is released once decoded.
+
+    Properties
+    ----------
+
+    * ``action``
+    * ``etcd_index``
+    * ``node``
+    * ``prev_node``
+
+    Examples
+    --------
+
+    >>> result = EtcdResult(b'{"action":"set","node":{"key":"/a","value":"1","modifiedIndex":5,"createdIndex":5}}', 5)
+    >>> result.action, result.node.value, result.prev_node
+    ('set', '1', None)
+
+    '''
+
+    __slots__ = ( 'etcd_index', '_action', '_content', '_node', '_prev_node', )
+
+    def __init__(self, content: bytes, etcd_index: Union[int, None] = None) -> None:
+        '''Create EtcdResult.
+
+        Parameters
+        ----------
+
+        :``content``:    raw response body
+        :``etcd_index``: X-Etcd-Index of the response
+
+        '''
+
+        self.etcd_index = etcd_index
+
+        self._content = content
+
+    def __repr__(self) -> str:
+        return 'EtcdResult({0.action!r}, {0.node!r}, etcd_index = {0.etcd_index})'.format(self)
+
+    @classmethod
+    def from_node(cls, action: str, node: EtcdNode, etcd_index: Union[int, None] = None, prev_node: Union[EtcdNode, None] = None) -> 'EtcdResult':
+        '''Create EtcdResult for an action not decoded from a response.
+
+        Examples
+        --------
+
+        >>> EtcdResult.from_node('delete', EtcdNode('/a', modified_index = 9), 9)
+        EtcdResult('delete', EtcdNode('/a', value = None, modified_index = 9), etcd_index = 9)
+
+        '''
+
+        result = cls(None, etcd_index)
+
+        result._action = action
+        result._node = node
+        result._prev_node = prev_node
+
+        return result
+
+    @property
+    def action(self) -> str:
+        '''Action performed (i.e. 'get', 'set', 'delete').'''
+
+        self._decode()
+
+        return self._action
+
+    @property
+    def node(self) -> EtcdNode:
+        '''Node acted upon.'''
+
+        self._decode()
+
+        return self._node
+
+    @property
+    def prev_node(self) -> Union[EtcdNode, None]:
+        '''Node before the action (if any).'''
+
+        self._decode()
+
+        return self._prev_node
+
+    def _decode(self) -> None:
+        if self._content is None:
+            return
+
+        response = codec.loads(self._content)
+
+        self._action = response.get('action')
+        self._node = EtcdNode.from_dict(response['node']) if 'node' in response else None
+        self._prev_node = EtcdNode.from_dict(response['prevNode']) if 'prevNode' in response else None
+
+        self._content = None
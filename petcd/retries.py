@@ -0,0 +1,242 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import aiohttp
+import asyncio
+import logging
+import random
+import typing  # flake8: noqa (use mypy typing)
+
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Tuple
+
+from petcd.exceptions import EtcdError
+
+logger = logging.getLogger(__name__)
+
+
+def always(error: Exception, idempotent: bool) -> bool:
+    '''Retry rule: retry any request.'''
+
+    return True
+
+
+def idempotent_only(error: Exception, idempotent: bool) -> bool:
+    '''Retry rule: retry only requests that are safe to replay.'''
+
+    return idempotent
+
+
+def never(error: Exception, idempotent: bool) -> bool:
+    '''Retry rule: never retry.'''
+
+    return False
+
+
+# First matching exception class wins.  A connection that was never
+# established cannot have applied a write; anything else may have.
+DEFAULT_RULES = (
+    ( aiohttp.ClientConnectorError, always, ),
+    ( EtcdError, idempotent_only, ),
+    ( asyncio.TimeoutError, idempotent_only, ),
+    ( aiohttp.ClientError, idempotent_only, ),
+    ( OSError, idempotent_only, ),
+)  # type: Tuple[Tuple[type, Callable[[Exception, bool], bool]], ...]
+
+
+def idempotent(method: str, parameters: Dict[str, str]) -> bool:
+    '''True if replaying the request cannot change its outcome.
+
+    Reads are idempotent; writes are only idempotent when they compare and
+    swap on prevIndex (a replay of an applied write fails the comparison).
+
+    Examples
+    --------
+
+    >>> idempotent('GET', {}), idempotent('PUT', {}), idempotent('PUT', { 'prevIndex': '7', })
+    (True, False, True)
+
+    >>> idempotent('DELETE', {}), idempotent('POST', { 'prevIndex': '7', })
+    (False, False)
+
+    '''
+
+    if method == 'GET':
+        return True
+
+    return method in ( 'PUT', 'DELETE', ) and 'prevIndex' in parameters
+
+
+class RetryBudget(object):
+    '''Client wide cap on the ratio of retries to requests.
+
+    Every request deposits ``ratio`` of a retry and every retry withdraws one;
+    the balance starts at (and never exceeds) ``burst`` so a few retries are
+    always available but sustained retrying is limited to ``ratio`` of the
+    request rate.
+
+    Examples
+    --------
+
+    >>> budget = RetryBudget(ratio = 0.5, burst = 1)
+    >>> budget.withdraw(), budget.withdraw()
+    (True, False)
+    >>> budget.deposit(); budget.deposit()
+    >>> budget.withdraw()
+    True
+
+    '''
+
+    def __init__(self, ratio: float = 0.1, burst: float = 10.0) -> None:
+        '''Create RetryBudget.
+
+        Parameters
+        ----------
+
+        :``burst``: retries available without preceding requests
+        :``ratio``: sustained retries allowed per request
+
+        '''
+
+        self._balance = burst
+        self._burst = burst
+        self._ratio = ratio
+
+    @property
+    def balance(self) -> float:
+        '''Retries currently available.'''
+
+        return self._balance
+
+    def deposit(self) -> None:
+        '''Record a request.'''
+
+        self._balance = min(self._burst, self._balance + self._ratio)
+
+    def withdraw(self) -> bool:
+        '''Take a retry from the budget; False if none is available.'''
+
+        if self._balance < 1:
+            return False
+
+        self._balance -= 1
+
+        return True
+
+
+class RetryPolicy(object):
+    '''How failed requests are retried.
+
+    A request is retried (on the next member of the cluster) when the rule
+    for its error allows it and the budget has a retry available.  Going back
+    to a member that has already failed the request counts against
+    ``retries`` and first waits a random time between zero and
+    ``min(cap, base * 2 ** retry)`` seconds (full jitter).
+
+    Properties
+    ----------
+
+    * ``budget``
+    * ``retries``
+
+    Public Methods
+    --------------
+
+    * ``allows``
+    * ``backoff``
+
+    '''
+
+    def __init__(self, retries: int = 1, base: float = 0.05, cap: float = 2.0, budget: RetryBudget = None, rules: Iterable[Tuple[type, Callable[[Exception, bool], bool]]] = DEFAULT_RULES) -> None:
+        '''Create RetryPolicy.
+
+        Parameters
+        ----------
+
+        :``base``:    back off (in seconds) before the first retry (pre-jitter)
+        :``budget``:  RetryBudget shared by requests (default: RetryBudget())
+        :``cap``:     maximum back off (in seconds)
+        :``retries``: number of times to go back to an already failed member
+        :``rules``:   (exception class, rule) pairs; the first matching class's
+                      rule decides, unmatched errors are not retried
+
+        '''
+
+        if budget is None:
+            budget = RetryBudget()
+
+        self._base = base
+        self._budget = budget
+        self._cap = cap
+        self._retries = retries
+        self._rules = tuple(rules)
+
+    @property
+    def budget(self) -> RetryBudget:
+        '''Retry budget shared by requests using this policy.'''
+
+        return self._budget
+
+    @property
+    def retries(self) -> int:
+        '''Number of times to go back to an already failed member.'''
+
+        return self._retries
+
+    def allows(self, error: Exception, idempotent: bool) -> bool:
+        '''True if a request that failed with error may be retried.
+
+        A retry is taken from the budget if allowed.
+
+        Parameters
+        ----------
+
+        :``error``:      exception the request failed with
+        :``idempotent``: True if the request is safe to replay
+
+        Examples
+        --------
+
+        >>> policy = RetryPolicy(budget = RetryBudget(burst = 1))
+        >>> policy.allows(EtcdError(300, 'Raft Internal Error'), idempotent = False)
+        False
+        >>> policy.allows(EtcdError(300, 'Raft Internal Error'), idempotent = True)
+        True
+        >>> policy.allows(EtcdError(300, 'Raft Internal Error'), idempotent = True)
+        False
+
+        '''
+
+        for cls, rule in self._rules:
+            if isinstance(error, cls):
+                break
+        else:
+            return False
+
+        if not rule(error, idempotent):
+            logger.debug('not retrying %r (idempotent: %s)', error, idempotent)
+            return False
+
+        if not self._budget.withdraw():
+            logger.info('retry budget exhausted; not retrying %r', error)
+            return False
+
+        return True
+
+    def backoff(self, retry: int) -> float:
+        '''Seconds to wait before the given retry (counting from 1).'''
+
+        return random.uniform(0, min(self._cap, self._base * 2 ** ( retry - 1 )))
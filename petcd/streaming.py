@@ -0,0 +1,298 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import collections
+import logging
+import re
+import typing  # flake8: noqa (use mypy typing)
+
+from typing import Callable
+from typing import List
+from typing import Union
+
+from petcd import codec
+from petcd.results import EtcdNode
+
+logger = logging.getLogger(__name__)
+
+_STRUCTURE = re.compile(br'[{}\[\],"]')
+_STRING = re.compile(br'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)  # up to (not including) the closing "
+
+
+class NodeParser(object):
+    '''Incrementally extract child nodes from an etcd response body.
+
+    Bytes are fed as they arrive; every complete element of the response's
+    ``node.nodes`` array is decoded and returned as soon as its closing brace
+    has been seen.  Only the bytes of the element being parsed are buffered so
+    memory does not grow with the number of children.  Scanning resumes where
+    the previous chunk ended (even inside a string) so every byte is scanned
+    once, and an element without nested objects is decoded in one step
+    (without scanning its tokens).
+
+    Examples
+    --------
+
+    >>> parser = NodeParser()
+    >>> parser.feed(b'{"action":"get","node":{"key":"/d","dir":true,"nodes":[{"key":"/d/a","val')
+    []
+    >>> parser.feed(b'ue":"}{\\\\')
+    []
+    >>> parser.feed(b'""},{"key":"/d/b","value":"2"}]}}')
+    [EtcdNode('/d/a', value = '}{"', modified_index = None), EtcdNode('/d/b', value = '2', modified_index = None)]
+    >>> parser.close()
+
+    '''
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._expect_key = False
+        self._keys = []  # type: List[Union[str, None]]
+        self._position = 0
+        self._stack = []  # type: List[int]
+        self._start = None  # type: Union[int, None]
+        self._string = None  # type: Union[int, None]
+
+    def close(self) -> None:
+        '''Verify the body was complete (raises ValueError otherwise).'''
+
+        if self._stack or self._start is not None or self._string is not None:
+            raise ValueError('truncated etcd response')
+
+    def feed(self, data: bytes) -> List[EtcdNode]:
+        '''Parse more of the body.
+
+        Parameters
+        ----------
+
+        :``data``: next chunk of the response body
+
+        Return Value(s)
+        ---------------
+
+        Child nodes completed by this chunk.
+
+        '''
+
+        buffer = self._buffer
+        buffer.extend(data)
+
+        nodes = []
+        position = self._position
+
+        while True:
+            if self._string is not None:
+                position = _STRING.match(buffer, position).end()
+
+                if position == len(buffer) or buffer[position] != 0x22:
+                    break  # the rest of the string (or of an escape) is to come
+
+                if self._expect_key:
+                    self._keys[-1] = buffer[self._string:position].decode('utf-8')
+                    self._expect_key = False
+
+                self._string = None
+                position += 1
+
+                continue
+
+            match = _STRUCTURE.search(buffer, position)
+
+            if match is None:
+                position = len(buffer)
+                break
+
+            character, position = buffer[match.start()], match.end()
+
+            if character == 0x22:  # "
+                self._string = position
+            elif character in ( 0x7b, 0x5b, ):  # { [
+                if character == 0x7b and self._in_nodes():
+                    # Only the element itself decodes if it ends at the first
+                    # } (a prefix ending inside a string or a nested object
+                    # cannot); otherwise, its tokens are scanned.
+                    end = buffer.find(b'}', position) + 1
+
+                    if end:
+                        try:
+                            node = codec.loads(bytes(buffer[match.start():end]))
+                        except ValueError:
+                            pass
+                        else:
+                            nodes.append(EtcdNode.from_dict(node))
+                            position = end
+
+                            continue
+
+                    self._start = match.start()
+
+                self._stack.append(character)
+
+                if character == 0x7b:
+                    self._keys.append(None)
+                    self._expect_key = True
+            elif character in ( 0x7d, 0x5d, ):  # } ]
+                self._stack.pop()
+
+                if character == 0x7d:
+                    self._keys.pop()
+
+                    if self._start is not None and self._in_nodes():
+                        nodes.append(EtcdNode.from_dict(codec.loads(buffer[self._start:position])))
+                        self._start = None
+            elif character == 0x2c:  # ,
+                self._expect_key = self._stack[-1] == 0x7b
+
+        keep = min([ position, ] + [ _ for _ in ( self._start, self._string, ) if _ is not None ])
+
+        del buffer[:keep]
+
+        self._position = position - keep
+        if self._start is not None:
+            self._start -= keep
+        if self._string is not None:
+            self._string -= keep
+
+        return nodes
+
+    def _in_nodes(self) -> bool:
+        '''True if directly inside the node.nodes array; otherwise, False.'''
+
+        return self._stack == [ 0x7b, 0x7b, 0x5b, ] and self._keys == [ 'node', 'nodes', ]
+
+
+class NodeStream(object):
+    '''Asynchronous iterator over the children of an etcd directory.
+
+    The request is sent when iteration begins.  A body that ends within
+    ``buffer_size`` bytes is decoded at once; the children of a larger body
+    are decoded as their bytes arrive (see NodeParser)::
+
+        async for node in client.iter_nodes('/jobs', recursive = True):
+            ...
+
+    Properties
+    ----------
+
+    * ``etcd_index``
+
+    Public Methods
+    --------------
+
+    * ``close``
+
+    '''
+
+    def __init__(self, open: Callable, chunk_size: int = 65536, on_close: Union[Callable[[], None], None] = None, buffer_size: int = 1048576) -> None:
+        '''Create NodeStream.
+
+        Parameters
+        ----------
+
+        :``buffer_size``: bytes read before falling back to incremental
+                          parsing (0 always parses incrementally)
+        :``chunk_size``: maximum bytes read from the response at once
+        :``on_close``:   called once when a stream whose response was opened
+                         is closed
+        :``open``:       coroutine function returning an unread, successful
+                         response
+
+        '''
+
+        self._buffer_size = buffer_size
+        self._chunk_size = chunk_size
+        self._done = False
+        self._nodes = collections.deque()  # type: Deque[EtcdNode]
+        self._on_close = on_close
+        self._open = open
+        self._parser = NodeParser()
+        self._response = None
+
+        self.etcd_index = None  # type: Union[int, None]
+
+    def __aiter__(self) -> 'NodeStream':
+        return self
+
+    @asyncio.coroutine
+    def __anext__(self) -> EtcdNode:
+        try:
+            while not self._nodes:
+                if self._done:
+                    raise StopAsyncIteration
+
+                if self._response is None:
+                    yield from self._start()
+                    continue
+
+                chunk = yield from self._response.content.read(self._chunk_size)
+
+                if not chunk:
+                    self.close()
+                    self._parser.close()
+                    continue
+
+                self._nodes.extend(self._parser.feed(chunk))
+        except BaseException:  # release the response (and admission) on errors and cancellation too
+            self.close()
+            raise
+
+        return self._nodes.popleft()
+
+    def close(self) -> None:
+        '''Stop iterating and release the connection.'''
+
+        if self._done:
+            return
+
+        self._done = True
+
+        if self._response is not None:
+            self._response.release()
+
+            if self._on_close is not None:
+                self._on_close()
+
+    @asyncio.coroutine
+    def _start(self) -> None:
+        response = yield from self._open()
+
+        if self._done:  # closed while opening
+            self._done, self._response = False, response
+            self.close()
+
+            return
+
+        self._response = response
+
+        etcd_index = self._response.headers.get('X-Etcd-Index')
+        if etcd_index is not None:
+            self.etcd_index = int(etcd_index)
+
+        body = bytearray()
+
+        while len(body) < self._buffer_size:
+            chunk = yield from response.content.read(self._chunk_size)
+
+            if not chunk:
+                self.close()
+
+                node = codec.loads(bytes(body)).get('node', {})
+                self._nodes.extend([ EtcdNode.from_dict(_) for _ in node.get('nodes', []) ])
+
+                return
+
+            body.extend(chunk)
+
+        self._nodes.extend(self._parser.feed(bytes(body)))
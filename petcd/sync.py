@@ -0,0 +1,211 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import functools
+import logging
+import threading
+import typing  # flake8: noqa (use mypy typing)
+
+from typing import Any
+from typing import Callable
+from typing import Iterator
+
+import petcd
+
+from petcd.results import EtcdNode
+from petcd.results import EtcdResult
+
+logger = logging.getLogger(__name__)
+
+
+def _synchronous(name: str) -> Callable[..., Any]:
+    '''Method of SyncEtcdClient that runs AsyncEtcdClient's name and waits.'''
+
+    method = getattr(petcd.AsyncEtcdClient, name)
+
+    @functools.wraps(method, updated = ())
+    def wrapper(self, *args, **kwargs):
+        return self._run(getattr(self._client, name)(*args, **kwargs))
+
+    return wrapper
+
+
+@asyncio.coroutine
+def _close(stream) -> None:
+    '''Close stream (on its loop).'''
+
+    stream.close()
+
+
+class SyncEtcdClient(object):
+    '''Blocking etcd client for threaded code.
+
+    Owns an AsyncEtcdClient and a daemon thread running its event loop; each
+    method submits the corresponding coroutine to that loop and blocks the
+    calling thread until it finishes.  All threads share the one client and
+    so its connection pool, cache, coalesced reads and watches.  Submitting
+    does not take a lock (beyond the loop's thread safe hand off) so threads
+    do not contend with each other.
+
+    Methods must not be called from the loop's own thread (i.e. from a
+    coroutine run by the client), which would deadlock; a RuntimeError is
+    raised instead.
+
+    Properties
+    ----------
+
+    * ``client``
+    * ``loop``
+
+    Public Methods
+    --------------
+
+    Those of AsyncEtcdClient (blocking) and:
+
+    * ``close``
+
+    Examples
+    --------
+
+    ::
+
+        client = SyncEtcdClient('http://127.0.0.1:2379/v2')
+
+        try:
+            client.set('/foo', 'bar')
+            value = client.get_value('/foo')
+        finally:
+            client.close()
+
+    '''
+
+    def __init__(self, *args, **kwargs) -> None:
+        '''Create SyncEtcdClient.
+
+        Parameters
+        ----------
+
+        Those of AsyncEtcdClient (other than ``loop``).
+
+        '''
+
+        self._loop = asyncio.new_event_loop()
+
+        self._client = petcd.AsyncEtcdClient(*args, loop = self._loop, **kwargs)
+
+        self._thread = threading.Thread(target = self._serve, name = 'petcd-{0}'.format(id(self)), daemon = True)
+        self._thread.start()
+
+    def __enter__(self) -> 'SyncEtcdClient':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def client(self) -> 'petcd.AsyncEtcdClient':
+        '''The AsyncEtcdClient calls are run with.'''
+
+        return self._client
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        '''Event loop (running in a background thread) of the client.'''
+
+        return self._loop
+
+    def close(self) -> None:
+        '''Close the client and stop its thread.
+
+        The SyncEtcdClient cannot be used afterwards.
+
+        '''
+
+        if self._loop.is_closed():
+            return
+
+        try:
+            self._run(self._client.close())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+    append = _synchronous('append')
+    delete = _synchronous('delete')
+    delete_many = _synchronous('delete_many')
+    dump = _synchronous('dump')
+    first = _synchronous('first')
+    get = _synchronous('get')
+    get_json = _synchronous('get_json')
+    get_list = _synchronous('get_list')
+    get_value = _synchronous('get_value')
+    load = _synchronous('load')
+    ls = _synchronous('ls')
+    mkdir = _synchronous('mkdir')
+    set = _synchronous('set')
+    set_many = _synchronous('set_many')
+    update = _synchronous('update')
+    watch = _synchronous('watch')
+
+    def iter_events(self, *args, **kwargs) -> Iterator[EtcdResult]:
+        '''Iterate (blocking) over events as AsyncEtcdClient.iter_events.
+
+        Events are read ahead on the loop while the calling thread works;
+        closing the generator stops the watch.
+
+        '''
+
+        return self._iterate(self._client.iter_events(*args, **kwargs))
+
+    def iter_nodes(self, *args, **kwargs) -> Iterator[EtcdNode]:
+        '''Iterate (blocking) over nodes as AsyncEtcdClient.iter_nodes.
+
+        Each step waits on the loop for the next node; closing the generator
+        releases the connection.
+
+        '''
+
+        return self._iterate(self._client.iter_nodes(*args, **kwargs))
+
+    def _iterate(self, stream) -> Iterator[Any]:
+        '''Iterate (blocking) over an asynchronous stream run on the loop.'''
+
+        try:
+            while True:
+                try:
+                    yield self._run(stream.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            if not self._loop.is_closed():  # (i.e. finalized after close)
+                self._run(_close(stream))
+
+    def _run(self, coroutine) -> Any:
+        '''Run coroutine on the client's loop and wait for its result.'''
+
+        if threading.current_thread() is self._thread:
+            coroutine.close()
+
+            raise RuntimeError('SyncEtcdClient called from its own event loop; use SyncEtcdClient.client instead')
+
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def _serve(self) -> None:
+        asyncio.set_event_loop(self._loop)
+
+        logger.debug('running %s in %s', self._client, threading.current_thread().name)
+
+        self._loop.run_forever()
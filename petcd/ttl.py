@@ -0,0 +1,264 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import logging
+import math
+import typing  # flake8: noqa (use mypy typing)
+import zlib
+
+from typing import Callable
+from typing import List
+from typing import Union
+
+from petcd.admission import INTERACTIVE
+from petcd.exceptions import EtcdKeyNotFound
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry(object):
+    __slots__ = ( 'rounds', 'slot', 'ttl', 'value', )
+
+    def __init__(self, ttl: int, value: Union[str, None]) -> None:
+        self.rounds = 0
+        self.slot = None  # type: Union[int, None]
+        self.ttl = ttl
+        self.value = value
+
+
+class TTLRefresher(object):
+    '''Keep many TTL'd keys alive with one timer.
+
+    Keys are refreshed (``set(refresh = True, prev_exist = True)``, which
+    resets the TTL without notifying watchers) every ``fraction`` of their TTL.
+    Refreshes are scheduled on a hashed timer wheel of ``slots`` slots that
+    advances every ``tick`` seconds: one sleeping task serves every key and
+    each key's first refresh is offset by a hash of the key so refreshes are
+    spread evenly rather than sent in bursts.  Due refreshes are sent by
+    ``concurrency`` workers sharing the client's connection pool and are
+    admitted (see AdmissionControl) as INTERACTIVE: a late refresh loses its
+    key.
+
+    A refresh that finds its key gone means the key expired because the
+    refresh came too late: the key is counted in ``expired``, reported to
+    ``on_expired`` and, if it was added with a value, created again.
+
+    Properties
+    ----------
+
+    * ``expired``
+    * ``keys``
+
+    Public Methods
+    --------------
+
+    * ``add``
+    * ``close``
+    * ``discard``
+
+    Examples
+    --------
+
+    ::
+
+        refresher = TTLRefresher(client, on_expired = lambda key: logger.warning('lost %s', key))
+
+        for host in hosts:
+            yield from client.set('/presence/' + host, 'up', ttl = 30)
+            refresher.add('/presence/' + host, 30, 'up')
+
+        ...
+
+        refresher.close()
+
+    '''
+
+    def __init__(self, client, tick: float = 0.1, slots: int = 512, fraction: float = 1 / 3, concurrency: Union[int, None] = None, on_expired: Union[Callable[[str], None], None] = None) -> None:
+        '''Create TTLRefresher.
+
+        Parameters
+        ----------
+
+        :``client``:      AsyncEtcdClient to refresh keys with
+        :``concurrency``: maximum refreshes in flight (default:
+                          client.connection_limit)
+        :``fraction``:    fraction of a key's TTL between refreshes
+        :``on_expired``:  called with each key found expired
+        :``slots``:       number of slots in the timer wheel
+        :``tick``:        seconds per slot (the timer's resolution)
+
+        '''
+
+        if concurrency is None:
+            concurrency = client.connection_limit
+
+        self._client = client
+        self._concurrency = concurrency
+        self._cursor = 0
+        self._due = None  # type: asyncio.Queue
+        self._entries = {}  # type: Dict[str, _Entry]
+        self._fraction = fraction
+        self._on_expired = on_expired
+        self._tasks = []  # type: List[asyncio.Task]
+        self._tick = tick
+        self._wheel = [ set() for _ in range(slots) ]  # type: List[Set[str]]
+
+        self.expired = 0
+
+    @property
+    def keys(self) -> List[str]:
+        '''Keys being kept alive.'''
+
+        return list(self._entries.keys())
+
+    def add(self, key: str, ttl: int, value: Union[str, None] = None) -> None:
+        '''Keep key (which should already exist with ttl) alive.
+
+        Parameters
+        ----------
+
+        :``key``:   the key to refresh (i.e. '/presence/a')
+        :``ttl``:   seconds the key lives after each refresh
+        :``value``: value to create the key with again if it expires (None
+                    to stop refreshing it instead)
+
+        '''
+
+        self.discard(key)
+
+        entry = self._entries[key] = _Entry(ttl, value)
+
+        # Spread first refreshes evenly over one refresh interval.
+        interval = self._interval(entry)
+        self._schedule(key, entry, zlib.crc32(key.encode('utf-8')) % interval + 1)
+
+        if not self._tasks:
+            self._start()
+
+    def discard(self, key: str) -> None:
+        '''Stop refreshing key (it expires after its current TTL).'''
+
+        entry = self._entries.pop(key, None)
+
+        if entry is not None and entry.slot is not None:
+            self._wheel[entry.slot].discard(key)
+
+    def close(self) -> None:
+        '''Stop refreshing all keys.'''
+
+        for task in self._tasks:
+            task.cancel()
+
+        self._tasks = []
+
+        for key in list(self._entries.keys()):
+            self.discard(key)
+
+    def _interval(self, entry: _Entry) -> int:
+        '''Ticks between refreshes of entry.'''
+
+        return max(1, int(math.floor(entry.ttl * self._fraction / self._tick)))
+
+    def _schedule(self, key: str, entry: _Entry, ticks: int) -> None:
+        entry.rounds = ( ticks - 1 ) // len(self._wheel)
+        entry.slot = ( self._cursor + ticks ) % len(self._wheel)
+
+        self._wheel[entry.slot].add(key)
+
+    def _start(self) -> None:
+        loop = self._client.loop
+
+        self._due = asyncio.Queue()
+
+        self._tasks = [ loop.create_task(self._turn()), ] + [ loop.create_task(self._work()) for _ in range(max(self._concurrency, 1)) ]
+
+    def _advance(self) -> None:
+        '''Move the wheel one slot and queue the keys that are due.'''
+
+        self._cursor = ( self._cursor + 1 ) % len(self._wheel)
+
+        slot = self._wheel[self._cursor]
+
+        for key in list(slot):
+            entry = self._entries.get(key)
+
+            if entry is None or entry.slot != self._cursor:  # discarded (or moved)
+                slot.discard(key)
+                continue
+
+            if entry.rounds:
+                entry.rounds -= 1
+                continue
+
+            slot.discard(key)
+            entry.slot = None
+
+            self._due.put_nowait(key)
+
+    @asyncio.coroutine
+    def _turn(self) -> None:
+        loop = self._client.loop
+        deadline = loop.time() + self._tick
+
+        while True:
+            yield from asyncio.sleep(max(0, deadline - loop.time()))
+
+            # Several ticks are due if the loop was busy.
+            while deadline <= loop.time():
+                self._advance()
+                deadline += self._tick
+
+    @asyncio.coroutine
+    def _work(self) -> None:
+        while True:
+            key = yield from self._due.get()
+
+            # Discarded, or added again (and so scheduled) while queued.
+            entry = self._entries.get(key)
+            if entry is None or entry.slot is not None:
+                continue
+
+            try:
+                yield from self._client.set(key, None, ttl = entry.ttl, prev_exist = True, refresh = True, priority = INTERACTIVE)
+            except asyncio.CancelledError:
+                raise
+            except EtcdKeyNotFound:
+                self.expired += 1
+
+                logger.warning('%s expired before it was refreshed', key)
+
+                if self._on_expired is not None:
+                    try:
+                        self._on_expired(key)
+                    except Exception:
+                        logger.exception('on_expired(%r) failed', key)
+
+                if entry.value is None:
+                    if self._entries.get(key) is entry:
+                        self.discard(key)
+
+                    continue
+
+                try:
+                    yield from self._client.set(key, entry.value, ttl = entry.ttl, priority = INTERACTIVE)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as error:
+                    logger.warning('recreating %s failed: %s', key, error)
+            except Exception as error:
+                logger.warning('refreshing %s failed: %s', key, error)
+
+            if self._entries.get(key) is entry and entry.slot is None:
+                self._schedule(key, entry, self._interval(entry))
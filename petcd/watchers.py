@@ -0,0 +1,665 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import collections
+import logging
+import random
+import typing  # flake8: noqa (use mypy typing)
+
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Union
+
+from petcd.admission import BACKGROUND
+from petcd.exceptions import EtcdError
+from petcd.exceptions import EtcdEventIndexCleared
+from petcd.exceptions import EtcdKeyNotFound
+from petcd.results import EtcdNode
+from petcd.results import EtcdResult
+
+logger = logging.getLogger(__name__)
+
+DELETES = ( 'delete', 'expire', 'compareAndDelete', )
+
+# Reads of a resynchronization snapshot before giving up on a stale one.
+SNAPSHOT_ATTEMPTS = 3
+
+
+def _normalize(key: str) -> str:
+    return '/' + key.strip('/')
+
+
+def _covers(prefix: str, key: str, recursive: bool = True) -> bool:
+    '''True if an event on key is visible to a watch on prefix.
+
+    Examples
+    --------
+
+    >>> _covers('/jobs', '/jobs/a'), _covers('/jobs', '/jobs/a/b'), _covers('/jobs', '/jobsx')
+    (True, True, False)
+
+    >>> _covers('/jobs', '/jobs/a', recursive = False), _covers('/', '/jobs')
+    (False, True)
+
+    '''
+
+    return key == prefix or ( recursive and ( prefix == '/' or key.startswith(prefix + '/') ) )
+
+
+def _flatten(node: EtcdNode) -> Dict[str, EtcdNode]:
+    '''Every node in the tree under node (inclusive) by normalized key.'''
+
+    nodes = {}
+    pending = [ node, ]
+
+    while pending:
+        node = pending.pop()
+        nodes[_normalize(node.key)] = node
+        pending.extend(node.nodes)
+
+    return nodes
+
+
+def _parent(key: str) -> str:
+    return _normalize(key.rsplit('/', 1)[0])
+
+
+def _removed(key: str, state: Dict[str, int], nodes: Dict[str, EtcdNode], index: int) -> str:
+    '''Highest key whose delete (since index) removed key.
+
+    That is the highest ancestor that is gone as well (and known to have
+    existed) or that was deleted and created again since index.
+
+    '''
+
+    while key != '/':
+        parent = _parent(key)
+        node = nodes.get(parent)
+
+        if node is None and parent not in state and _parent(parent) not in nodes:
+            break
+
+        if node is not None and ( node.created_index is None or node.created_index < index ):
+            break
+
+        key = parent
+
+    return key
+
+
+def _diff(state: Dict[str, int], nodes: Dict[str, EtcdNode], index: int, etcd_index: int) -> List[EtcdResult]:
+    '''Events that turn state (as of index) into nodes (as of etcd_index).
+
+    The events are those etcd would have sent, as far as the snapshot tells,
+    each with a different modified index in [ index, etcd_index ] so watchers
+    resuming from the index after an event miss none of the others:
+
+    * nodes modified at or after index are (re)created, other than
+      directories created along with a key (which etcd sends no event for)
+    * keys in state missing from nodes were deleted; keys removed together
+      (with a directory) are one recursive delete of the directory.  Their
+      indexes are unknown so each delete is given one no other event uses
+      (and that precedes the directory being created again, if it was).
+
+    Should there not be enough indexes (i.e. deletes of keys not known to
+    share a directory), the remaining deletes share the last index they may
+    take (and a warning is logged).
+
+    Examples
+    --------
+
+    >>> nodes = { '/a': EtcdNode('/a', '2', created_index = 1, modified_index = 12), '/b': EtcdNode('/b', '1', created_index = 3, modified_index = 3), }
+    >>> [ ( _.action, _.node.key, _.node.modified_index, ) for _ in _diff({ '/a': 1, '/b': 3, '/c': 4, }, nodes, 10, 12) ]
+    [('delete', '/c', 10), ('set', '/a', 12)]
+
+    >>> nodes = { '/d': EtcdNode('/d', dir = True, created_index = 11, modified_index = 11), '/d/z': EtcdNode('/d/z', '1', created_index = 11, modified_index = 11), }
+    >>> [ ( _.action, _.node.key, _.node.modified_index, ) for _ in _diff({ '/d': 2, '/d/x': 2, '/d/y': 3, }, nodes, 10, 11) ]
+    [('delete', '/d', 10), ('create', '/d/z', 11)]
+
+    >>> len(_diff({ '/k{0}'.format(_): 1 for _ in range(10) }, {}, 5, 7))
+    10
+
+    '''
+
+    changed = [ _ for _ in nodes.values() if _.modified_index is not None and _.modified_index >= index ]
+
+    keys = collections.defaultdict(list)  # type: Dict[int, List[str]]
+    for node in changed:
+        keys[node.modified_index].append(_normalize(node.key))
+
+    events = []
+
+    for node in changed:
+        key = _normalize(node.key)
+
+        if node.dir and any(_.startswith(key.rstrip('/') + '/') for _ in keys[node.modified_index]):
+            continue
+
+        events.append(EtcdResult.from_node('create' if node.created_index >= index else 'set', node, etcd_index))
+
+    removed = {}  # type: Dict[str, bool]  # key to whether it is a directory
+    for key in state.keys() - nodes.keys():
+        top = _removed(key, state, nodes, index)
+        removed[top] = removed.get(top, False) or top != key
+
+    for key in [ _ for _ in removed if any(_.startswith(other.rstrip('/') + '/') for other in removed) ]:
+        del removed[key]
+
+    # Deletes of keys created again must precede that; those are placed
+    # first (lowest free index) so every delete finds an index if possible.
+    bounds = { key: nodes[key].created_index if key in nodes else etcd_index + 1 for key in removed }
+    free = [ _ for _ in range(index, etcd_index + 1) if _ not in keys ]
+
+    for key in sorted(removed, key = lambda _: ( bounds[_], _, )):
+        if free and free[0] < bounds[key]:
+            modified_index = free.pop(0)
+        else:
+            modified_index = bounds[key] - 1
+            logger.warning('no index left for the delete of %s; sharing %s', key, modified_index)
+
+        events.append(EtcdResult.from_node('delete', EtcdNode(key, dir = removed[key], modified_index = modified_index), etcd_index))
+
+    return sorted(events, key = lambda _: ( _.node.modified_index, _.action != 'delete', ))
+
+
+class _Subscriber(object):
+    def __init__(self, key: str, recursive: bool, index: Union[int, None], future: asyncio.Future) -> None:
+        self.future = future
+        self.index = index
+        self.key = key
+        self.recursive = recursive
+
+    def wants(self, event: EtcdResult) -> bool:
+        node = event.node
+        key = _normalize(node.key)
+
+        if self.index is not None and node.modified_index < self.index:
+            return False
+
+        # As etcd, watchers of keys under a deleted directory see its delete.
+        return _covers(self.key, key, self.recursive) or ( node.dir and event.action in DELETES and _covers(key, self.key) )
+
+
+class _Poll(object):
+    '''One recursive long-poll shared by all subscribers under prefix.
+
+    ``covered`` is the lowest index from which every event under prefix is
+    either in ``history`` or still to be delivered.  ``state`` maps each key
+    under prefix known to exist to its modified index.
+
+    '''
+
+    def __init__(self, prefix: str, index: Union[int, None], history: int) -> None:
+        self.covered = index
+        self.history = collections.deque(maxlen = history)  # type: Deque[EtcdResult]
+        self.index = index
+        self.prefix = prefix
+        self.state = {}  # type: Dict[str, int]
+        self.subscribers = []  # type: List[_Subscriber]
+        self.task = None  # type: asyncio.Task
+
+    def apply(self, event: EtcdResult) -> None:
+        key = _normalize(event.node.key)
+
+        if event.action in DELETES:
+            self.state.pop(key, None)
+
+            if event.node.dir:
+                for child in [ _ for _ in self.state if _.startswith(key + '/') ]:
+                    del self.state[child]
+        else:
+            self.state[key] = event.node.modified_index
+
+    def record(self, event: EtcdResult) -> None:
+        if len(self.history) == self.history.maxlen:
+            self.covered = self.history[0].node.modified_index + 1
+
+        self.history.append(event)
+
+    def replay(self, subscriber: _Subscriber) -> Union[EtcdResult, None]:
+        for event in self.history:
+            if subscriber.wants(event):
+                return event
+
+        return None
+
+
+class WatchMultiplexer(object):
+    '''Share recursive long-polls between many watchers.
+
+    A watch on a key is served by a running poll on the key (or any of its
+    parents) if there is one; otherwise, a recursive poll is started on the
+    key's parent directory (or the key itself for recursive watches and keys
+    at the top level).  A poll on the root carries every event in the cluster
+    so one is only started for, and only serves, a watch on the root.  Each
+    poll resumes from the index after the last event it saw so no events are
+    lost between polls, and the most recent ``history`` events are kept to
+    serve watchers that resume from an index the poll has already passed.
+
+    Polls stop once they have had no subscribers for ``linger`` seconds; the
+    delay lets watchers that re-watch after each event keep their poll.
+
+    A poll that falls behind etcd's event history (EtcdEventIndexCleared)
+    resynchronizes instead of failing: after a random delay of up to
+    ``resync_jitter`` seconds (so many clients do not reload at once) it reads
+    its prefix recursively, diffs that snapshot against the keys it knows of
+    and delivers (and keeps in its history) a synthetic event for each key
+    that differs before resuming from the snapshot's etcd_index.  Deletes are
+    only detected for keys the poll has seen in an event or snapshot; polls
+    for recursive watches take a snapshot when they start so all deletes under
+    their prefix are detected.  Snapshots are bulk reads and are admitted (see
+    AdmissionControl) as BACKGROUND.
+
+    Properties
+    ----------
+
+    * ``prefixes``
+
+    Public Methods
+    --------------
+
+    * ``close``
+    * ``watch``
+
+    '''
+
+    def __init__(self, client, history: int = 100, linger: float = 1.0, resync_jitter: float = 1.0) -> None:
+        '''Create WatchMultiplexer.
+
+        Parameters
+        ----------
+
+        :``client``:        AsyncEtcdClient used for polling
+        :``history``:       number of events retained per poll for late watchers
+        :``linger``:        seconds an idle poll is kept running
+        :``resync_jitter``: maximum seconds to wait before resynchronizing
+
+        '''
+
+        self._client = client
+        self._history = history
+        self._linger = linger
+        self._polls = {}  # type: Dict[str, _Poll]
+        self._resync_jitter = resync_jitter
+
+    @property
+    def prefixes(self) -> List[str]:
+        '''Prefixes with a running poll.'''
+
+        return sorted(self._polls.keys())
+
+    def close(self) -> None:
+        '''Stop all polls; pending watches are cancelled.'''
+
+        for poll in list(self._polls.values()):
+            poll.task.cancel()
+
+            for subscriber in poll.subscribers:
+                subscriber.future.cancel()
+
+        self._polls.clear()
+
+    @asyncio.coroutine
+    def watch(self, key: str, index: Union[int, None] = None, recursive: bool = False) -> EtcdResult:
+        '''Wait for the next event on the given key.
+
+        Parameters
+        ----------
+
+        :``index``:     point in time (etcd_index) to begin watching for events
+        :``key``:       the key to watch (i.e. '/foo')
+        :``recursive``: include events on all children of key
+
+        Return Value(s)
+        ---------------
+
+        EtcdResult describing the event.
+
+        '''
+
+        key = _normalize(key)
+
+        subscriber = _Subscriber(key, recursive, index, asyncio.Future(loop = self._client.loop))
+
+        poll = self._find(key)
+
+        while poll is not None and index is not None and ( poll.covered is None or index < poll.covered ):
+            logger.debug('%s@%s predates poll on %s; watching directly', key, index, poll.prefix)
+
+            try:
+                return ( yield from self._client.get(key, recursive = recursive, wait = True, wait_index = index) )
+            except EtcdEventIndexCleared as error:
+                nodes, etcd_index = yield from self._snapshot(key, error.index)
+
+            events = _diff({}, { k: v for k, v in nodes.items() if _covers(key, k, recursive) }, index, etcd_index)
+            if events:
+                return events[0]
+
+            subscriber.index = index = etcd_index + 1
+
+            poll = self._find(key)
+
+        if poll is not None and index is not None:
+            event = poll.replay(subscriber)
+            if event is not None:
+                return event
+
+        if poll is None:
+            prefix = key if recursive else _normalize(key.rsplit('/', 1)[0])
+
+            if prefix == '/':
+                prefix = key
+
+            poll = self._polls[prefix] = _Poll(prefix, index, self._history)
+            poll.task = self._client.loop.create_task(self._poll(poll, seed = recursive))
+
+            logger.debug('started poll on %s@%s', prefix, index)
+
+        poll.subscribers.append(subscriber)
+
+        try:
+            return ( yield from subscriber.future )
+        finally:
+            if subscriber in poll.subscribers:
+                poll.subscribers.remove(subscriber)
+
+            if not poll.subscribers:
+                self._client.loop.call_later(self._linger, self._reap, poll)
+
+    def _find(self, key: str) -> Union[_Poll, None]:
+        for prefix, poll in self._polls.items():
+            if prefix == '/' and key != '/':
+                continue
+
+            if _covers(prefix, key):
+                return poll
+
+        return None
+
+    def _reap(self, poll: _Poll) -> None:
+        if not poll.subscribers and self._polls.get(poll.prefix) is poll:
+            logger.debug('stopping idle poll on %s', poll.prefix)
+
+            del self._polls[poll.prefix]
+            poll.task.cancel()
+
+    @asyncio.coroutine
+    def _snapshot(self, key: str, floor: Union[int, None] = None) -> Tuple[Dict[str, EtcdNode], int]:
+        '''Nodes under key (by key) and the etcd_index they were read at.
+
+        The snapshot is a quorum read so it is never answered by the cache or
+        by a read sent before the poll fell behind; one read before ``floor``
+        (the etcd_index a wait was cleared at) is read again.
+
+        '''
+
+        for _ in range(SNAPSHOT_ATTEMPTS):
+            try:
+                result = yield from self._client.get(key, recursive = True, quorum = True, priority = BACKGROUND)
+            except EtcdKeyNotFound as error:
+                nodes, etcd_index = {}, error.index
+            else:
+                nodes, etcd_index = _flatten(result.node), result.etcd_index
+
+            if floor is None or etcd_index is None or etcd_index >= floor:
+                return nodes, etcd_index
+
+            logger.info('snapshot of %s at %s predates %s; reading again', key, etcd_index, floor)
+
+        raise EtcdError(0, 'Stale read', '{0} older than etcd_index {1}'.format(key, floor))
+
+    @asyncio.coroutine
+    def _resync(self, poll: _Poll, floor: Union[int, None] = None) -> None:
+        yield from asyncio.sleep(random.uniform(0, self._resync_jitter))
+
+        nodes, etcd_index = yield from self._snapshot(poll.prefix, floor)
+
+        events = _diff(poll.state, nodes, poll.index, etcd_index)
+
+        logger.info('poll on %s resynchronized at %s: %s change(s) since %s', poll.prefix, etcd_index, len(events), poll.index)
+
+        poll.state = { key: node.modified_index for key, node in nodes.items() if node.modified_index is not None }
+
+        for event in events:
+            self._dispatch(poll, event)
+
+        poll.index = etcd_index + 1
+
+    def _dispatch(self, poll: _Poll, event: EtcdResult) -> None:
+        poll.record(event)
+
+        for subscriber in poll.subscribers:
+            if not subscriber.future.done() and subscriber.wants(event):
+                subscriber.future.set_result(event)
+
+    @asyncio.coroutine
+    def _poll(self, poll: _Poll, seed: bool = False) -> None:
+        while True:
+            try:
+                if seed:
+                    nodes, _ = yield from self._snapshot(poll.prefix)
+                    poll.state = { key: node.modified_index for key, node in nodes.items() if node.modified_index is not None }
+
+                    seed = False
+
+                try:
+                    event = yield from self._client.get(poll.prefix, recursive = True, wait = True, wait_index = poll.index)
+                except EtcdEventIndexCleared as error:
+                    logger.info('poll on %s fell behind etcd history: %s', poll.prefix, error)
+
+                    yield from self._resync(poll, error.index)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.info('poll on %s failed: %s', poll.prefix, error)
+
+                if self._polls.get(poll.prefix) is poll:
+                    del self._polls[poll.prefix]
+
+                for subscriber in poll.subscribers:
+                    if not subscriber.future.done():
+                        subscriber.future.set_exception(error)
+
+                return
+
+            modified_index = event.node.modified_index
+
+            if poll.covered is None:
+                poll.covered = min(modified_index, ( event.etcd_index or modified_index ) + 1)
+
+            poll.index = modified_index + 1
+            poll.apply(event)
+
+            self._dispatch(poll, event)
+
+
+# Policies of an EventStream whose buffer is full.
+OVERFLOWS = ( 'block', 'coalesce', )
+
+
+class EventStream(object):
+    '''Asynchronous iterator over the events of a watch.
+
+    Events are read ahead by a task that watches (see ``AsyncEtcdClient.watch``)
+    from the index after each event into a buffer of at most ``size`` events.
+    ``overflow`` decides what a consumer that falls behind costs:
+
+    :``block``:    reading stops while the buffer is full and resumes from
+                   the index after the last buffered event (served from the
+                   multiplexer's history, etcd's or a resynchronization) so
+                   every event is delivered
+    :``coalesce``: an event on a key that is already buffered replaces that
+                   event (and moves to the end) so only the latest event per
+                   key is delivered; reading only stops while ``size``
+                   different keys are buffered
+
+    Either way memory is bounded.  Replaying the coalesced events in order
+    still produces the latest state.  An error ends the iteration (after the
+    buffered events) by being raised; start a new stream from ``index`` to
+    continue::
+
+        async for event in client.iter_events('/jobs', recursive = True, overflow = 'coalesce'):
+            ...
+
+    Properties
+    ----------
+
+    * ``coalesced``
+    * ``index``
+
+    Public Methods
+    --------------
+
+    * ``close``
+
+    '''
+
+    def __init__(self, watch: Callable, index: Union[int, None] = None, size: int = 100, overflow: str = 'block', loop: Union[asyncio.AbstractEventLoop, None] = None) -> None:
+        '''Create EventStream.
+
+        Parameters
+        ----------
+
+        :``index``:    point in time (etcd_index) to begin watching for events
+                       (default: when iteration begins)
+        :``loop``:     event loop (default: asyncio.get_event_loop())
+        :``overflow``: 'block' or 'coalesce' (see above)
+        :``size``:     maximum events buffered
+        :``watch``:    coroutine function of an index returning the next event
+
+        '''
+
+        if overflow not in OVERFLOWS:
+            raise ValueError('overflow must be one of {0}: {1}'.format(', '.join(OVERFLOWS), overflow))
+
+        if size < 1:
+            raise ValueError('size must be positive: {0}'.format(size))
+
+        self._buffer = collections.OrderedDict()  # type: Dict[Union[str, int], EtcdResult]
+        self._closed = False
+        self._error = None  # type: Exception
+        self._loop = loop
+        self._overflow = overflow
+        self._sequence = 0
+        self._size = size
+        self._task = None  # type: asyncio.Task
+        self._waiter = None  # type: asyncio.Future
+        self._watch = watch
+
+        self.coalesced = 0
+        self.index = index
+
+    def __aiter__(self) -> 'EventStream':
+        return self
+
+    @asyncio.coroutine
+    def __anext__(self) -> EtcdResult:
+        if self._task is None and not self._closed:
+            if self._loop is None:
+                self._loop = asyncio.get_event_loop()
+
+            self._task = self._loop.create_task(self._read())
+
+        while not self._buffer:
+            if self._closed or self._task.done():
+                error, self._error = self._error, None
+
+                self.close()
+
+                if error is not None:
+                    raise error
+
+                raise StopAsyncIteration
+
+            yield from self._wait()
+
+        _, event = self._buffer.popitem(last = False)
+
+        self._wake()
+
+        return event
+
+    def close(self) -> None:
+        '''Stop watching; buffered events are dropped.'''
+
+        self._closed = True
+
+        if self._task is not None:
+            self._task.cancel()
+
+        self._buffer.clear()
+
+        self._wake()
+
+    @asyncio.coroutine
+    def _read(self) -> None:
+        try:
+            while True:
+                event = yield from self._watch(self.index)
+
+                self.index = event.node.modified_index + 1
+
+                yield from self._put(event)
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            logger.debug('event stream failed: %r', error)
+
+            self._error = error
+        finally:
+            self._wake()
+
+    @asyncio.coroutine
+    def _put(self, event: EtcdResult) -> None:
+        while True:
+            if self._overflow == 'coalesce':
+                key = _normalize(event.node.key)
+
+                if key in self._buffer:
+                    del self._buffer[key]
+                    self._buffer[key] = event
+
+                    self.coalesced += 1
+
+                    break
+            else:
+                key = self._sequence
+
+            if len(self._buffer) < self._size:
+                self._buffer[key] = event
+                self._sequence += 1
+
+                break
+
+            logger.debug('event stream full (%s events); waiting for the consumer', len(self._buffer))
+
+            yield from self._wait()
+
+        self._wake()
+
+    @asyncio.coroutine
+    def _wait(self) -> None:
+        '''Wait until the other side (consumer or reader) makes progress.'''
+
+        self._waiter = asyncio.Future(loop = self._loop)
+
+        yield from self._waiter
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
@@ -46,8 +46,9 @@ PARAMS['classifiers'] = [
     'Natural Language :: English',
     'Operating System :: OS Independent',
     'Programming Language :: Python :: 3',
-    'Programming Language :: Python :: 3.3',
-    'Programming Language :: Python :: 3.4',
+    'Programming Language :: Python :: 3.5',
+    'Programming Language :: Python :: 3.6',
+    'Programming Language :: Python :: 3.7',
     'Programming Language :: Python :: 3 :: Only',
     'Topic :: Database',
     'Topic :: Database :: Front-Ends',
@@ -66,8 +67,11 @@ PARAMS['keywords'] = [
 
 PARAMS['packages'] = find_packages(exclude = ( 'test_*', ))
 
+# async for (StopAsyncIteration, __anext__) needs 3.5; aiohttp 3 needs 3.5.3.
+PARAMS['python_requires'] = '>=3.5.3'
+
 PARAMS['install_requires'] = [
-    'aiohttp',
+    'aiohttp>=3.3',  # ClientTimeout
     'mypy-lang',
 ]
 
@@ -75,7 +79,10 @@ PARAMS['install_requires'] = [
 #     Documentation Requires:
 #     * sphinx_rtd_theme
 
-PARAMS['extras_require'] = {}
+PARAMS['extras_require'] = {
+    'orjson': [ 'orjson', ],
+    'ujson': [ 'ujson', ],
+}
 
 PARAMS['test_suite'] = 'nose.collector'
 PARAMS['tests_require'] = [
@@ -0,0 +1,256 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''Benchmarks for AsyncEtcdClient.
+
+Measures throughput and latency percentiles of get, set, recursive get and
+watch fan-out at several concurrency levels against an in-process FakeEtcd
+(or a real etcd given with --url)::
+
+    python -m test_petcd.benchmark
+    python -m test_petcd.benchmark --concurrency 1 50 --requests 5000
+    python -m test_petcd.benchmark --url http://localhost:2379/v2 get set
+
+Numbers against FakeEtcd include the fake's own (single loop) overhead; they
+are meant for comparing client changes, not for sizing etcd.
+
+'''
+
+import argparse
+import asyncio
+import logging
+import typing  # flake8: noqa (use mypy typing)
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from petcd import AsyncEtcdClient
+from test_petcd.fake_etcd import FakeEtcd
+
+logger = logging.getLogger(__name__)
+
+PREFIX = '/petcd-benchmark'
+
+# Keys under each of the trees read by the recursive get benchmark.
+TREE_SIZE = 10
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    '''Sample below which fraction of the (sorted) samples fall.
+
+    Examples
+    --------
+
+    >>> percentile([ 1, 2, 3, 4, ], 0.5), percentile([ 1, 2, 3, 4, ], 0.99)
+    (2, 4)
+
+    '''
+
+    return samples[min(len(samples) - 1, max(0, int(round(fraction * len(samples))) - 1))]
+
+
+def summarize(name: str, concurrency: int, samples: List[float], elapsed: float) -> Dict[str, Any]:
+    '''Throughput and latency percentiles of one benchmark run.'''
+
+    samples = sorted(samples)
+
+    return {
+        'benchmark': name,
+        'concurrency': concurrency,
+        'operations': len(samples),
+        'throughput': len(samples) / elapsed,
+        'p50': percentile(samples, 0.50),
+        'p99': percentile(samples, 0.99),
+    }
+
+
+@asyncio.coroutine
+def measure(operation: Callable[[int], Any], count: int, concurrency: int) -> Tuple[List[float], float]:
+    '''Run operation(0) ... operation(count - 1) with concurrency workers.
+
+    Return Value(s)
+    ---------------
+
+    ( latencies, elapsed ): seconds each operation took and seconds all took.
+
+    '''
+
+    loop = asyncio.get_event_loop()
+    operations = iter(range(count))
+    samples = []  # type: List[float]
+
+    @asyncio.coroutine
+    def worker():
+        for number in operations:
+            start = loop.time()
+            yield from operation(number)
+            samples.append(loop.time() - start)
+
+    start = loop.time()
+    yield from asyncio.gather(*[ worker() for _ in range(concurrency) ])
+
+    return samples, loop.time() - start
+
+
+@asyncio.coroutine
+def benchmark_get(client: AsyncEtcdClient, count: int, concurrency: int) -> Tuple[List[float], float]:
+    '''Reads of single keys (distinct keys so reads are not coalesced).'''
+
+    keys = max(concurrency, min(count, 1000))
+
+    yield from client.set_many([ ( '{0}/get/{1}'.format(PREFIX, _), 'value', ) for _ in range(keys) ])
+
+    return ( yield from measure(lambda number: client.get('{0}/get/{1}'.format(PREFIX, number % keys)), count, concurrency) )
+
+
+@asyncio.coroutine
+def benchmark_set(client: AsyncEtcdClient, count: int, concurrency: int) -> Tuple[List[float], float]:
+    '''Writes of single keys.'''
+
+    keys = max(concurrency, min(count, 1000))
+
+    return ( yield from measure(lambda number: client.set('{0}/set/{1}'.format(PREFIX, number % keys), str(number)), count, concurrency) )
+
+
+@asyncio.coroutine
+def benchmark_recursive_get(client: AsyncEtcdClient, count: int, concurrency: int) -> Tuple[List[float], float]:
+    '''Recursive reads of directories of TREE_SIZE keys.'''
+
+    trees = max(concurrency, 10)
+
+    yield from client.set_many([ ( '{0}/tree/{1}/{2}'.format(PREFIX, tree, _), 'value', ) for tree in range(trees) for _ in range(TREE_SIZE) ])
+
+    return ( yield from measure(lambda number: client.get('{0}/tree/{1}'.format(PREFIX, number % trees), recursive = True), count, concurrency) )
+
+
+@asyncio.coroutine
+def benchmark_watch(client: AsyncEtcdClient, count: int, concurrency: int) -> Tuple[List[float], float]:
+    '''Delivery of each write to concurrency watchers of the written key.
+
+    Latency is from starting the write to a watcher receiving its event;
+    count events are delivered in total.
+
+    '''
+
+    loop = asyncio.get_event_loop()
+    key = '{0}/watch'.format(PREFIX)
+    index = ( yield from client.set(key, 'start') ).etcd_index
+    samples = []  # type: List[float]
+
+    @asyncio.coroutine
+    def watcher(index, written):
+        yield from client.watch(key, index = index)
+        samples.append(loop.time() - written[0])
+
+    start = loop.time()
+
+    for _ in range(max(1, count // concurrency)):
+        written = [ None, ]
+        watchers = [ loop.create_task(watcher(index + 1, written)) for _ in range(concurrency) ]
+
+        yield from asyncio.sleep(0)
+
+        written[0] = loop.time()
+        index = ( yield from client.set(key, str(index)) ).etcd_index
+
+        yield from asyncio.gather(*watchers)
+
+    return samples, loop.time() - start
+
+
+BENCHMARKS = {
+    'get': benchmark_get,
+    'recursive_get': benchmark_recursive_get,
+    'set': benchmark_set,
+    'watch': benchmark_watch,
+}  # type: Dict[str, Callable[[AsyncEtcdClient, int, int], Any]]
+
+
+@asyncio.coroutine
+def run(names: List[str], concurrencies: List[int], count: int, url: str = None) -> List[Dict[str, Any]]:
+    '''Run the named benchmarks at each concurrency level.
+
+    Parameters
+    ----------
+
+    :``concurrencies``: numbers of concurrent operations to run each at
+    :``count``:         operations per benchmark run
+    :``names``:         keys of BENCHMARKS to run
+    :``url``:           etcd to benchmark against (default: a new FakeEtcd)
+
+    Return Value(s)
+    ---------------
+
+    Summaries (see summarize) in the order run.
+
+    '''
+
+    fake = None
+
+    if url is None:
+        fake = FakeEtcd()
+        url = yield from fake.start()
+
+    summaries = []
+
+    try:
+        for name in names:
+            for concurrency in concurrencies:
+                client = AsyncEtcdClient(url, connection_limit = max(concurrencies))
+
+                try:
+                    samples, elapsed = yield from BENCHMARKS[name](client, count, concurrency)
+                finally:
+                    if fake is None:
+                        yield from client.delete(PREFIX, recursive = True)
+
+                    yield from client.close()
+
+                summaries.append(summarize(name, concurrency, samples, elapsed))
+
+                logger.info('%s', summaries[-1])
+    finally:
+        if fake is not None:
+            yield from fake.stop()
+
+    return summaries
+
+
+def main(arguments: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(prog = 'python -m test_petcd.benchmark', description = 'Benchmark AsyncEtcdClient.')
+    parser.add_argument('benchmarks', nargs = '*', metavar = 'benchmark', help = 'benchmarks to run: {0} (default: all)'.format(', '.join(sorted(BENCHMARKS.keys()))))
+    parser.add_argument('--concurrency', nargs = '+', type = int, default = [ 1, 10, 100, ], help = 'concurrency levels (default: 1 10 100)')
+    parser.add_argument('--requests', type = int, default = 2000, help = 'operations per run (default: 2000)')
+    parser.add_argument('--url', help = 'etcd to benchmark against (default: an in-process fake)')
+
+    arguments = parser.parse_args(arguments)
+
+    for name in arguments.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error('unknown benchmark: {0}'.format(name))
+
+    loop = asyncio.get_event_loop()
+    summaries = loop.run_until_complete(run(arguments.benchmarks or sorted(BENCHMARKS.keys()), arguments.concurrency, arguments.requests, arguments.url))
+
+    print('{0:<14} {1:>11} {2:>10} {3:>12} {4:>10} {5:>10}'.format('benchmark', 'concurrency', 'operations', 'ops/s', 'p50 (ms)', 'p99 (ms)'))
+
+    for summary in summaries:
+        print('{benchmark:<14} {concurrency:>11} {operations:>10} {throughput:>12.1f} {0:>10.2f} {1:>10.2f}'.format(summary['p50'] * 1000, summary['p99'] * 1000, **summary))
+
+
+if __name__ == '__main__':
+    main()
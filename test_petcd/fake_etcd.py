@@ -0,0 +1,410 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import collections
+import json
+import logging
+import time
+import typing  # flake8: noqa (use mypy typing)
+
+from aiohttp import web
+from typing import Any
+from typing import Dict
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+
+class FakeEtcd(object):
+    '''In-process stand-in for an etcd v2 server.
+
+    Implements enough of the v2 keys API for the client: get (recursive,
+    sorted, wait with waitIndex and a 1000 event history), set (ttl, refresh,
+    dir, prevExist, prevIndex, prevValue), create in-order keys (POST),
+    delete (recursive, dir, prevIndex, prevValue) and TTL expiry, plus
+    /v2/members.  Responses carry X-Etcd-Index and X-Raft-Term.  A follower
+    (one given a ``leader``) redirects writes and quorum reads there.
+
+    Usage::
+
+        fake = FakeEtcd()
+        url = yield from fake.start()
+
+        client = AsyncEtcdClient(url)
+
+        ...
+
+        yield from fake.stop()
+
+    Properties
+    ----------
+
+    * ``failures``
+    * ``index``
+    * ``latency``
+    * ``leader``
+    * ``losses``
+    * ``requests``
+    * ``transit``
+    * ``url``
+
+    '''
+
+    HISTORY = 1000
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, term: int = 1, history: int = HISTORY) -> None:
+        '''Create FakeEtcd.
+
+        Parameters
+        ----------
+
+        :``history``: events kept for waits from an index (waitIndex)
+        :``host``:    address to listen on
+        :``port``:    port to listen on (0 for any free port)
+        :``term``:    raft term reported in responses
+
+        '''
+
+        self._events = collections.deque(maxlen = history)  # type: Deque[Tuple[int, Dict[str, Any]]]
+        self._host = host
+        self._port = port
+        self._root = { 'key': '/', 'dir': True, 'nodes': {}, 'createdIndex': 0, 'modifiedIndex': 0, }
+        self._runner = None  # type: web.AppRunner
+        self._waiters = []  # type: List[Tuple[str, bool, asyncio.Future]]
+
+        self.failures = 0  # keys requests to answer with a server error (i.e. a raft hiccup)
+        self.index = 1
+        self.latency = 0.0  # seconds each keys request is delayed (i.e. a slow disk)
+        self.leader = None  # type: str  # URL writes are redirected to (None: this is the leader)
+        self.losses = 0  # writes to apply but answer with a server error (i.e. a leader lost before replying)
+        self.members = []  # type: List[Dict[str, Any]]
+        self.requests = 0
+        self.term = term
+        self.transit = 0.0  # seconds each read's response is delayed after the state was read (i.e. a slow network)
+        self.url = None  # type: str
+
+    @asyncio.coroutine
+    def start(self) -> str:
+        '''Start serving; returns the URL for clients (i.e. http://.../v2).'''
+
+        application = web.Application()
+        application.router.add_route('*', '/v2/keys', self.keys)
+        application.router.add_route('*', '/v2/keys/{key:.*}', self.keys)
+        application.router.add_route('GET', '/v2/members', self.list_members)
+
+        self._runner = web.AppRunner(application, access_log = None)
+        yield from self._runner.setup()
+
+        site = web.TCPSite(self._runner, self._host, self._port)
+        yield from site.start()
+
+        port = self._runner.addresses[0][1]
+
+        self.url = 'http://{0}:{1}/v2'.format(self._host, port)
+
+        if not self.members:
+            self.members = [ { 'id': '1', 'name': 'fake', 'peerURLs': [], 'clientURLs': [ self.url[:-3], ], }, ]
+
+        logger.info('fake etcd listening on %s', self.url)
+
+        return self.url
+
+    @asyncio.coroutine
+    def stop(self) -> None:
+        '''Stop serving; pending watches are cancelled.'''
+
+        for _, _, future in self._waiters:
+            future.cancel()
+
+        yield from self._runner.cleanup()
+
+    @asyncio.coroutine
+    def list_members(self, request: web.Request) -> web.Response:
+        return web.Response(text = json.dumps({ 'members': self.members, }), content_type = 'application/json')
+
+    @asyncio.coroutine
+    def keys(self, request: web.Request) -> web.Response:
+        self.requests += 1
+
+        key = '/' + request.match_info.get('key', '').strip('/')
+
+        arguments = dict(request.query)
+        if request.method in ( 'PUT', 'POST', ):
+            arguments.update(dict(( yield from request.post() )))
+
+        if self.leader is not None and ( request.method != 'GET' or arguments.get('quorum') == 'true' ):
+            return web.Response(status = 307, headers = dict(self._headers(), Location = self.leader + request.path_qs[len('/v2'):]))
+
+        if self.latency:
+            yield from asyncio.sleep(self.latency)
+
+        if self.failures:
+            self.failures -= 1
+
+            return self._error(300, 'Raft Internal Error', '', 500)
+
+        self._expire()
+
+        if request.method == 'GET':
+            if arguments.get('wait') == 'true':
+                return ( yield from self._wait(key, arguments) )
+
+            response = self._get(key, arguments)
+
+            if self.transit:
+                yield from asyncio.sleep(self.transit)
+
+            return response
+
+        if request.method in ( 'PUT', 'POST', ):
+            response = self._set(key, arguments, request.method == 'POST')
+
+            if self.losses and response.status < 300:
+                self.losses -= 1
+
+                return self._error(300, 'Raft Internal Error', '', 500)
+
+            return response
+
+        if request.method == 'DELETE':
+            return self._delete(key, arguments)
+
+        return self._error(405, 'Method not allowed', request.method, 405)
+
+    def _get(self, key: str, arguments: Dict[str, str]) -> web.Response:
+        node = self._find(key)
+
+        if node is None:
+            return self._error(100, 'Key not found', key, 404)
+
+        return self._respond({ 'action': 'get', 'node': self._render(node, arguments.get('recursive') == 'true', arguments.get('sorted') == 'true'), })
+
+    @asyncio.coroutine
+    def _wait(self, key: str, arguments: Dict[str, str]) -> web.Response:
+        recursive = arguments.get('recursive') == 'true'
+
+        if 'waitIndex' in arguments:
+            index = int(arguments['waitIndex'])
+
+            if self._events and index < self._events[0][0] and self.index - index >= self._events.maxlen:
+                return self._error(401, 'The event in requested index is outdated and cleared', 'the requested history has been cleared [{0}/{1}]'.format(self._events[0][0], index), 400)
+
+            for event_index, event in self._events:
+                if event_index >= index and _matches(key, recursive, event['node']['key']):
+                    return self._respond(event)
+
+        future = asyncio.Future()
+        waiter = ( key, recursive, future, )
+
+        self._waiters.append(waiter)
+
+        try:
+            return self._respond(( yield from future ))
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _set(self, key: str, arguments: Dict[str, str], ordered: bool) -> web.Response:
+        if ordered:
+            key = key.rstrip('/') + '/{0:020d}'.format(self.index + 1)
+
+        existing = self._find(key)
+
+        if arguments.get('prevExist') == 'false' and existing is not None:
+            return self._error(105, 'Key already exists', key, 412)
+
+        if ( arguments.get('prevExist') == 'true' or 'prevIndex' in arguments or 'prevValue' in arguments ) and existing is None:
+            return self._error(100, 'Key not found', key, 404)
+
+        failure = self._compare(existing, arguments)
+        if failure is not None:
+            return failure
+
+        if existing is not None and existing.get('dir') and not ( arguments.get('dir') == 'true' and arguments.get('prevExist') == 'true' ):
+            return self._error(102, 'Not a file', key, 403)
+
+        self.index += 1
+
+        parent_key, _, name = key.rpartition('/')
+        parent = self._find(parent_key or '/', create = True)
+
+        previous = None if existing is None else self._render(existing, False, False)
+
+        if arguments.get('refresh') == 'true' or ( existing is not None and existing.get('dir') ):
+            node = existing
+            node['modifiedIndex'] = self.index
+        else:
+            node = { 'key': key, 'createdIndex': self.index, 'modifiedIndex': self.index, }
+
+            if existing is not None:
+                node['createdIndex'] = existing['createdIndex']
+
+            if arguments.get('dir') == 'true':
+                node['dir'] = True
+                node['nodes'] = existing['nodes'] if existing is not None and existing.get('dir') else {}
+            else:
+                node['value'] = arguments.get('value', '')
+
+        node.pop('expires', None)
+        node.pop('ttl', None)
+
+        if arguments.get('ttl'):
+            node['ttl'] = int(arguments['ttl'])
+            node['expires'] = time.time() + node['ttl']
+
+        parent['nodes'][name] = node
+
+        if ordered or existing is None:
+            action = 'create'
+        elif 'prevIndex' in arguments or 'prevValue' in arguments:
+            action = 'compareAndSwap'
+        elif arguments.get('prevExist') == 'true':
+            action = 'update'
+        else:
+            action = 'set'
+
+        return self._respond(self._event(action, self._render(node, False, False), previous), 201 if action == 'create' else 200)
+
+    def _delete(self, key: str, arguments: Dict[str, str]) -> web.Response:
+        existing = self._find(key)
+
+        if existing is None:
+            return self._error(100, 'Key not found', key, 404)
+
+        failure = self._compare(existing, arguments)
+        if failure is not None:
+            return failure
+
+        if existing.get('dir'):
+            if arguments.get('dir') != 'true' and arguments.get('recursive') != 'true':
+                return self._error(102, 'Not a file', key, 403)
+
+            if existing['nodes'] and arguments.get('recursive') != 'true':
+                return self._error(108, 'Directory not empty', key, 403)
+
+        self.index += 1
+
+        action = 'compareAndDelete' if 'prevIndex' in arguments or 'prevValue' in arguments else 'delete'
+
+        return self._respond(self._remove(existing, action))
+
+    def _compare(self, existing: Union[Dict[str, Any], None], arguments: Dict[str, str]) -> Union[web.Response, None]:
+        if existing is None:
+            return None
+
+        if 'prevIndex' in arguments and str(existing['modifiedIndex']) != arguments['prevIndex']:
+            return self._error(101, 'Compare failed', '[{0} != {1}]'.format(arguments['prevIndex'], existing['modifiedIndex']), 412)
+
+        if 'prevValue' in arguments and existing.get('value') != arguments['prevValue']:
+            return self._error(101, 'Compare failed', '[{0} != {1}]'.format(arguments['prevValue'], existing.get('value')), 412)
+
+        return None
+
+    def _remove(self, existing: Dict[str, Any], action: str) -> Dict[str, Any]:
+        parent_key, _, name = existing['key'].rpartition('/')
+        del self._find(parent_key or '/')['nodes'][name]
+
+        node = { 'key': existing['key'], 'createdIndex': existing['createdIndex'], 'modifiedIndex': self.index, }
+        if existing.get('dir'):
+            node['dir'] = True
+
+        return self._event(action, node, self._render(existing, False, False))
+
+    def _expire(self) -> None:
+        now = time.time()
+
+        expired = []
+
+        def visit(node):
+            for child in list(node.get('nodes', {}).values()):
+                if child.get('expires', now + 1) <= now:
+                    expired.append(child)
+                elif child.get('dir'):
+                    visit(child)
+
+        visit(self._root)
+
+        for node in expired:
+            self.index += 1
+            self._remove(node, 'expire')
+
+    def _event(self, action: str, node: Dict[str, Any], previous: Union[Dict[str, Any], None]) -> Dict[str, Any]:
+        event = { 'action': action, 'node': node, }
+        if previous is not None:
+            event['prevNode'] = previous
+
+        self._events.append(( self.index, event, ))
+
+        for waiter in list(self._waiters):
+            key, recursive, future = waiter
+
+            if _matches(key, recursive, node['key']) and not future.done():
+                future.set_result(event)
+                self._waiters.remove(waiter)
+
+        return event
+
+    def _find(self, key: str, create: bool = False) -> Union[Dict[str, Any], None]:
+        node = self._root
+        path = ''
+
+        for name in [ _ for _ in key.split('/') if _ ]:
+            path += '/' + name
+
+            if not node.get('dir'):
+                return None
+
+            child = node['nodes'].get(name)
+
+            if child is None:
+                if not create:
+                    return None
+
+                child = node['nodes'][name] = { 'key': path, 'dir': True, 'nodes': {}, 'createdIndex': self.index, 'modifiedIndex': self.index, }
+
+            node = child
+
+        return node
+
+    def _render(self, node: Dict[str, Any], recursive: bool, sort: bool, depth: int = 0) -> Dict[str, Any]:
+        rendered = { key: value for key, value in node.items() if key not in ( 'nodes', 'expires', ) }
+
+        if 'expires' in node:
+            rendered['ttl'] = max(int(round(node['expires'] - time.time())), 0)
+            rendered['expiration'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(node['expires']))
+
+        if node.get('dir') and ( depth == 0 or recursive ):
+            children = list(node['nodes'].values())
+
+            if sort:
+                children.sort(key = lambda _: _['key'])
+
+            if children:
+                rendered['nodes'] = [ self._render(_, recursive, sort, depth + 1) for _ in children ]
+
+        return rendered
+
+    def _headers(self) -> Dict[str, str]:
+        return { 'X-Etcd-Index': str(self.index), 'X-Raft-Term': str(self.term), }
+
+    def _error(self, code: int, message: str, cause: str, status: int) -> web.Response:
+        return web.Response(status = status, text = json.dumps({ 'errorCode': code, 'message': message, 'cause': cause, 'index': self.index, }), headers = self._headers(), content_type = 'application/json')
+
+    def _respond(self, body: Dict[str, Any], status: int = 200) -> web.Response:
+        return web.Response(status = status, text = json.dumps(body), headers = self._headers(), content_type = 'application/json')
+
+
+def _matches(key: str, recursive: bool, other: str) -> bool:
+    return other == key or ( recursive and ( key == '/' or other.startswith(key.rstrip('/') + '/') ) )
@@ -12,9 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import aiohttp
 import asyncio
+import io
 import logging
 import os
+import threading
 import typing  # flake8: noqa (use mypy typing)
 import unittest
 
@@ -24,6 +27,16 @@ from torment import fixtures
 from torment import helpers
 
 from petcd import AsyncEtcdClient
+from petcd import BACKGROUND
+from petcd import codec
+from petcd import Lock
+from petcd import Mirror
+from petcd import SyncEtcdClient
+from petcd.exceptions import EtcdError
+from petcd.streaming import NodeStream
+from petcd.ttl import TTLRefresher
+from petcd.watchers import WatchMultiplexer
+from test_petcd.fake_etcd import FakeEtcd
 
 logger = logging.getLogger(__name__)
 
@@ -78,6 +91,1193 @@ class AsyncEtcdClientGetFixture(fixtures.Fixture):
         self.mocked_request.assert_called_once_with(method = 'GET', **self.expected)
 
 
+class AsyncEtcdClientWriteFixture(fixtures.Fixture):
+    '''Check the request a write (``operation``, i.e. 'set') sends.
+
+    ``expected`` is the keyword arguments of the request (including its
+    HTTP method).
+
+    '''
+
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.{0.operation}(**{0.parameters[kwargs]})'.format(self)
+
+    def setup(self) -> None:
+        _ = unittest.mock.patch.object(AsyncEtcdClient, '_request', unittest.mock.MagicMock())
+        self.mocked_request = _.start()
+        self.context.addCleanup(_.stop)
+
+        self.client = AsyncEtcdClient('http://127.0.0.1:2379/v2', retries = 0)
+
+    def run(self) -> None:
+        self.context.loop.run_until_complete(getattr(self.client, self.operation)(**self.parameters['kwargs']))
+
+    def check(self) -> None:
+        self.mocked_request.assert_called_once_with(**self.expected)
+
+
+class FakeEtcdFixture(fixtures.Fixture):
+    '''Run ``scenario`` with a client of in-process FakeEtcd servers.
+
+    ``members`` servers (keeping ``history`` events) are started and a
+    client (created with ``client_kwargs``) is given all of their URLs.  ``result`` (the value
+    of ``scenario``) is checked against ``expected``; a scenario that takes
+    longer than ``timeout`` seconds fails.
+
+    '''
+
+    client_kwargs = {}  # type: Dict[str, Any]
+    history = FakeEtcd.HISTORY
+    members = 1
+    timeout = 10.0
+
+    def setup(self) -> None:
+        loop = self.context.loop
+
+        self.servers = [ FakeEtcd('127.0.0.1', history = self.history) for _ in range(self.members) ]
+        urls = [ loop.run_until_complete(_.start()) for _ in self.servers ]
+
+        self.client = AsyncEtcdClient(urls, loop = loop, **self.client_kwargs)
+
+        self.context.addCleanup(self.teardown)
+
+    def run(self) -> None:
+        self.result = self.context.loop.run_until_complete(asyncio.wait_for(self.scenario(), self.timeout))
+
+    def check(self) -> None:
+        self.context.assertEqual(self.expected, self.result)
+
+    def teardown(self) -> None:
+        loop = self.context.loop
+
+        loop.run_until_complete(self.client.close())
+
+        for server in self.servers:
+            loop.run_until_complete(server.stop())
+
+
+class AsyncEtcdClientLongPollFixture(FakeEtcdFixture):
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.get(wait = True) outlasting a {0.sock_read}s read timeout'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        session = self.client._get_session()
+        total = session.timeout.total
+
+        # Only a short read timeout can be waited out in a test.
+        self.client._session = aiohttp.ClientSession(timeout = aiohttp.ClientTimeout(sock_read = self.sock_read))
+        yield from session.close()
+
+        waiter = self.client.loop.create_task(self.client.get('/foo', wait = True))
+
+        yield from asyncio.sleep(self.sock_read * 3)
+        yield from self.client.set('/foo', 'bar')
+
+        event = yield from waiter
+
+        return {
+            'failures': [ _.failures for _ in self.client.cluster.members ],
+            'total': total,
+            'value': event.node.value,
+        }
+
+
+class AsyncEtcdClientReadCacheFixture(FakeEtcdFixture):
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.get_value({0.key}) cached under {0.client_kwargs[cache_prefix]}'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        yield from self.client.set(self.key, '1')
+
+        values = [ ( yield from self.client.get_value(self.key) ), ]
+
+        yield from asyncio.sleep(0.05)  # the cache's watch starts
+
+        values.append(( yield from self.client.get_value(self.key) ))
+
+        requests = self.servers[0].requests
+        values.append(( yield from self.client.get_value(self.key) ))
+        cached = self.servers[0].requests - requests
+
+        other = AsyncEtcdClient(self.servers[0].url, loop = self.client.loop)
+        yield from other.set(self.key, '2')
+        yield from other.close()
+
+        yield from asyncio.sleep(0.05)  # the event reaches the cache
+
+        values.append(( yield from self.client.get_value(self.key) ))
+
+        return { 'requests': cached, 'values': values, }
+
+
+class WatchMultiplexerFixture(FakeEtcdFixture):
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.watch() of {0.keys} shares polls'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        index = ( yield from self.client.set('/seed', '') ).etcd_index + 1
+
+        watches = [ self.client.loop.create_task(self.client.watch(key, index = index, recursive = recursive)) for key, recursive in self.keys ]
+
+        yield from asyncio.sleep(0.05)
+
+        prefixes = self.client._watchers.prefixes
+
+        for key, _ in self.keys:
+            yield from self.client.set(key.rstrip('/') + '/x' if key == '/' else key, key)
+
+        events = yield from asyncio.gather(*watches)
+
+        return { 'keys': [ _.node.key for _ in events ], 'prefixes': prefixes, }
+
+
+class AsyncEtcdClientDiscoveryFixture(FakeEtcdFixture):
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient(discovery_interval = {0.client_kwargs[discovery_interval]}) of members advertising {0.advertised}'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        seed = self.servers[0].url
+
+        self.servers[0].members = [ { 'id': '1', 'name': 'fake', 'peerURLs': [], 'clientURLs': self.advertised, }, ]
+
+        yield from self.client.set('/foo', 'bar')
+        yield from asyncio.sleep(0.05)  # discovery (if enabled) finishes
+
+        return {
+            'nodes': sorted([ 'seed' if _ == seed else _ for _ in self.client.nodes ]),
+            'url': 'seed' if self.client.url == seed else self.client.url,
+            'value': ( yield from self.client.get_value('/foo') ),
+        }
+
+
+class AsyncEtcdClientListFixture(FakeEtcdFixture):
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.ls(/d) of {0.count} values of {0.size} bytes'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        for index in range(self.count):
+            yield from self.client.set('/d/{0}'.format(index), str(index % 10) * self.size)
+
+        stream = self.client.iter_nodes('/d', sorted = True)
+        first = yield from stream.__anext__()
+        stream.close()
+
+        return {
+            'first': first.key,
+            'in_flight': self.client.admission.in_flight,
+            'keys': ( yield from self.client.ls('/d', sorted = True) ),
+            'sizes': [ len(_) for _ in ( yield from self.client.get_list('/d', sorted = True) ) ],
+        }
+
+
+class NodeStreamFixture(fixtures.Fixture):
+    '''Iterate a NodeStream over a response whose body arrives as ``chunks``.
+
+    ``result`` is the streamed keys (or the ValueError raised) and
+    whether the response was released and ``on_close`` called.
+
+    '''
+
+    def setup(self) -> None:
+        self.closed = 0
+        self.response = unittest.mock.MagicMock(headers = { 'X-Etcd-Index': '7', })
+
+        chunks = list(self.chunks)
+
+        @asyncio.coroutine
+        def read(size):
+            return chunks.pop(0) if chunks else b''
+
+        @asyncio.coroutine
+        def start():
+            return self.response
+
+        def on_close():
+            self.closed += 1
+
+        self.response.content.read = read
+        self.stream = NodeStream(start, on_close = on_close, buffer_size = self.buffer_size)
+
+    def run(self) -> None:
+        keys = []
+
+        @asyncio.coroutine
+        def iterate():
+            while True:
+                keys.append(( yield from self.stream.__anext__() ).key)
+
+        try:
+            self.context.loop.run_until_complete(iterate())
+        except StopAsyncIteration:
+            self.result = { 'keys': keys, }
+        except ValueError:
+            self.result = { 'error': 'ValueError', }
+
+        self.result.update(closed = self.closed, released = self.response.release.call_count)
+
+    def check(self) -> None:
+        self.context.assertEqual(self.expected, self.result)
+
+
+class AsyncEtcdClientManyFixture(FakeEtcdFixture):
+    '''Run ``operation`` (i.e. 'set_many') over ``arguments`` after setting ``existing``.
+
+    ``result`` is each result's key (or its exception's name), the most
+    single operations in flight at once and the keys under /k afterwards.
+
+    '''
+
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.{0.operation}({0.arguments}, **{0.kwargs})'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        for key, value in self.existing:
+            yield from self.client.set(key, value)
+
+        single = getattr(self.client, self.operation[:-len('_many')])
+        in_flight = [ 0, 0, ]  # now, most
+
+        @asyncio.coroutine
+        def counted(*args, **kwargs):
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+
+            try:
+                return ( yield from single(*args, **kwargs) )
+            finally:
+                in_flight[0] -= 1
+
+        setattr(self.client, single.__name__, counted)
+        self.servers[0].latency = 0.01
+
+        try:
+            results = yield from getattr(self.client, self.operation)(self.arguments, **self.kwargs)
+        except EtcdError as error:
+            results = type(error).__name__
+        else:
+            results = [ type(_).__name__ if isinstance(_, Exception) else _.node.key for _ in results ]
+
+        self.servers[0].latency = 0.0
+
+        return {
+            'keys': ( yield from self.client.ls('/k', sorted = True) ),
+            'most': in_flight[1],
+            'results': results,
+        }
+
+
+class AsyncEtcdClientResultFixture(FakeEtcdFixture):
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient results of setting {0.value} twice and listing its directory'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        yield from self.client.set('/d/a', 'first')
+        result = yield from self.client.set('/d/a', self.value)
+        yield from self.client.set('/d/b', 'other')
+
+        listing = yield from self.client.get('/d', sorted = True)
+
+        return {
+            'action': result.action,
+            'children': [ ( _.key, _.value, _.dir, ) for _ in listing.node.nodes ],
+            'dir': listing.node.dir,
+            'etcd_index': listing.etcd_index == self.servers[0].index,
+            'json': result.node.json,
+            'modified_index': result.node.modified_index == result.etcd_index,
+            'prev_value': result.prev_node.value,
+        }
+
+
+class AsyncEtcdClientCoalesceFixture(FakeEtcdFixture):
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.get(**_) for _ in {0.reads} at once (cancelling the first: {0.cancel_first})'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        yield from self.client.set('/foo', 'bar')
+
+        self.servers[0].latency = 0.1
+        requests = self.servers[0].requests
+
+        tasks = [ self.client.loop.create_task(self.client.get('/foo', **_)) for _ in self.reads ]
+
+        if self.cancel_first:
+            yield from asyncio.sleep(0.02)  # the first read reaches etcd
+            tasks[0].cancel()
+
+        results = yield from asyncio.gather(*tasks, return_exceptions = True)
+
+        return {
+            'requests': self.servers[0].requests - requests,
+            'values': [ 'cancelled' if isinstance(_, asyncio.CancelledError) else _.node.value for _ in results ],
+        }
+
+
+class AsyncEtcdClientRetryFixture(FakeEtcdFixture):
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.set (comparing: {0.compare}) through {0.failures} server errors'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        current = yield from self.client.set('/foo', 'a')
+
+        kwargs = { 'prev_index': current.node.modified_index, } if self.compare else {}
+
+        self.servers[0].failures = self.failures
+        requests = self.servers[0].requests
+
+        try:
+            result = ( yield from self.client.set('/foo', 'b', **kwargs) ).node.value
+        except EtcdError as error:
+            result = error.error_code
+
+        return { 'requests': self.servers[0].requests - requests, 'result': result, }
+
+
+class AsyncEtcdClientLeaderFixture(FakeEtcdFixture):
+    '''Write through a client that was only given a follower's URL.'''
+
+    members = 2
+
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.set {0.writes} times through a follower'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        follower, leader = self.servers
+        follower.leader = leader.url
+
+        yield from self.client.close()
+        self.client = AsyncEtcdClient(follower.url, loop = self.context.loop)
+
+        for value in range(self.writes):
+            yield from self.client.set('/foo', str(value))
+
+        known = self.client.cluster.leader
+
+        leader.term += 1  # an election (that the same member won)
+
+        value = ( yield from self.client.get('/foo', quorum = True) ).node.value
+
+        return {
+            'follower': follower.requests,
+            'forgotten': self.client.cluster.leader is None,
+            'known': None if known is None else known.url == leader.url,
+            'leader': leader.requests,
+            'value': value,
+        }
+
+
+class AsyncEtcdClientMetricsFixture(FakeEtcdFixture):
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.metrics after a set, a hit, a miss and a get through {0.failures} server errors'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        yield from self.client.set('/foo', 'bar')
+        yield from self.client.get('/foo')
+
+        try:
+            yield from self.client.get('/missing')
+        except EtcdError:
+            pass
+
+        self.servers[0].failures = self.failures
+        yield from self.client.get('/foo')
+
+        snapshot = self.client.metrics.snapshot()
+        url = self.servers[0].url
+
+        return {
+            'requests': { ( kind, status, ): _['count'] for ( kind, endpoint, status, ), _ in snapshot['requests'].items() if endpoint == url },
+            'retries': { kind: count for ( kind, endpoint, ), count in snapshot['retries'].items() if endpoint == url },
+        }
+
+
+class SyncEtcdClientFixture(fixtures.Fixture):
+    '''Run ``scenario`` with a SyncEtcdClient of a FakeEtcd.
+
+    The FakeEtcd is served by an event loop in a thread of its own (calls
+    block the calling thread) and the client is created with
+    ``client_kwargs``.  ``result`` (the value of ``scenario``) is checked
+    against ``expected``.
+
+    '''
+
+    client_kwargs = {}  # type: Dict[str, Any]
+
+    def setup(self) -> None:
+        self.server_loop = asyncio.new_event_loop()
+        self.server_thread = threading.Thread(target = self.server_loop.run_forever, daemon = True)
+        self.server_thread.start()
+
+        self.server = FakeEtcd('127.0.0.1')
+        url = asyncio.run_coroutine_threadsafe(self.server.start(), self.server_loop).result()
+
+        self.client = SyncEtcdClient(url, **self.client_kwargs)
+
+        self.context.addCleanup(self.teardown)
+
+    def run(self) -> None:
+        self.result = self.scenario()
+
+    def check(self) -> None:
+        self.context.assertEqual(self.expected, self.result)
+
+    def teardown(self) -> None:
+        self.client.close()
+
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.server_loop).result()
+
+        self.server_loop.call_soon_threadsafe(self.server_loop.stop)
+        self.server_thread.join()
+        self.server_loop.close()
+
+
+class SyncEtcdClientThreadsFixture(SyncEtcdClientFixture):
+    @property
+    def description(self) -> str:
+        return super().description + '.SyncEtcdClient shared by {0.threads} threads'.format(self)
+
+    def scenario(self):
+        def work(index):
+            self.client.set('/t/{0}'.format(index), str(index))
+            values[index] = self.client.get_value('/t/{0}'.format(index))
+
+        values = {}
+        threads = [ threading.Thread(target = work, args = ( _, )) for _ in range(self.threads) ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        @asyncio.coroutine
+        def reentrant():
+            try:
+                self.client.get_value('/t/0')
+            except RuntimeError:
+                return 'RuntimeError'
+
+        return {
+            'keys': [ _.key for _ in self.client.iter_nodes('/t', sorted = True) ],
+            'reentrant': asyncio.run_coroutine_threadsafe(reentrant(), self.client.loop).result(),
+            'values': values,
+        }
+
+
+class WatchResyncFixture(FakeEtcdFixture):
+    '''Watch /r from the index after each event through a resynchronization.
+
+    While the poll is between long-polls, changes beyond etcd's history are
+    made in FakeEtcd directly: the poll falls behind and resynchronizes.
+    With ``stale_read`` a read of /r made before the changes is still in
+    transit when the poll resynchronizes.
+
+    '''
+
+    history = 3
+    stale_read = False
+
+    @property
+    def description(self) -> str:
+        return super().description + '.WatchMultiplexer resynchronizing after {0.changes}'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        server = self.servers[0]
+
+        for key in self.existing:
+            yield from self.client.set(key, '0')
+
+        multiplexer = WatchMultiplexer(self.client, resync_jitter = 0.0)
+
+        waiter = self.client.loop.create_task(multiplexer.watch('/r', index = server.index + 1, recursive = True))
+        yield from asyncio.sleep(0.05)  # the poll is waiting
+
+        if self.stale_read:
+            server.transit = 0.2
+            reader = self.client.loop.create_task(self.client.get('/r', recursive = True, priority = BACKGROUND))
+            yield from asyncio.sleep(0.05)  # the read is in transit
+
+        for method, key, arguments in self.changes:
+            if method == 'PUT':
+                server._set(key, dict(arguments, value = '1'), False)
+            else:
+                server._delete(key, arguments)
+
+        event = yield from waiter
+        start = event.node.modified_index
+
+        events = []
+
+        while event.node.modified_index < server.index:
+            event = yield from multiplexer.watch('/r', index = event.node.modified_index + 1, recursive = True)
+            events.append(( event.action, event.node.key, event.node.dir, event.node.modified_index - start, ))
+
+        # Every event the poll delivered (not only those watched for).
+        delivered = [ ( _.action, _.node.key, _.node.modified_index - start, ) for _ in multiplexer._polls['/r'].history ]
+
+        multiplexer.close()
+
+        if self.stale_read:
+            yield from reader
+
+        return { 'delivered': delivered, 'events': events, }
+
+
+class SyncEtcdClientDumpFixture(SyncEtcdClientFixture):
+    @property
+    def description(self) -> str:
+        return super().description + '.SyncEtcdClient.dump({0.prefix}) and load of {0.keys} and {0.directories}'.format(self)
+
+    def scenario(self):
+        for key in self.keys:
+            self.client.set(key, key)
+
+        for key in self.directories:
+            self.client.mkdir(key)
+
+        file = io.StringIO()
+        dumped = self.client.dump(self.prefix, file)
+
+        self.client.delete(self.prefix, recursive = True)
+
+        file.seek(0)
+        loaded = self.client.load(file)
+
+        return {
+            'dumped': dumped,
+            'keys': [ _.key for _ in self.client.iter_nodes(self.prefix, sorted = True) ],
+            'loaded': loaded,
+            'values': [ self.client.get_value(_) for _ in self.keys ],
+        }
+
+
+class MirrorFixture(FakeEtcdFixture):
+    @property
+    def description(self) -> str:
+        return super().description + '.Mirror(/m) of {0.existing} following {0.changes}'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        for key in self.existing:
+            yield from self.client.set(key, key)
+
+        mirror = Mirror(self.client, '/m')
+        yield from mirror.start()
+
+        loaded = mirror.ls('/m')
+
+        for method, key in self.changes:
+            if method == 'PUT':
+                yield from self.client.set(key, key)
+            else:
+                yield from self.client.delete(key, recursive = True)
+
+        while mirror.etcd_index < self.servers[0].index:
+            yield from asyncio.sleep(0.01)
+
+        mirror.close()
+
+        return {
+            'first': mirror.first('/m/q').key,
+            'loaded': loaded,
+            'ls': mirror.ls('/m'),
+            'scan': [ _.key for _ in mirror.scan('/m') if not _.dir ],
+        }
+
+
+class SyncEtcdClientFirstFixture(SyncEtcdClientFixture):
+    @property
+    def description(self) -> str:
+        return super().description + '.SyncEtcdClient.first(/q) of {0.keys}'.format(self)
+
+    def scenario(self):
+        self.client.mkdir('/q')
+
+        for key in self.keys:
+            self.client.set(key, key)
+
+        node = self.client.first('/q')
+
+        return None if node is None else node.key
+
+
+class TTLRefresherFixture(FakeEtcdFixture):
+    '''Add keys to a TTLRefresher again while they are due, then discard them.
+
+    Refreshes are held (by taking the only admission slot) until a key is
+    waiting for a worker.
+
+    '''
+
+    @property
+    def description(self) -> str:
+        return super().description + '.TTLRefresher re-adding {0.keys} while due'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        for key in self.keys:
+            yield from self.client.set(key, key, ttl = self.ttl)
+
+        refresher = TTLRefresher(self.client, tick = self.tick, slots = self.slots, concurrency = 1)
+
+        yield from self.client.admission.acquire()
+
+        for key in self.keys:
+            refresher.add(key, self.ttl)
+
+        while refresher._due.empty():
+            yield from asyncio.sleep(self.tick)
+
+        for key in self.keys:
+            refresher.add(key, self.ttl)
+
+        self.client.admission.release()
+        yield from asyncio.sleep(self.tick * self.slots)
+
+        for key in self.keys:
+            refresher.discard(key)
+
+        yield from asyncio.sleep(self.tick * self.slots * 2)
+
+        turning = not refresher._tasks[0].done()
+        refresher.close()
+
+        return { 'keys': refresher.keys, 'turning': turning, }
+
+
+class LockFixture(FakeEtcdFixture):
+    '''Hold a Lock while one contender gives up waiting and another waits.'''
+
+    @property
+    def description(self) -> str:
+        return super().description + '.Lock({0.path}) handed off after a cancelled wait'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        holder = Lock(self.client, self.path, ttl = self.ttl)
+        yield from holder.acquire()
+
+        quitter = Lock(self.client, self.path, ttl = self.ttl)
+
+        try:
+            yield from asyncio.wait_for(quitter.acquire(), 0.05)
+        except asyncio.TimeoutError:
+            pass
+
+        contenders = len(( yield from self.client.ls(self.path) ))
+
+        waiter = Lock(self.client, self.path, ttl = self.ttl)
+        task = self.client.loop.create_task(waiter.acquire())
+
+        yield from asyncio.sleep(0.05)
+        waiting = not task.done()
+
+        yield from holder.release()
+        yield from task
+
+        locked = waiter.locked
+        yield from waiter.release()
+
+        return {
+            'contenders': contenders,
+            'locked': locked,
+            'remaining': len(( yield from self.client.ls(self.path) )),
+            'waiting': waiting,
+        }
+
+
+class SyncEtcdClientAppendFixture(SyncEtcdClientFixture):
+    @property
+    def description(self) -> str:
+        return super().description + '.SyncEtcdClient.append({0.key}) of {0.values}'.format(self)
+
+    def scenario(self):
+        keys = [ self.client.append(self.key, _).node.key for _ in self.values ]
+
+        return {
+            'ordered': keys == sorted(keys),
+            'values': self.client.get_list(self.key, sorted = True),
+        }
+
+
+class AsyncEtcdClientUpdateFixture(FakeEtcdFixture):
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.update of /counter with {0.failures} failed writes and {0.losses} lost responses'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        yield from self.client.set('/counter', '0')
+
+        calls = []
+
+        def increment(value):
+            calls.append(value)
+
+            self.servers[0].failures = self.failures  # the write, not the read
+            self.servers[0].losses = self.losses
+
+            return str(int(value) + 1)
+
+        error = None
+
+        try:
+            yield from self.client.update('/counter', increment)
+        except EtcdError as e:
+            error = e.error_code
+
+        return {
+            'calls': calls,
+            'error': error,
+            'value': ( yield from self.client.get_value('/counter') ),
+        }
+
+
+class SyncEtcdClientUpdateFixture(SyncEtcdClientFixture):
+    @property
+    def description(self) -> str:
+        return super().description + '.SyncEtcdClient.update of /counter by {0.threads} threads'.format(self)
+
+    def scenario(self):
+        threads = [ threading.Thread(target = self.client.update, args = ( '/counter', lambda value: str(int(value or 0) + 1), )) for _ in range(self.threads) ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        return self.client.get_value('/counter')
+
+
+class AsyncEtcdClientLagFixture(FakeEtcdFixture):
+    '''Read (with read_your_writes) from a member that lags the client.
+
+    Writes are redirected to the second member, which is ahead of the
+    first: the first member's answer is discarded and the read sent again.
+
+    '''
+
+    members = 2
+
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.get_value from a member {0.lag} writes behind'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        follower, leader = self.servers
+        follower.leader = leader.url
+
+        follower._set('/foo', { 'value': 'a', }, False)
+
+        for value in range(self.lag):
+            leader._set('/bar', { 'value': str(value), }, False)
+
+        yield from self.client.set('/foo', 'b')
+
+        requests = follower.requests, leader.requests
+        value = yield from self.client.get_value('/foo')
+
+        return {
+            'follower': follower.requests - requests[0],
+            'leader': leader.requests - requests[1],
+            'value': value,
+        }
+
+
+class JSONCodecFixture(FakeEtcdFixture):
+    '''Use the ``backend`` codec for responses and get_json's values.'''
+
+    @property
+    def description(self) -> str:
+        return super().description + '.JSONCodec({0.backend!r}) of {0.value}'.format(self)
+
+    def setup(self) -> None:
+        super().setup()
+
+        self.context.addCleanup(codec.set_codec, codec.get_codec())
+
+        codec.set_codec(self.backend)
+
+    @asyncio.coroutine
+    def scenario(self):
+        yield from self.client.set('/j', codec.dumps(self.value))
+
+        return {
+            'backend': codec.get_codec().backend,
+            'dumps': codec.dumps(self.value, sort_keys = True),
+            'key': ( yield from self.client.get('/j') ).node.key,
+            'value': ( yield from self.client.get_json('/j') ),
+        }
+
+
+class AsyncEtcdClientHedgeFixture(FakeEtcdFixture):
+    '''Read from two members after the preferred one slows down by ``slow``.
+
+    Both members hold /foo (FakeEtcd members do not replicate) and enough
+    fast reads are made first for the HedgePolicy to pick a delay.
+
+    '''
+
+    members = 2
+
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.get_value with a member {0.slow}s slow'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        for server in self.servers:
+            server._set('/foo', { 'value': 'bar', }, False)
+
+        for _ in range(20):
+            yield from self.client.get_value('/foo')
+
+        preferred = self.client.cluster.candidates()[0].url
+        slow, fast = sorted(self.servers, key = lambda _: _.url != preferred)
+        slow.latency = self.slow
+
+        start = self.context.loop.time()
+        value = yield from self.client.get_value('/foo')
+        elapsed = self.context.loop.time() - start
+
+        return {
+            'hedges': { endpoint == fast.url: count for ( kind, endpoint, ), count in self.client.metrics.snapshot()['hedges'].items() },
+            'slow': elapsed >= self.slow,
+            'value': value,
+        }
+
+
+class AsyncEtcdClientTimeoutFixture(FakeEtcdFixture):
+    '''Call ``operation`` with ``arguments`` and a timeout of 0.1s.
+
+    Every request to FakeEtcd takes ``latency`` seconds.  The result is
+    the name of the exception raised or, for bulk operations, of each
+    result's type; ``prompt`` is whether the call returned well before the
+    latency ran out.
+
+    '''
+
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.{0.operation}(timeout = 0.1) with {0.latency}s latency'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        yield from self.client.set('/t/a', 'a')
+
+        self.servers[0].latency = self.latency
+
+        start = self.context.loop.time()
+
+        try:
+            result = yield from getattr(self.client, self.operation)(*self.arguments, timeout = 0.1)
+        except asyncio.TimeoutError as error:
+            result = type(error).__name__
+
+        if isinstance(result, list):
+            result = [ type(_).__name__ for _ in result ]
+
+        return {
+            'prompt': self.context.loop.time() - start < 0.1 + self.latency / 2,
+            'result': result,
+        }
+
+
+class EventStreamFixture(FakeEtcdFixture):
+    '''Read the events of ``writes`` to /e through a consumer that lags.
+
+    The first event is read, then the stream reads ahead (into a buffer of
+    ``size`` events) while the consumer sleeps before reading the rest.
+
+    '''
+
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.iter_events(size = {0.size}, overflow = {0.overflow!r})'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        index = ( yield from self.client.set('/e/start', '') ).node.modified_index
+
+        for key, value in self.writes:
+            yield from self.client.set('/e/' + key, value)
+
+        yield from self.client.set('/e/end', '')
+
+        stream = self.client.iter_events('/e', index = index, size = self.size, overflow = self.overflow, recursive = True)
+
+        try:
+            events = [ ( yield from stream.__anext__() ), ]
+
+            yield from asyncio.sleep(0.1)
+
+            while events[-1].node.key != '/e/end':
+                events.append(( yield from stream.__anext__() ))
+        finally:
+            stream.close()
+
+        return {
+            'coalesced': stream.coalesced,
+            'events': [ ( _.node.key, _.node.value, ) for _ in events ],
+        }
+
+
+class AdmissionControlFixture(FakeEtcdFixture):
+    '''Read ``reads`` (keys and priorities) through the client's admission.
+
+    The first read is sent before the others are made; every request to
+    FakeEtcd then takes 0.1s.  The result is the order the reads finished.
+
+    '''
+
+    @property
+    def description(self) -> str:
+        return super().description + '.AdmissionControl of {0.reads}'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        for key, _ in self.reads:
+            yield from self.client.set(key, key)
+
+        self.servers[0].latency = 0.1
+
+        finished = []
+
+        @asyncio.coroutine
+        def read(key, priority):
+            finished.append(( yield from self.client.get_value(key, priority = priority) ))
+
+        first = self.context.loop.create_task(read(*self.reads[0]))
+        yield from asyncio.sleep(0.01)
+
+        yield from asyncio.gather(first, *[ read(*_) for _ in self.reads[1:] ])
+
+        return finished
+
+
+class LockRaceFixture(FakeEtcdFixture):
+    '''Two contenders on one client whose listings are in transit together.
+
+    The second contender appends its key while the first one's listing is
+    on its way back, so its own listing must be sent after its append.
+
+    '''
+
+    @property
+    def description(self) -> str:
+        return super().description + '.Lock({0.path}) raced by two contenders on one client'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        self.servers[0].transit = 0.1
+
+        first, second = Lock(self.client, self.path), Lock(self.client, self.path)
+
+        task = self.client.loop.create_task(first.acquire())
+        yield from asyncio.sleep(0.03)  # the first listing is in transit
+
+        waiter = self.client.loop.create_task(second.acquire())
+        yield from task
+
+        yield from asyncio.sleep(0.05)
+        waiting = not waiter.done()
+
+        yield from first.release()
+        yield from waiter
+
+        locked = second.locked
+        yield from second.release()
+
+        return { 'locked': locked, 'waiting': waiting, }
+
+
+class LockContentionFixture(FakeEtcdFixture):
+    '''``contenders`` Locks on one client acquiring (and holding) at once.
+
+    Each contender starts a little after the one before so it appends its
+    key while the earlier contenders' listings are in transit.
+
+    '''
+
+    @property
+    def description(self) -> str:
+        return super().description + '.Lock({0.path}) acquired by {0.contenders} contenders on one client at once'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        self.servers[0].transit = 0.05
+
+        holders = []
+        overlaps = []
+
+        @asyncio.coroutine
+        def contend(lock, delay):
+            yield from asyncio.sleep(delay)
+            yield from lock.acquire()
+
+            try:
+                holders.append(lock)
+                overlaps.append(len(holders) > 1)
+
+                yield from asyncio.sleep(0.02)
+            finally:
+                holders.remove(lock)
+                yield from lock.release()
+
+        yield from asyncio.gather(*[ contend(Lock(self.client, self.path), 0.01 * _) for _ in range(self.contenders) ])
+
+        return {
+            'acquired': len(overlaps),
+            'overlapped': any(overlaps),
+            'remaining': len(( yield from self.client.ls(self.path) )),
+        }
+
+
+class AsyncEtcdClientLatencyFixture(FakeEtcdFixture):
+    '''Read from two members, one of which is ``slow`` seconds slower.'''
+
+    members = 2
+
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.get_value {0.reads} times with a member {0.slow}s slow'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        slow, fast = self.servers
+        slow.latency = self.slow
+
+        for server in self.servers:
+            server._set('/foo', { 'value': 'bar', }, False)
+
+        values = []
+
+        for _ in range(self.reads):
+            values.append(( yield from self.client.get_value('/foo') ))
+
+        return {
+            'fast': fast.requests,
+            'slow': slow.requests,
+            'values': set(values),
+        }
+
+
+class AsyncEtcdClientFailoverFixture(FakeEtcdFixture):
+    '''Read from two members after one of them stops.
+
+    Once the stopped member's back off has run out it is started again and
+    the other member fails a read: the read is answered by the member that
+    came back.
+
+    '''
+
+    members = 2
+
+    @property
+    def description(self) -> str:
+        return super().description + '.AsyncEtcdClient.get_value {0.reads} times with a member down'.format(self)
+
+    @asyncio.coroutine
+    def scenario(self):
+        dead, alive = self.servers
+
+        for server in self.servers:
+            server._set('/foo', { 'value': 'bar', }, False)
+
+        member = next(_ for _ in self.client.cluster.members if _.url == dead.url)
+
+        yield from dead.stop()
+
+        values = []
+
+        for _ in range(self.reads):
+            values.append(( yield from self.client.get_value('/foo') ))
+        requests = alive.requests
+        failures = member.failures
+
+        yield from asyncio.sleep(1.1)  # the first back off
+
+        self.servers[0] = FakeEtcd('127.0.0.1', port = int(dead.url.rsplit(':', 1)[1].split('/')[0]))
+        yield from self.servers[0].start()
+        self.servers[0]._set('/foo', { 'value': 'baz', }, False)
+
+        alive.failures = 1
+        values.append(( yield from self.client.get_value('/foo') ))
+
+        return {
+            'failures': failures,
+            'healthy': member.healthy,
+            'requests': requests,
+            'values': values,
+        }
+
+
+class SyncEtcdClientIterateFixture(SyncEtcdClientFixture):
+    '''Stop iterating over /i (of ``keys`` keys) after the first node.
+
+    The generator is closed before the client (its stream's admission must
+    be released by then) and another after the client is closed.
+
+    '''
+
+    @property
+    def description(self) -> str:
+        return super().description + '.SyncEtcdClient.iter_nodes of {0.keys} closed early'.format(self)
+
+    def scenario(self):
+        for key in self.keys:
+            self.client.set(key, key)
+
+        nodes = self.client.iter_nodes('/i', sorted = True)
+        first = next(nodes).key
+        nodes.close()
+
+        in_flight = self.client.client.admission.in_flight
+
+        nodes = self.client.iter_nodes('/i', sorted = True)
+        next(nodes)
+
+        self.client.close()
+
+        try:
+            nodes.close()
+        except RuntimeError as error:
+            closed = type(error).__name__
+        else:
+            closed = True
+
+        return {
+            'closed': closed,
+            'first': first,
+            'in_flight': in_flight,
+        }
+
+
 helpers.import_directory(__name__, os.path.dirname(__file__), sort_key = lambda _: -_.count('_') )
 
 
@@ -88,6 +1288,10 @@ class ClientUnitTest(contexts.TestContext, metaclass = contexts.MetaContext):
         AsyncEtcdClientInitFixture,
         AsyncEtcdClientPropertyFixture,
         AsyncEtcdClientGetFixture,
+        AsyncEtcdClientWriteFixture,
+        FakeEtcdFixture,
+        NodeStreamFixture,
+        SyncEtcdClientFixture,
     )
 
     def __init__(self, *args, **kwargs) -> None:
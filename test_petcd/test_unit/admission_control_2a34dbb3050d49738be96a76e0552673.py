@@ -0,0 +1,45 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from petcd import AdmissionControl
+from petcd import BACKGROUND
+from petcd import INTERACTIVE
+from petcd import NORMAL
+from test_petcd.test_unit import AdmissionControlFixture
+
+# Waiting reads are admitted in priority order.
+
+fixtures.register(globals(), ( AdmissionControlFixture, ), {
+    'client_kwargs': {
+        'admission': AdmissionControl(concurrency = 1),
+    },
+
+    'reads': [ ( '/a', BACKGROUND, ), ( '/b', BACKGROUND, ), ( '/c', NORMAL, ), ( '/d', INTERACTIVE, ), ],
+
+    'expected': [ '/a', '/d', '/c', '/b', ],
+})
+
+# The reserved slot is not used by BACKGROUND reads.
+
+fixtures.register(globals(), ( AdmissionControlFixture, ), {
+    'client_kwargs': {
+        'admission': AdmissionControl(concurrency = 2, reserve = 1),
+    },
+
+    'reads': [ ( '/a', BACKGROUND, ), ( '/b', BACKGROUND, ), ( '/c', INTERACTIVE, ), ],
+
+    'expected': [ '/a', '/c', '/b', ],
+})
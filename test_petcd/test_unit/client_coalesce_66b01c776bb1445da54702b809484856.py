@@ -0,0 +1,64 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from test_petcd.test_unit import AsyncEtcdClientCoalesceFixture
+
+fixtures.register(globals(), ( AsyncEtcdClientCoalesceFixture, ), {
+    'reads': [ {}, {}, {}, ],
+    'cancel_first': False,
+
+    'expected': {
+        'requests': 1,
+        'values': [ 'bar', 'bar', 'bar', ],
+    },
+})
+
+# Only identical reads (of the same priority) are coalesced.
+
+fixtures.register(globals(), ( AsyncEtcdClientCoalesceFixture, ), {
+    'reads': [ {}, {}, { 'quorum': True, }, { 'priority': 0, }, ],
+    'cancel_first': False,
+
+    'expected': {
+        'requests': 3,
+        'values': [ 'bar', 'bar', 'bar', 'bar', ],
+    },
+})
+
+# The others are not cancelled with the read they joined: one sends again.
+
+fixtures.register(globals(), ( AsyncEtcdClientCoalesceFixture, ), {
+    'reads': [ {}, {}, {}, ],
+    'cancel_first': True,
+
+    'expected': {
+        'requests': 2,
+        'values': [ 'cancelled', 'bar', 'bar', ],
+    },
+})
+
+# Quorum reads are never coalesced: a read sent earlier may miss the caller's
+# own writes.
+
+fixtures.register(globals(), ( AsyncEtcdClientCoalesceFixture, ), {
+    'reads': [ { 'quorum': True, }, { 'quorum': True, }, ],
+    'cancel_first': False,
+
+    'expected': {
+        'requests': 2,
+        'values': [ 'bar', 'bar', ],
+    },
+})
@@ -0,0 +1,47 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from test_petcd.test_unit import AsyncEtcdClientDiscoveryFixture
+
+# Nothing listens on port 1: the advertised URL is unreachable (i.e. NAT).
+
+fixtures.register(globals(), ( AsyncEtcdClientDiscoveryFixture, ), {
+    'client_kwargs': {
+        'discovery_interval': None,
+    },
+
+    'advertised': [ 'http://127.0.0.1:1', ],
+
+    'expected': {
+        'nodes': [ 'seed', ],
+        'url': 'seed',
+        'value': 'bar',
+    },
+})
+
+fixtures.register(globals(), ( AsyncEtcdClientDiscoveryFixture, ), {
+    'client_kwargs': {
+        'discovery_interval': 300,
+    },
+
+    'advertised': [ 'http://127.0.0.1:1', ],
+
+    'expected': {
+        'nodes': [ 'http://127.0.0.1:1/v2', 'seed', ],
+        'url': 'seed',
+        'value': 'bar',
+    },
+})
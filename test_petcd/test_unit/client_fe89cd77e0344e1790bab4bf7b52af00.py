@@ -25,9 +25,28 @@ from test_petcd.test_unit import AsyncEtcdClientPropertyFixture
 logger = logging.getLogger(__name__)
 
 expected = {
-    '_url': 'http://localhost:7379/v2',
-    '_retries': 1,
+    '_admission': None,
+    '_cache': None,
+    '_cache_watcher': None,
+    '_cluster': None,
+    '_connection_limit': 100,
+    '_discovered_at': None,
+    '_discovery': None,
+    '_discovery_interval': None,
+    '_dns_cache_ttl': 10,
+    '_etcd_index': None,
     '_follow_redirects': True,
+    '_hedge_policy': None,
+    '_in_flight': {},
+    '_keepalive_timeout': 30.0,
+    '_loop': None,
+    '_metrics': None,
+    '_read_your_writes': False,
+    '_retries': 1,
+    '_retry_policy': None,
+    '_session': None,
+    '_url': 'http://localhost:7379/v2',
+    '_watchers': None,
 }
 
 properties = [ { fixture.property: fixture.expected, } for fixture in fixtures.of(( AsyncEtcdClientPropertyFixture, )) ]
@@ -22,6 +22,8 @@ from test_petcd.test_unit import AsyncEtcdClientGetFixture
 
 expected = {
     'key': '/foo',
+    'deadline': None,
+    'priority': 1,
     'quorum': False,
     'recursive': False,
     'sorted': False,
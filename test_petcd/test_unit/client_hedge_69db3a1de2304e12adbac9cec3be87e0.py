@@ -0,0 +1,50 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from petcd import HedgePolicy
+from test_petcd.test_unit import AsyncEtcdClientHedgeFixture
+
+# The hedge to the other member answers first.
+
+fixtures.register(globals(), ( AsyncEtcdClientHedgeFixture, ), {
+    'client_kwargs': {
+        'hedge_policy': HedgePolicy(),
+    },
+
+    'slow': 0.5,
+
+    'expected': {
+        'hedges': { True: 1, },
+        'slow': False,
+        'value': 'bar',
+    },
+})
+
+# No hedge is left in the budget: the read waits for the slow member.
+
+fixtures.register(globals(), ( AsyncEtcdClientHedgeFixture, ), {
+    'client_kwargs': {
+        'hedge_policy': HedgePolicy(ratio = 0.0, burst = 0.0),
+    },
+
+    'slow': 0.2,
+
+    'expected': {
+        'hedges': {},
+        'slow': True,
+        'value': 'bar',
+    },
+})
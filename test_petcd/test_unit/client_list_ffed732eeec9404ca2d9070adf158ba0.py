@@ -0,0 +1,54 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from petcd import AdmissionControl
+from test_petcd.test_unit import AsyncEtcdClientListFixture
+
+# A single slot: a stream that kept its admission would block the next list.
+
+fixtures.register(globals(), ( AsyncEtcdClientListFixture, ), {
+    'client_kwargs': {
+        'admission': AdmissionControl(concurrency = 1),
+    },
+
+    'count': 3,
+    'size': 10,
+
+    'expected': {
+        'first': '/d/0',
+        'in_flight': 0,
+        'keys': [ '/d/0', '/d/1', '/d/2', ],
+        'sizes': [ 10, 10, 10, ],
+    },
+})
+
+# Larger than NodeStream's buffer: parsed incrementally.
+
+fixtures.register(globals(), ( AsyncEtcdClientListFixture, ), {
+    'client_kwargs': {
+        'admission': AdmissionControl(concurrency = 1),
+    },
+
+    'count': 3,
+    'size': 500000,
+
+    'expected': {
+        'first': '/d/0',
+        'in_flight': 0,
+        'keys': [ '/d/0', '/d/1', '/d/2', ],
+        'sizes': [ 500000, 500000, 500000, ],
+    },
+})
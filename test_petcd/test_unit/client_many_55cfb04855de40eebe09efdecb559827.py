@@ -0,0 +1,84 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from test_petcd.test_unit import AsyncEtcdClientManyFixture
+
+fixtures.register(globals(), ( AsyncEtcdClientManyFixture, ), {
+    'operation': 'set_many',
+    'existing': (),
+    'arguments': [ ( '/k/a', '1', ), ( '/k/b', '2', ), ( '/k/c', '3', ), ( '/k/d', '4', ), ( '/k/e', '5', ), ],
+    'kwargs': { 'concurrency': 2, },
+
+    'expected': {
+        'keys': [ '/k/a', '/k/b', '/k/c', '/k/d', '/k/e', ],
+        'most': 2,
+        'results': [ '/k/a', '/k/b', '/k/c', '/k/d', '/k/e', ],
+    },
+})
+
+# /k/dir is a directory: setting it fails (without failing the others).
+
+fixtures.register(globals(), ( AsyncEtcdClientManyFixture, ), {
+    'operation': 'set_many',
+    'existing': ( ( '/k/dir/x', '0', ), ),
+    'arguments': [ ( '/k/a', '1', ), ( '/k/dir', '2', ), ( '/k/c', '3', ), ],
+    'kwargs': { 'concurrency': 3, },
+
+    'expected': {
+        'keys': [ '/k/a', '/k/c', '/k/dir', ],
+        'most': 3,
+        'results': [ '/k/a', 'EtcdNotFile', '/k/c', ],
+    },
+})
+
+fixtures.register(globals(), ( AsyncEtcdClientManyFixture, ), {
+    'operation': 'set_many',
+    'existing': ( ( '/k/dir/x', '0', ), ),
+    'arguments': [ ( '/k/a', '1', ), ( '/k/dir', '2', ), ( '/k/c', '3', ), ],
+    'kwargs': { 'concurrency': 1, 'stop_on_error': True, },
+
+    'expected': {
+        'keys': [ '/k/a', '/k/dir', ],
+        'most': 1,
+        'results': 'EtcdNotFile',
+    },
+})
+
+fixtures.register(globals(), ( AsyncEtcdClientManyFixture, ), {
+    'operation': 'delete_many',
+    'existing': ( ( '/k/a', '1', ), ( '/k/b', '2', ), ( '/k/c', '3', ), ),
+    'arguments': [ '/k/a', '/k/x', '/k/c', ],
+    'kwargs': { 'concurrency': 2, },
+
+    'expected': {
+        'keys': [ '/k/b', ],
+        'most': 2,
+        'results': [ '/k/a', 'EtcdKeyNotFound', '/k/c', ],
+    },
+})
+
+fixtures.register(globals(), ( AsyncEtcdClientManyFixture, ), {
+    'operation': 'delete_many',
+    'existing': ( ( '/k/a', '1', ), ( '/k/b', '2', ), ),
+    'arguments': [ '/k/x', '/k/a', ],
+    'kwargs': { 'concurrency': 1, 'stop_on_error': True, },
+
+    'expected': {
+        'keys': [ '/k/a', '/k/b', ],
+        'most': 1,
+        'results': 'EtcdKeyNotFound',
+    },
+})
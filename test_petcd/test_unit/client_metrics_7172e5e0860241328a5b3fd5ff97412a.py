@@ -0,0 +1,46 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from test_petcd.test_unit import AsyncEtcdClientMetricsFixture
+
+fixtures.register(globals(), ( AsyncEtcdClientMetricsFixture, ), {
+    'failures': 0,
+
+    'expected': {
+        'requests': {
+            ( 'GET', '2xx', ): 2,
+            ( 'GET', '4xx', ): 1,
+            ( 'PUT', '2xx', ): 1,
+        },
+        'retries': {},
+    },
+})
+
+fixtures.register(globals(), ( AsyncEtcdClientMetricsFixture, ), {
+    'failures': 1,
+
+    'expected': {
+        'requests': {
+            ( 'GET', '2xx', ): 2,
+            ( 'GET', '4xx', ): 1,
+            ( 'GET', '5xx', ): 1,
+            ( 'PUT', '2xx', ): 1,
+        },
+        'retries': {
+            'GET': 1,
+        },
+    },
+})
@@ -0,0 +1,48 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import functools
+
+from torment import fixtures
+from torment import helpers
+
+from test_petcd import test_helpers
+from test_petcd.test_unit import AsyncEtcdClientWriteFixture
+
+expected = {
+    'method': 'PUT',
+    'dir': True,
+    'key': '/foo',
+    'deadline': None,
+    'priority': 1,
+    'ttl': None,
+    'prev_exist': None,
+}
+
+arguments = [
+    { 'ttl': ( 30, ), },
+    { 'prev_exist': ( True, ), },
+]
+
+for combination in test_helpers.powerset(arguments):
+    for subset in test_helpers.evert(combination):
+        fixtures.register(globals(), ( AsyncEtcdClientWriteFixture, ), {
+            'operation': 'mkdir',
+
+            'parameters': {
+                'kwargs': functools.reduce(helpers.extend, list(subset), { 'key': '/foo', }),
+            },
+
+            'expected': functools.reduce(helpers.extend, [ expected ] + list(subset), { 'key': '/foo', }),
+        })
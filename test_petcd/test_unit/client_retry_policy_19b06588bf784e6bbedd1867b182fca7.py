@@ -0,0 +1,65 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from petcd import RetryBudget
+from petcd import RetryPolicy
+from test_petcd.test_unit import AsyncEtcdClientRetryFixture
+
+# A plain set may have been applied: it is not replayed.
+
+fixtures.register(globals(), ( AsyncEtcdClientRetryFixture, ), {
+    'compare': False,
+    'failures': 1,
+
+    'expected': {
+        'requests': 1,
+        'result': 300,
+    },
+})
+
+fixtures.register(globals(), ( AsyncEtcdClientRetryFixture, ), {
+    'compare': True,
+    'failures': 1,
+
+    'expected': {
+        'requests': 2,
+        'result': 'b',
+    },
+})
+
+fixtures.register(globals(), ( AsyncEtcdClientRetryFixture, ), {
+    'compare': True,
+    'failures': 2,
+
+    'expected': {
+        'requests': 2,
+        'result': 300,
+    },
+})
+
+fixtures.register(globals(), ( AsyncEtcdClientRetryFixture, ), {
+    'client_kwargs': {
+        'retry_policy': RetryPolicy(retries = 1, budget = RetryBudget(burst = 0)),
+    },
+
+    'compare': True,
+    'failures': 1,
+
+    'expected': {
+        'requests': 1,
+        'result': 300,
+    },
+})
@@ -0,0 +1,79 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+
+from torment import fixtures
+
+from test_petcd.test_unit import AsyncEtcdClientTimeoutFixture
+
+# Reads (including streamed ones) give up at the deadline.
+
+for operation, arguments in (
+    ( 'dump', ( '/t', io.StringIO(), ), ),
+    ( 'first', ( '/t', ), ),
+    ( 'get_list', ( '/t', ), ),
+    ( 'ls', ( '/t', ), ),
+):
+    fixtures.register(globals(), ( AsyncEtcdClientTimeoutFixture, ), {
+        'arguments': arguments,
+        'latency': 0.3,
+        'operation': operation,
+
+        'expected': {
+            'prompt': True,
+            'result': 'TimeoutError',
+        },
+    })
+
+# Bulk writes share one deadline: each write not finished by then fails.
+
+for operation, arguments in (
+    ( 'delete_many', ( [ '/t/a', '/t/b', ], ), ),
+    ( 'set_many', ( { '/t/a': 'a', '/t/b': 'b', }, ), ),
+):
+    fixtures.register(globals(), ( AsyncEtcdClientTimeoutFixture, ), {
+        'arguments': arguments,
+        'latency': 0.3,
+        'operation': operation,
+
+        'expected': {
+            'prompt': True,
+            'result': [ 'TimeoutError', 'TimeoutError', ],
+        },
+    })
+
+fixtures.register(globals(), ( AsyncEtcdClientTimeoutFixture, ), {
+    'arguments': ( io.StringIO('{"key":"/t/a","value":"a"}\n'), ),
+    'latency': 0.3,
+    'operation': 'load',
+
+    'expected': {
+        'prompt': True,
+        'result': 'TimeoutError',
+    },
+})
+
+# Without latency every call finishes in time.
+
+fixtures.register(globals(), ( AsyncEtcdClientTimeoutFixture, ), {
+    'arguments': ( '/t', ),
+    'latency': 0.0,
+    'operation': 'ls',
+
+    'expected': {
+        'prompt': True,
+        'result': [ 'str', ],
+    },
+})
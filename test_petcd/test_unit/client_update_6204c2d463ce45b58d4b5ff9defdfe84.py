@@ -0,0 +1,53 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from test_petcd.test_unit import AsyncEtcdClientUpdateFixture
+
+fixtures.register(globals(), ( AsyncEtcdClientUpdateFixture, ), {
+    'failures': 0,
+    'losses': 0,
+
+    'expected': {
+        'calls': [ '0', ],
+        'error': None,
+        'value': '1',
+    },
+})
+
+# A write whose outcome is unknown is neither replayed nor guessed at (another
+# writer may have written the same value): its error is raised.
+
+fixtures.register(globals(), ( AsyncEtcdClientUpdateFixture, ), {
+    'failures': 0,
+    'losses': 1,
+
+    'expected': {
+        'calls': [ '0', ],
+        'error': 300,
+        'value': '1',
+    },
+})
+
+fixtures.register(globals(), ( AsyncEtcdClientUpdateFixture, ), {
+    'failures': 1,
+    'losses': 0,
+
+    'expected': {
+        'calls': [ '0', ],
+        'error': 300,
+        'value': '0',
+    },
+})
@@ -0,0 +1,55 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from test_petcd.test_unit import EventStreamFixture
+
+# Blocking delivers every event (reading resumes after the buffer drains).
+
+fixtures.register(globals(), ( EventStreamFixture, ), {
+    'overflow': 'block',
+    'size': 2,
+    'writes': [ ( 'a', '1', ), ( 'b', '1', ), ( 'a', '2', ), ( 'a', '3', ), ],
+
+    'expected': {
+        'coalesced': 0,
+        'events': [
+            ( '/e/start', '', ),
+            ( '/e/a', '1', ),
+            ( '/e/b', '1', ),
+            ( '/e/a', '2', ),
+            ( '/e/a', '3', ),
+            ( '/e/end', '', ),
+        ],
+    },
+})
+
+# Coalescing delivers only the latest buffered event of each key.
+
+fixtures.register(globals(), ( EventStreamFixture, ), {
+    'overflow': 'coalesce',
+    'size': 10,
+    'writes': [ ( 'a', '1', ), ( 'b', '1', ), ( 'a', '2', ), ( 'a', '3', ), ],
+
+    'expected': {
+        'coalesced': 2,
+        'events': [
+            ( '/e/start', '', ),
+            ( '/e/b', '1', ),
+            ( '/e/a', '3', ),
+            ( '/e/end', '', ),
+        ],
+    },
+})
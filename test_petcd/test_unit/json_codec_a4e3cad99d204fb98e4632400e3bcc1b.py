@@ -0,0 +1,33 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from test_petcd.test_unit import JSONCodecFixture
+
+# Every backend encodes compactly, without escaping non-ASCII characters or
+# slashes, and decodes the same documents.
+
+for backend in ( 'orjson', 'ujson', 'json', ):
+    fixtures.register(globals(), ( JSONCodecFixture, ), {
+        'backend': backend,
+        'value': { 'path': '/é', 'list': [ 1, 2.5, None, True, ], },
+
+        'expected': {
+            'backend': backend,
+            'dumps': '{"list":[1,2.5,null,true],"path":"/é"}',
+            'key': '/j',
+            'value': { 'path': '/é', 'list': [ 1, 2.5, None, True, ], },
+        },
+    })
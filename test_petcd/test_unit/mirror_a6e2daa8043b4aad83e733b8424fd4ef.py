@@ -0,0 +1,34 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from test_petcd.test_unit import MirrorFixture
+
+fixtures.register(globals(), ( MirrorFixture, ), {
+    'existing': [ '/m/a', '/m/d/x', '/m/q/2', ],
+    'changes': [
+        ( 'PUT', '/m/q/1', ),
+        ( 'DELETE', '/m/d', ),
+        ( 'PUT', '/m/a.x', ),
+        ( 'PUT', '/m/e/f', ),
+    ],
+
+    'expected': {
+        'first': '/m/q/1',
+        'loaded': [ '/m/a', '/m/d', '/m/q', ],
+        'ls': [ '/m/a', '/m/a.x', '/m/e', '/m/q', ],
+        'scan': [ '/m/a', '/m/a.x', '/m/e/f', '/m/q/1', '/m/q/2', ],
+    },
+})
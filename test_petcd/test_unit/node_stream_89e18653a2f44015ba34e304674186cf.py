@@ -0,0 +1,81 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from test_petcd.test_unit import NodeStreamFixture
+
+CHUNKS = (
+    b'{"action":"get","node":{"key":"/d","dir":true,"nodes":[{"key":"/d/a","va',
+    b'lue":"\\"}"},{"key":"/d/b","value":"2"}]}}',
+)
+
+fixtures.register(globals(), ( NodeStreamFixture, ), {
+    'buffer_size': 1048576,
+    'chunks': CHUNKS,
+
+    'expected': {
+        'closed': 1,
+        'keys': [ '/d/a', '/d/b', ],
+        'released': 1,
+    },
+})
+
+fixtures.register(globals(), ( NodeStreamFixture, ), {
+    'buffer_size': 0,
+    'chunks': CHUNKS,
+
+    'expected': {
+        'closed': 1,
+        'keys': [ '/d/a', '/d/b', ],
+        'released': 1,
+    },
+})
+
+# A malformed element: the response is released as the error is raised.
+
+fixtures.register(globals(), ( NodeStreamFixture, ), {
+    'buffer_size': 0,
+    'chunks': ( b'{"action":"get","node":{"key":"/d","dir":true,"nodes":[{"key":"/d/a","value":x}', b']}}', ),
+
+    'expected': {
+        'closed': 1,
+        'error': 'ValueError',
+        'released': 1,
+    },
+})
+
+# Truncated bodies (whether buffered or parsed incrementally).
+
+fixtures.register(globals(), ( NodeStreamFixture, ), {
+    'buffer_size': 0,
+    'chunks': ( b'{"action":"get","node":{"key":"/d","dir":true,"nodes":[{"key":"/d/a"', ),
+
+    'expected': {
+        'closed': 1,
+        'error': 'ValueError',
+        'released': 1,
+    },
+})
+
+fixtures.register(globals(), ( NodeStreamFixture, ), {
+    'buffer_size': 1048576,
+    'chunks': ( b'{"action":"get","node":{"key":"/d","dir":true,"nodes":[{"key":"/d/a"', ),
+
+    'expected': {
+        'closed': 1,
+        'error': 'ValueError',
+        'released': 1,
+    },
+})
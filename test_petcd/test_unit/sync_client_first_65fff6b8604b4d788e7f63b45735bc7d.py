@@ -0,0 +1,29 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from test_petcd.test_unit import SyncEtcdClientFirstFixture
+
+fixtures.register(globals(), ( SyncEtcdClientFirstFixture, ), {
+    'keys': [ '/q/2', '/q/1', '/q/3', ],
+
+    'expected': '/q/1',
+})
+
+fixtures.register(globals(), ( SyncEtcdClientFirstFixture, ), {
+    'keys': [],
+
+    'expected': None,
+})
@@ -0,0 +1,34 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from petcd import AdmissionControl
+from test_petcd.test_unit import TTLRefresherFixture
+
+fixtures.register(globals(), ( TTLRefresherFixture, ), {
+    'client_kwargs': {
+        'admission': AdmissionControl(concurrency = 1),
+    },
+
+    'keys': [ '/t/a', '/t/b', ],
+    'slots': 8,
+    'tick': 0.01,
+    'ttl': 1,
+
+    'expected': {
+        'keys': [],
+        'turning': True,
+    },
+})
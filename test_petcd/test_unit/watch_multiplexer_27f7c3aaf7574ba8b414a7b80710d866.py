@@ -0,0 +1,47 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from test_petcd.test_unit import WatchMultiplexerFixture
+
+fixtures.register(globals(), ( WatchMultiplexerFixture, ), {
+    'description': 'top level keys are not polled from the root',
+
+    'keys': [
+        ( '/top', False, ),
+        ( '/config/a', False, ),
+        ( '/jobs/a', False, ),
+        ( '/jobs/b', False, ),
+    ],
+
+    'expected': {
+        'keys': [ '/top', '/config/a', '/jobs/a', '/jobs/b', ],
+        'prefixes': [ '/config', '/jobs', '/top', ],
+    },
+})
+
+fixtures.register(globals(), ( WatchMultiplexerFixture, ), {
+    'description': 'a poll on the root is not shared',
+
+    'keys': [
+        ( '/', True, ),
+        ( '/jobs/a', False, ),
+    ],
+
+    'expected': {
+        'keys': [ '/x', '/jobs/a', ],
+        'prefixes': [ '/', '/jobs', ],
+    },
+})
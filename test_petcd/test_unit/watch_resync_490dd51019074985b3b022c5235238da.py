@@ -0,0 +1,54 @@
+# Copyright 2015 Alex Brandt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from torment import fixtures
+
+from test_petcd.test_unit import WatchResyncFixture
+
+# /r/d is deleted (with its keys) and created again by /r/d/z (with no
+# event of its own); /r/f is set more often than etcd's history holds.  The
+# snapshot is never answered by (coalesced with) a read sent before the
+# changes (stale_read): the same events are delivered.
+
+for stale_read in ( False, True, ):
+    fixtures.register(globals(), ( WatchResyncFixture, ), {
+        'existing': [ '/r/d/x', '/r/d/y', '/r/old', '/r/keep', ],
+        'changes': [
+            ( 'PUT', '/r/a', {}, ),
+            ( 'DELETE', '/r/d', { 'recursive': 'true', }, ),
+            ( 'DELETE', '/r/old', {}, ),
+            ( 'PUT', '/r/d/z', {}, ),
+            ( 'PUT', '/r/f', {}, ),
+            ( 'PUT', '/r/f', {}, ),
+            ( 'PUT', '/r/f', {}, ),
+            ( 'PUT', '/r/f', {}, ),
+        ],
+        'stale_read': stale_read,
+
+        'expected': {
+            'delivered': [
+                ( 'create', '/r/a', 0, ),
+                ( 'delete', '/r/d', 1, ),
+                ( 'delete', '/r/old', 2, ),
+                ( 'create', '/r/d/z', 3, ),
+                ( 'create', '/r/f', 7, ),
+            ],
+            'events': [
+                ( 'delete', '/r/d', True, 1, ),
+                ( 'delete', '/r/old', False, 2, ),
+                ( 'create', '/r/d/z', False, 3, ),
+                ( 'create', '/r/f', False, 7, ),
+            ],
+        },
+    })